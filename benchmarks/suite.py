@@ -0,0 +1,276 @@
+"""Benchmark de desempenho com tráfego sintético e detector determinístico.
+
+Mede Sort.update, associate_detections_to_trackers, a contagem por percurso, a renderização, a
+leitura dos frames (com e sem o pool de buffers) e o process_video completo com diferentes números de objetos e de percursos, e confere a contagem
+final contra a verdade do tráfego sintético. Os resultados vão para um JSON comparável entre commits.
+
+    python -m benchmarks.suite [--quick] [--output resultados.json] [--compare base.json]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from main import CONFIG
+from src.frame_pool import open_frame_reader
+from src.path_counter import create_counter
+from src.path_renderer import PathRenderer
+from src.process_video import create_paths, process_video, read_frames
+from src.sort import KalmanBoxTracker, Sort, associate_detections_to_trackers
+from benchmarks.synthetic import Traffic, lane_occluders, lane_paths, moving_boxes
+
+WIDTH, HEIGHT = 848, 480
+
+# Cenários do processamento completo: (percursos, veículos por frame por percurso, faixas de oclusão por percurso, erro tolerado por percurso).
+# Com oclusão, o erro só é reportado (None): a faixa parte o veículo em pedaços e o SORT, que associa só por IoU, troca o ID.
+FULL_SCENARIOS = [
+    (2, 0.02, 0, 0),
+    (4, 0.03, 0, 0),
+    (8, 0.04, 0, 0),
+    (4, 0.03, 1, None),
+]
+
+def timings(func, repeat):
+    """Tempos (s) de repeat chamadas de func, depois de uma chamada de aquecimento."""
+    func()
+    out = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        out.append(time.perf_counter() - start)
+    return np.array(out)
+
+def summary(seconds, per=1):
+    """Mediana, p95 e média em ms por unidade (frame/chamada), e unidades por segundo."""
+    seconds = np.asarray(seconds) / per
+    return {'median_ms': 1000 * float(np.median(seconds)), 'p95_ms': 1000 * float(np.percentile(seconds, 95)),
+            'mean_ms': 1000 * float(seconds.mean()), 'per_second': float(1 / max(seconds.mean(), 1e-12))}
+
+def bench_sort(n_objects, backend, n_frames):
+    detections = moving_boxes(n_objects, n_frames)
+    def run():
+        KalmanBoxTracker.count = 0
+        tracker = Sort(max_age=30, min_hits=3, iou_threshold=0.3, backend=backend)
+        for dets in detections:
+            tracker.update(dets)
+    return summary(timings(run, 3), n_frames)
+
+def bench_associate(n_objects, repeat):
+    boxes = moving_boxes(n_objects, 2)
+    detections, trackers = boxes[1], boxes[0]
+    return summary(timings(lambda: associate_detections_to_trackers(detections, trackers, 0.3), repeat))
+
+def tracked_traffic(n_paths, density, n_frames):
+    """Percursos e resultados de rastreamento perfeitos [x1,y1,x2,y2,id] de cada frame do tráfego sintético."""
+    paths = lane_paths(n_paths, WIDTH, HEIGHT)
+    traffic = Traffic(paths, n_frames, density)
+    return paths, [traffic.positions(frame_index) for frame_index in range(n_frames)]
+
+def bench_counting(n_paths, density, engine, n_frames):
+    paths, frames = tracked_traffic(n_paths, density, n_frames)
+    def run():
+        counter = create_counter(create_paths(paths), engine)
+        for tracked_results in frames:
+            counter.update(tracked_results)
+    result = summary(timings(run, 3), n_frames)
+    result['objects_per_frame'] = float(np.mean([len(tracked) for tracked in frames]))
+    return result
+
+def bench_render(n_paths, density, n_frames):
+    paths, frames = tracked_traffic(n_paths, density, n_frames)
+    zones = create_paths(paths)
+    counter = create_counter(zones, 'vectorized')
+    states = []
+    for tracked_results in frames:
+        counter.update(tracked_results)
+        states.append((counter.checkpoint_progress(), {name: zone.counter for name, zone in zones.items()}))
+    frame = np.zeros((HEIGHT, WIDTH, 3), dtype=np.uint8)
+    def run():
+        renderer = PathRenderer(zones, frame.shape)
+        for progress, counters in states:
+            renderer.draw(frame, progress, counters)
+    return summary(timings(run, 3), n_frames)
+
+def source_video(workdir, width, height, n_frames):
+    """Vídeo sintético na resolução de origem dada, reaproveitado entre execuções."""
+    video_path = os.path.join(workdir, f'source_{width}x{height}_{n_frames}.avi')
+    if not os.path.exists(video_path):
+        Traffic(lane_paths(4, width, height), n_frames, 0.03).write_video(video_path, width, height)
+    return video_path
+
+def bench_ingest(video_path, decoder, n_frames):
+    """Leitura e redimensionamento para WIDTH x HEIGHT: ms por frame e bytes alocados por frame.
+
+    decoder None é a leitura padrão (cap.read + cv2.resize, um array novo de cada); 'opencv' e
+    'ffmpeg' usam o pool de buffers de open_frame_reader. As alocações são as de NumPy/OpenCV
+    vistas pelo tracemalloc, medidas em uma segunda passada (o tracemalloc atrasa a leitura).
+    Só alocações são medidas, não cópias nem banda de memória: as cópias feitas dentro do
+    decodificador do OpenCV (ou do ffmpeg) e do pré-processamento do YOLO não aparecem aqui, e o
+    efeito delas fica apenas no ms por frame.
+    """
+    config = {'video_path': video_path, 'ingest': {'enabled': decoder is not None, 'decoder': decoder or 'opencv'}}
+    def frames():
+        cap = cv2.VideoCapture(video_path)
+        reader = open_frame_reader(config, cap, WIDTH, HEIGHT)
+        with contextlib.redirect_stdout(io.StringIO()):
+            yield from read_frames(cap, WIDTH, HEIGHT, reader=reader)
+        cap.release()
+        if reader is not None:
+            reader.release()
+
+    start = time.perf_counter()
+    n = sum(1 for _ in frames())
+    elapsed = time.perf_counter() - start
+
+    allocated = []
+    previous = 0
+    tracemalloc.start()
+    for _ in frames():
+        # Pico desde o frame anterior acima do que já estava alocado: a memória nova da leitura deste frame
+        current, peak = tracemalloc.get_traced_memory()
+        allocated.append(peak - previous)
+        previous = current
+        tracemalloc.reset_peak()
+    tracemalloc.stop()
+    # O primeiro frame inclui a abertura da captura e a criação do pool
+    return {'ms_per_frame': 1000 * elapsed / max(n, 1), 'frames': n,
+            'allocated_mb_per_frame': float(np.mean(allocated[1:])) / 2**20 if len(allocated) > 1 else 0.0}
+
+def bench_full(n_paths, density, occluders_per_path, n_frames, workdir, extra_config=None):
+    """process_video completo sobre o vídeo sintético, com o detector 'mock'; inclui a conferência da contagem."""
+    paths = lane_paths(n_paths, WIDTH, HEIGHT)
+    traffic = Traffic(paths, n_frames, density)
+    occluders = lane_occluders(paths, WIDTH, occluders_per_path) if occluders_per_path else []
+    video_path = os.path.join(workdir, f'traffic_{n_paths}_{density}_{occluders_per_path}_{n_frames}.avi')
+    if not os.path.exists(video_path):
+        traffic.write_video(video_path, WIDTH, HEIGHT, occluders)
+
+    config = dict(CONFIG, video_path=video_path, display=False, draw_detections=False, target_classes=['car'],
+                  detector={'backend': 'mock'}, **(extra_config or {}))
+    KalmanBoxTracker.count = 0
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        counts = process_video(config, paths, WIDTH, HEIGHT)
+    elapsed = time.perf_counter() - start
+    truth = traffic.ground_truth()
+    return {
+        'fps': n_frames / elapsed,
+        'ms_per_frame': 1000 * elapsed / n_frames,
+        'vehicles': len(traffic.vehicles),
+        'counts': counts,
+        'ground_truth': truth,
+        'max_count_error': max(abs(counts[name] - truth[name]) for name in truth),
+    }
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {'commit': commit, 'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'), 'python': platform.python_version(),
+            'numpy': np.__version__, 'opencv': cv2.__version__, 'machine': platform.machine(), 'processor': platform.processor(),
+            'cpu_count': os.cpu_count()}
+
+def run_suite(quick=False, workdir=None):
+    """Executa todos os benchmarks; retorna (registros, falhas de contagem)."""
+    n_frames = 60 if quick else 200
+    object_counts = [10, 50, 200] if quick else [10, 50, 200, 1000]
+    path_counts = [2, 8] if quick else [2, 4, 8, 16]
+    source_sizes = [(1920, 1080)] if quick else [(1920, 1080), (3840, 2160)]
+    records = []
+    failures = []
+
+    def add(name, params, metrics):
+        records.append({'name': name, 'params': params, 'metrics': metrics})
+        shown = ', '.join(f'{k}={v}' for k, v in params.items())
+        value = metrics.get('median_ms', metrics.get('ms_per_frame'))
+        if 'max_count_error' in metrics:
+            extra = f"  erro de contagem {metrics['max_count_error']}"
+        elif 'allocated_mb_per_frame' in metrics:
+            extra = f"  {metrics['allocated_mb_per_frame']:.2f} MB alocados por frame"
+        else:
+            extra = ''
+        print(f"{name:<12} {shown:<50} {value:9.3f} ms{extra}")
+
+    for backend in ('batched', 'filterpy'):
+        for n in object_counts:
+            add('sort_update', {'backend': backend, 'objects': n}, bench_sort(n, backend, n_frames))
+    for n in object_counts:
+        add('associate', {'objects': n}, bench_associate(n, 20 if quick else 100))
+    for engine in ('pathzone', 'vectorized'):
+        for n_paths in path_counts:
+            for density in (0.02, 0.06):
+                add('counting', {'engine': engine, 'paths': n_paths, 'density': density}, bench_counting(n_paths, density, engine, n_frames))
+    for n_paths in path_counts:
+        add('render', {'paths': n_paths}, bench_render(n_paths, 0.04, n_frames))
+
+    with tempfile.TemporaryDirectory() if workdir is None else contextlib.nullcontext(workdir) as directory:
+        os.makedirs(directory, exist_ok=True)
+        decoders = [None, 'opencv'] + (['ffmpeg'] if shutil.which('ffmpeg') else [])
+        for source_w, source_h in source_sizes:
+            video_path = source_video(directory, source_w, source_h, n_frames)
+            for decoder in decoders:
+                add('ingest', {'source': f'{source_w}x{source_h}', 'decoder': decoder or 'padrão'}, bench_ingest(video_path, decoder, n_frames))
+        for n_paths, density, occluders, tolerance in FULL_SCENARIOS:
+            params = {'paths': n_paths, 'density': density, 'occluders': occluders, 'frames': 4 * n_frames}
+            metrics = bench_full(n_paths, density, occluders, 4 * n_frames, directory)
+            metrics['count_checked'] = tolerance is not None
+            add('full', params, metrics)
+            if tolerance is not None and metrics['max_count_error'] > tolerance:
+                failures.append((params, metrics['counts'], metrics['ground_truth']))
+    return records, failures
+
+def record_key(record):
+    return record['name'], tuple(sorted(record['params'].items()))
+
+def compare(records, baseline_path):
+    """Imprime a razão de tempo (atual / base) de cada benchmark presente nos dois resultados."""
+    with open(baseline_path, 'r') as f:
+        baseline = {record_key(record): record for record in json.load(f)['results']}
+    print(f"\n--- Comparação com {baseline_path} (tempo atual / base; < 1 = mais rápido) ---")
+    for record in records:
+        base = baseline.get(record_key(record))
+        if base is None:
+            continue
+        metric = 'median_ms' if 'median_ms' in record['metrics'] else 'ms_per_frame'
+        ratio = record['metrics'][metric] / max(base['metrics'][metric], 1e-12)
+        shown = ', '.join(f'{k}={v}' for k, v in record['params'].items())
+        print(f"{record['name']:<12} {shown:<50} {ratio:6.2f}x")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Benchmark com tráfego sintético')
+    parser.add_argument('--quick', action='store_true', help='Menos frames e tamanhos (verificação rápida)')
+    parser.add_argument('--output', help='Arquivo JSON dos resultados (padrão: data/benchmarks/<commit>.json)')
+    parser.add_argument('--compare', metavar='BASE', help='Resultados JSON de outro commit para comparar')
+    parser.add_argument('--workdir', help='Diretório dos vídeos sintéticos (reaproveitados entre execuções)')
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    records, failures = run_suite(args.quick, args.workdir)
+    env = environment()
+    output = args.output or os.path.join('data', 'benchmarks', f"{env['commit'] or 'sem-commit'}.json")
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump({'environment': env, 'quick': args.quick, 'results': records}, f, indent=2)
+    print(f"\nResultados salvos em '{output}'.")
+    if args.compare:
+        compare(records, args.compare)
+    for params, counts, truth in failures:
+        print(f"ERRO de contagem em {params}: obtido {counts}, esperado {truth}")
+    sys.exit(1 if failures else 0)
+
+if __name__ == '__main__':
+    main()
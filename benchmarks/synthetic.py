@@ -0,0 +1,126 @@
+import cv2
+import numpy as np
+
+BACKGROUND = 0
+VEHICLE = 255
+OCCLUDER = 60 # Abaixo do limiar do MockDetector: esconde os veículos
+
+def lane_paths(n_paths, width=848, height=480, checkpoints=3, margin=0.15):
+    """Percursos horizontais paralelos, igualmente espaçados, com os checkpoints entre margin e 1 - margin da largura."""
+    xs = np.linspace(margin * width, (1 - margin) * width, checkpoints)
+    ys = np.linspace(0, height, n_paths + 2)[1:-1]
+    return [[(int(x), int(y)) for x in xs] for y in ys]
+
+def lane_occluders(paths, width, n_per_path=1, occluder_w=40, lane_h=40):
+    """Faixas escuras sobre os percursos, no meio de cada trecho entre checkpoints (nunca sobre um checkpoint)."""
+    occluders = []
+    for points in paths:
+        for (x1, y1), (x2, y2) in list(zip(points, points[1:]))[:n_per_path]:
+            cx, cy = (x1 + x2) // 2, (y1 + y2) // 2
+            occluders.append((cx - occluder_w // 2, cy - lane_h // 2, cx + occluder_w // 2, cy + lane_h // 2))
+    return occluders
+
+class Traffic:
+    """Veículos (caixas alinhadas aos eixos) percorrendo polilinhas com velocidade constante.
+
+    Cada percurso recebe, em média, density veículos por frame; a velocidade é sorteada por
+    percurso e o espaçamento mínimo garante que veículos da mesma faixa nunca se sobreponham.
+    Os veículos nascem antes do primeiro ponto e saem depois do último, a uma distância de meia
+    caixa, e tudo é determinado pela semente.
+    """
+    def __init__(self, paths, n_frames, density=0.02, speed=(4.0, 8.0), size=((36, 60), (18, 28)), seed=0):
+        self.paths = [np.asarray(points, dtype=float) for points in paths]
+        self.n_frames = n_frames
+        rng = np.random.default_rng(seed)
+        rows = [] # (percurso, frame inicial, velocidade, largura, altura)
+        for p, points in enumerate(self.paths):
+            t = float(rng.integers(0, 10))
+            v = rng.uniform(*speed)
+            while t < n_frames:
+                w, h = int(rng.integers(*size[0])), int(rng.integers(*size[1]))
+                rows.append((p, t, v, w, h))
+                # O próximo veículo só nasce quando este já andou a sua largura mais uma folga
+                gap = (w + 20) / v
+                t += max(gap, rng.exponential(1 / density) if density > 0 else n_frames)
+        self.vehicles = np.array(rows, dtype=float).reshape(-1, 5)
+        self.lengths = [np.concatenate(([0.0], np.cumsum(np.hypot(*np.diff(points, axis=0).T)))) for points in self.paths]
+
+    def positions(self, frame_index):
+        """Caixas [x1,y1,x2,y2,id] dos veículos visíveis no frame (ids = índice do veículo + 1)."""
+        path_idx, start, speed, w, h = self.vehicles.T
+        boxes = []
+        for p, points in enumerate(self.paths):
+            lengths = self.lengths[p]
+            sel = np.flatnonzero((path_idx == p) & (start <= frame_index))
+            if len(sel) == 0:
+                continue
+            # Distância percorrida a partir de meia caixa antes do primeiro ponto
+            s = (frame_index - start[sel]) * speed[sel] - w[sel] / 2
+            alive = s <= lengths[-1] + w[sel] / 2
+            sel, s = sel[alive], s[alive]
+            direction = (points[1] - points[0]) / max(lengths[1], 1e-9)
+            end_direction = (points[-1] - points[-2]) / max(lengths[-1] - lengths[-2], 1e-9)
+            x = np.interp(s, lengths, points[:, 0])
+            y = np.interp(s, lengths, points[:, 1])
+            # Fora da polilinha, o veículo segue a direção do primeiro ou do último trecho
+            before, after = s < 0, s > lengths[-1]
+            x[before] = points[0, 0] + s[before] * direction[0]
+            y[before] = points[0, 1] + s[before] * direction[1]
+            x[after] = points[-1, 0] + (s[after] - lengths[-1]) * end_direction[0]
+            y[after] = points[-1, 1] + (s[after] - lengths[-1]) * end_direction[1]
+            boxes.append(np.column_stack((x - w[sel] / 2, y - h[sel] / 2, x + w[sel] / 2, y + h[sel] / 2, sel + 1)))
+        return np.concatenate(boxes) if boxes else np.empty((0, 5))
+
+    def ground_truth(self):
+        """Contagem esperada de cada percurso: veículos cuja caixa cobriu todos os checkpoints, em ordem, dentro do vídeo.
+
+        É o mesmo critério do PathZone, aplicado às trajetórias verdadeiras, sem detecção nem rastreamento.
+        """
+        progress = {}
+        counts = [0] * len(self.paths)
+        for frame_index in range(self.n_frames):
+            for x1, y1, x2, y2, vehicle_id in self.positions(frame_index):
+                p = int(self.vehicles[int(vehicle_id) - 1, 0])
+                k = progress.get(vehicle_id, 0)
+                points = self.paths[p]
+                if k < len(points) and x1 <= points[k, 0] <= x2 and y1 <= points[k, 1] <= y2:
+                    progress[vehicle_id] = k + 1
+                    if k + 1 == len(points):
+                        counts[p] += 1
+        return {chr(ord('A') + p): count for p, count in enumerate(counts)}
+
+    def render(self, frame_index, width, height, occluders=()):
+        frame = np.full((height, width, 3), BACKGROUND, dtype=np.uint8)
+        for x1, y1, x2, y2, _ in self.positions(frame_index):
+            cv2.rectangle(frame, (int(x1), int(y1)), (int(x2), int(y2)), (VEHICLE, VEHICLE, VEHICLE), -1)
+        for x1, y1, x2, y2 in occluders:
+            cv2.rectangle(frame, (int(x1), int(y1)), (int(x2), int(y2)), (OCCLUDER, OCCLUDER, OCCLUDER), -1)
+        return frame
+
+    def write_video(self, path, width, height, occluders=(), fps=30):
+        """Grava o vídeo sintético (MJPG) para o processamento completo."""
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), fps, (width, height))
+        if not writer.isOpened():
+            raise IOError(f"Erro ao criar o vídeo sintético: {path}")
+        for frame_index in range(self.n_frames):
+            writer.write(self.render(frame_index, width, height, occluders))
+        writer.release()
+
+def moving_boxes(n_objects, n_frames, jitter=1.0, size=(30, 60), seed=0):
+    """Detecções [x1,y1,x2,y2,score] de n_objects objetos em movimento retilíneo, com ruído, em cada frame.
+
+    Retorna um array (n_frames, n_objects, 5). Os objetos começam no centro das células de uma
+    grade larga o bastante para que nunca se sobreponham, o que isola o custo do rastreador do
+    da resolução de ambiguidades.
+    """
+    rng = np.random.default_rng(seed)
+    cell = 3 * size[1]
+    cols = int(np.ceil(np.sqrt(n_objects)))
+    grid = np.arange(n_objects)
+    centers = np.column_stack((grid % cols, grid // cols)) * cell + cell / 2
+    velocity = rng.uniform(-cell / (4 * max(n_frames, 1)), cell / (4 * max(n_frames, 1)), (n_objects, 2))
+    half = rng.uniform(*size, (n_objects, 2)) / 2
+    t = np.arange(n_frames)[:, None, None]
+    c = centers + velocity * t + rng.normal(0, jitter, (n_frames, n_objects, 2))
+    boxes = np.concatenate((c - half, c + half), axis=2)
+    return np.concatenate((boxes, np.full((n_frames, n_objects, 1), 0.9)), axis=2)
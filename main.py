@@ -1,27 +1,167 @@
+import argparse
+import json
+import os
 import cv2
-from src.setup_gui import SetupGUI
-from src.process_video import process_video
+from src.process_video import process_video, working_resolution
+from src.path_config import load_paths, save_paths
 
 CONFIG = {
     'video_path': './data/videos/video7.mp4',
     'model_path': './data/models/yolov8n.pt',
     'classes_path': './config/classes.txt',
+    'paths_file': './config/paths.json', # Percursos salvos pela GUI e lidos no modo headless
     'target_classes': ['car', 'truck', 'bus', 'motorcycle'],
     'confidence_threshold': 0.3,
+    'draw_detections': True, # Desenha as caixas das detecções do YOLO no frame
+    'display': True, # Exibe o vídeo processado em uma janela
     'output_resolution': (848, 480), # Alterar a resolução conforme necessário (baseado no vídeo de exemplo)
+    'counting_engine': 'vectorized', # 'vectorized' (estado de todos os percursos em arrays) ou 'pathzone' (PathZone.process_vehicle por veículo)
+    'batch_size': 1, # Frames por chamada do YOLO; > 1 lê o vídeo antecipadamente em lotes (processamento offline)
+    'adaptive_stride': {
+        'enabled': False, # Roda o YOLO só em keyframes; entre eles, os rastros avançam pela predição do Kalman (só no modo serial: ignora batch_size e desativa o cache; não combina com pipeline, segments e --streams)
+        'min_stride': 1, # Passo usado com rastros incertos ou veículos perto de checkpoints
+        'max_stride': 4, # Passo máximo com a cena estável e os veículos longe dos checkpoints
+        'near_distance': 20, # Distância (pixels) da caixa de um veículo ao seu próximo checkpoint que reduz o passo
+        'compare_counts': False # Roda também o YOLO em todos os frames, em um rastreador à parte, e compara as contagens no fim (custo de inferência completo)
+    },
+    'motion_gate': {
+        'enabled': False, # Subtração de fundo em baixa resolução: sem movimento nos percursos, o YOLO não roda (só no modo serial: ignora batch_size e desativa o cache; não combina com pipeline, segments e --streams)
+        'scale': 0.25, # Escala do frame usada na subtração de fundo
+        'threshold': 16, # Limiar de variância do MOG2 para um pixel ser considerado em movimento
+        'min_area': 400, # Área mínima em movimento (pixels do frame de trabalho) para rodar o YOLO
+        'margin': 40, # Pixels em volta das regiões em movimento e dos veículos rastreados
+        'restrict': True, # Detecta só nas regiões em movimento (False = frame inteiro)
+        'max_region_fraction': 0.5 # Acima desta fração do frame em movimento, detecta o frame inteiro
+    },
+    'roi': {
+        'enabled': False, # Roda o YOLO só em recortes ao redor dos percursos
+        'margin': 60, # Pixels em volta dos checkpoints, para a extensão dos veículos
+        'imgsz': 640 # Tamanho de entrada do modelo para o frame inteiro (define a escala dos recortes)
+    },
+    'detection_cache': {
+        'enabled': False, # Reaproveita as detecções do YOLO de execuções anteriores (mesmo vídeo, modelo e resolução)
+        'dir': './data/cache',
+        'min_confidence': 0.05, # Confiança mínima armazenada; o filtro de 'confidence_threshold' é aplicado na leitura
+        'flush_frames': 1000 # Frames acumulados em memória antes de cada escrita (um processo interrompido perde só esses)
+    },
+    'events': {
+        'enabled': False, # Grava os eventos de contagem em segundo plano (em vez de imprimi-los)
+        'backend': 'jsonl', # 'jsonl', 'csv' ou 'sqlite'
+        'path': './data/events.jsonl',
+        'batch_size': 256, # Registros por escrita (uma transação no SQLite)
+        'flush_interval': 1.0, # Segundos máximos até gravar um lote incompleto
+        'queue_size': 10000, # Registros em espera; com a fila cheia, novos registros são descartados
+        'aggregate_interval': 0 # A cada quantos frames gravar os totais por percurso (0 = só no fim)
+    },
+    'trajectories': {
+        'enabled': False, # Grava as saídas do rastreador (frame, ID, caixa) para recontar outros percursos sem reprocessar o vídeo (--recount)
+        'dir': './data/trajectories', # Um diretório por vídeo (ou por câmera, com --streams)
+        'flush_rows': 100000 # Linhas acumuladas em memória antes de cada escrita
+    },
+    'profiling': {
+        'enabled': False, # Mede o tempo por frame de cada estágio (decodificação, YOLO, SORT, contagem, desenho)
+        'window': 1000, # Frames mais recentes usados nos percentis
+        'summary_interval': 0, # A cada quantos frames imprimir o resumo (0 = só no fim)
+        'port': None, # Porta do endpoint local /metrics no formato do Prometheus (None = desabilitado)
+        'host': '127.0.0.1'
+    },
+    'live': {
+        'enabled': False, # Lê video_path (câmera/stream) em uma thread própria, descartando frames quando o processamento atrasa (só no modo serial)
+        'policy': 'latest', # 'latest' (só o frame mais novo), 'drop_oldest' (os buffer_size mais novos) ou 'block' (sem descarte)
+        'buffer_size': 4,
+        'stall_timeout': 5.0, # Segundos sem frames até reconectar
+        'reconnect_delay': 1.0, # Segundos entre tentativas de reconexão
+        'max_reconnects': None, # None = tenta para sempre
+        'max_coast': 10, # Máximo de frames descartados avançados só pela predição do Kalman
+        'realtime': False # Lê arquivos locais no ritmo do FPS, simulando uma câmera (para testes)
+    },
+    'long_running': {
+        'enabled': False, # Memória limitada para execuções contínuas (24/7)
+        'counted_id_ttl': 900, # Frames sem aparecer até um ID já contado ser esquecido (precisa ser maior que tracker.max_age; x max_stride com a detecção adaptativa)
+        'max_history': 1, # Predições guardadas por rastro enquanto ele fica sem detecção (backend 'filterpy')
+        'stats_interval': 9000 # A cada quantos frames imprimir o tamanho das estruturas e a memória do processo (0 = nunca)
+    },
+    'multi_stream': {
+        'batch_size': 8, # Frames de várias câmeras por chamada do YOLO compartilhado (--streams)
+        'latency_budget': 0.2, # Espera máxima (s) de um frame por um lote completo; cada câmera pode definir o seu
+        'queue_size': 4 # Frames em fila por câmera, antes e depois da detecção
+    },
+    'segments': {
+        'enabled': False, # Processamento offline em segmentos paralelos, um SORT por segmento (sem janela e sem cache)
+        'workers': None, # Processos do pool (None = número de núcleos)
+        'segment_frames': 0, # Frames por segmento (0 = um segmento por processo)
+        'overlap': 60, # Frames lidos antes de cada segmento para aquecer o rastreador e unir os IDs
+        'iou_threshold': 0.3 # IoU mínimo para um par de rastros votar na união na sobreposição
+    },
+    'ingest': {
+        'enabled': False, # Frames redimensionados em buffers pré-alocados e reutilizados (sem alocação por frame; não se aplica a 'live' e --streams)
+        'decoder': 'opencv', # 'opencv' (cap.read em buffer fixo + cv2.resize com dst=) ou 'ffmpeg' (escala e conversão para BGR na decodificação, lidas por pipe)
+        'ffmpeg_path': 'ffmpeg',
+        'threads': 0 # Threads de decodificação do ffmpeg (0 = automático)
+    },
+    'pipeline': {
+        'enabled': False, # Executa decodificação, detecção, contagem e renderização em threads separadas
+        'queue_sizes': {'decode': 4, 'detect': 4, 'count': 4} # Profundidade das filas entre os estágios
+    },
+    'detector': {
+        'backend': 'ultralytics', # 'ultralytics' (PyTorch), 'onnxruntime' ou 'openvino' (modelo exportado para ONNX, em CPU); 'mock' só para o benchmark
+        'imgsz': 640, # Tamanho fixo da entrada do modelo ONNX (exportado uma vez ao lado do .pt; também usado em cada recorte de ROI)
+        'int8': False, # Quantização INT8 estática, calibrada com frames do vídeo (um modelo quantizado por vídeo, salvo ao lado do ONNX)
+        'calibration_frames': 64, # Frames do vídeo usados na calibração INT8
+        'threads': None, # Threads de inferência do runtime (None = padrão do runtime)
+        'warmup': 3, # Inferências de aquecimento ao carregar o modelo
+        'iou_threshold': 0.7 # IoU do NMS em NumPy (o mesmo padrão do Ultralytics)
+    },
     'tracker': {
         'max_age': 60, # Aumentado para lidar melhor com oclusões
         'min_hits': 3,
-        'iou_threshold': 0.3
+        'iou_threshold': 0.3,
+        'backend': 'batched' # 'batched' (todos os filtros de Kalman em arrays) ou 'filterpy' (um filtro por veículo)
     }
 }
 
+def parse_args():
+    parser = argparse.ArgumentParser(description='Contagem de veículos por cobertura de percurso')
+    parser.add_argument('--headless', action='store_true', help='Executa sem janelas, com os percursos lidos de --paths')
+    parser.add_argument('--paths', help=f"Arquivo de percursos salvo (padrão: {CONFIG['paths_file']})")
+    parser.add_argument('--video', help='Vídeo a processar (substitui o de CONFIG)')
+    parser.add_argument('--streams', help='Arquivo JSON com a lista de câmeras (name, video_path, paths_file, ...) processadas juntas, sem janelas')
+    parser.add_argument('--compare-detector', metavar='BACKEND', help="Compara o backend de detecção ('onnxruntime' ou 'openvino') com o Ultralytics no vídeo: FPS e concordância")
+    parser.add_argument('--frames', type=int, default=300, help='Frames usados por --compare-detector (padrão: 300)')
+    parser.add_argument('--recount', metavar='VARIANTES', help='Arquivo JSON com variantes de percursos contadas sobre as trajetórias gravadas, sem reprocessar o vídeo')
+    parser.add_argument('--trajectories', help="Trajetórias usadas por --recount (padrão: as do vídeo em CONFIG['trajectories']['dir'])")
+    parser.add_argument('--frame-range', type=int, nargs=2, metavar=('INICIO', 'FIM'), help='Intervalo de frames [INICIO, FIM) usado por --recount')
+    return parser.parse_args()
+
 def main():
     """Orquestra as fases de setup e processamento da aplicação."""
+    args = parse_args()
+    config = dict(CONFIG)
+    if args.video:
+        config['video_path'] = args.video
+    if args.paths:
+        config['paths_file'] = args.paths
+    if args.headless:
+        config['display'] = False
+    if args.streams:
+        from src.multi_stream import run_streams
+        with open(args.streams, 'r') as f:
+            run_streams(config, json.load(f))
+        return
+    if args.recount:
+        from src.recount import recount_variants
+        video_name = os.path.splitext(os.path.basename(config['video_path']))[0]
+        recount_variants(args.trajectories or os.path.join(config['trajectories']['dir'], video_name), args.recount, args.frame_range)
+        return
+    if args.compare_detector:
+        from src.detector_compare import compare_detectors
+        compare_detectors(config, args.compare_detector, args.frames)
+        return
+
     # Fase 1: Obter o primeiro frame para a GUI de configuração
-    cap_setup = cv2.VideoCapture(CONFIG['video_path'])
+    cap_setup = cv2.VideoCapture(config['video_path'])
     if not cap_setup.isOpened():
-        print(f"Erro fatal ao abrir vídeo: {CONFIG['video_path']}")
+        print(f"Erro fatal ao abrir vídeo: {config['video_path']}")
         return
     ret, first_frame = cap_setup.read()
     if not ret:
@@ -31,21 +171,28 @@ def main():
     cap_setup.release()
 
     # Calcula as dimensões de trabalho mantendo a proporção
-    max_w, max_h = CONFIG['output_resolution']
-    h_orig, w_orig = first_frame.shape[:2]
-    ratio = min(max_w / w_orig, max_h / h_orig)
-    final_w, final_h = int(w_orig * ratio), int(h_orig * ratio)
-    setup_frame = cv2.resize(first_frame, (final_w, final_h))
+    final_w, final_h = working_resolution(first_frame, config['output_resolution'])
 
-    # Fase 2: Executar a GUI de configuração para o usuário desenhar os percursos
-    gui = SetupGUI(setup_frame)
-    defined_paths = gui.run()
+    # Fase 2: Ler os percursos salvos (modo headless / --paths) ou desenhá-los na GUI de configuração
+    if args.headless or args.paths:
+        if not os.path.exists(config['paths_file']):
+            print(f"Erro fatal: arquivo de percursos '{config['paths_file']}' não encontrado.")
+            return
+        defined_paths = load_paths(config['paths_file'], (final_w, final_h))
+    else:
+        from src.setup_gui import SetupGUI
+        setup_frame = cv2.resize(first_frame, (final_w, final_h))
+        gui = SetupGUI(setup_frame)
+        defined_paths = gui.run()
+        if defined_paths and config.get('paths_file'):
+            save_paths(config['paths_file'], defined_paths, (final_w, final_h))
+            print(f"Percursos salvos em '{config['paths_file']}'.")
 
     # Fase 3: Se o usuário definiu percursos, iniciar o processamento do vídeo
     if defined_paths:
-        process_video(CONFIG, defined_paths, final_w, final_h)
+        process_video(config, defined_paths, final_w, final_h)
     else:
         print("Nenhum percurso foi definido. Encerrando.")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,96 @@
+import numpy as np
+from .sort import KalmanBoxTracker
+
+class AdaptiveStride:
+    """Decide em quais frames o YOLO roda (keyframes); nos demais, o SORT só avança as predições do Kalman.
+
+    O passo entre keyframes cai para min_stride quando há rastros incertos (ainda não confirmados
+    ou que perderam a última detecção) ou algum veículo a menos de near_distance pixels do próximo
+    checkpoint que ele precisa cobrir, e dobra (até max_stride) enquanto a cena estiver estável e
+    os veículos longe dos seus próximos checkpoints.
+    """
+    def __init__(self, min_stride=1, max_stride=4, near_distance=20):
+        self.min_stride = max(int(min_stride), 1)
+        self.max_stride = max(int(max_stride), self.min_stride)
+        self.near_distance = near_distance
+        self.stride = self.min_stride
+        self.countdown = 0 # Frames até o próximo keyframe
+        self.keyframes = 0
+        self.skipped = 0
+
+    def keyframe(self):
+        """Diz se o próximo frame deve passar pelo YOLO e o contabiliza."""
+        if self.countdown > 0:
+            self.countdown -= 1
+            self.skipped += 1
+            return False
+        self.countdown = self.stride - 1
+        self.keyframes += 1
+        return True
+
+    def near_checkpoints(self, tracked_results, targets):
+        """Diz se alguma caixa rastreada está a menos de near_distance do seu próximo checkpoint em algum percurso.
+
+        targets é o (N, P, 2) de PathZoneCounter/VectorizedPathCounter.next_checkpoints, com NaN nos percursos já concluídos.
+        """
+        boxes = np.asarray(tracked_results, dtype=float).reshape(-1, 5)[:, :4]
+        if len(boxes) == 0 or targets.size == 0:
+            return False
+        px, py = targets[..., 0], targets[..., 1]
+        # Distância de cada caixa ao seu próximo checkpoint (zero se o ponto estiver dentro): (N, P)
+        dx = np.maximum(np.maximum(boxes[:, None, 0] - px, px - boxes[:, None, 2]), 0)
+        dy = np.maximum(np.maximum(boxes[:, None, 1] - py, py - boxes[:, None, 3]), 0)
+        return bool(np.any(dx * dx + dy * dy <= self.near_distance ** 2))
+
+    def update(self, tracked_results, targets, unstable_tracks=0):
+        """Ajusta o passo a partir dos veículos rastreados no frame atual e dos seus próximos checkpoints."""
+        if unstable_tracks > 0 or self.near_checkpoints(tracked_results, targets):
+            self.stride = self.min_stride
+        else:
+            self.stride = min(self.stride * 2, self.max_stride)
+        self.countdown = min(self.countdown, self.stride - 1)
+
+    def print_summary(self):
+        total = self.keyframes + self.skipped
+        if total == 0:
+            return
+        print(f"Detecção adaptativa: YOLO executado em {self.keyframes} de {total} frames "
+              f"({self.skipped} chamadas evitadas, {100 * self.skipped / total:.1f}%)")
+
+class CountReference:
+    """Rastreamento e contagem com o YOLO em todos os frames, em paralelo ao modo adaptativo, para medir quanto a contagem muda.
+
+    Tem o seu próprio SORT, percursos e contador; os IDs vêm de uma sequência própria, então os
+    IDs do rastreamento principal são os mesmos de uma execução sem a referência.
+    """
+    def __init__(self, sort, paths, counter):
+        self.sort = sort
+        self.paths = paths
+        self.counter = counter
+        self.next_id = 0
+
+    def update(self, detections):
+        """Rastreia e conta as detecções de um frame; None (frame descartado da fonte ao vivo) só avança as predições."""
+        main_id = KalmanBoxTracker.count
+        KalmanBoxTracker.count = self.next_id
+        try:
+            tracked_results = self.sort.coast() if detections is None else self.sort.update(detections)
+        finally:
+            self.next_id = KalmanBoxTracker.count
+            KalmanBoxTracker.count = main_id
+        self.counter.update(tracked_results)
+
+    def print_summary(self, paths):
+        """Contagem de cada percurso no modo adaptativo e com o YOLO em todos os frames."""
+        print("Contagem adaptativa x YOLO em todos os frames:")
+        for name, path in paths.items():
+            reference = self.paths[name].counter
+            print(f"  Percurso {name}: {path.counter} x {reference} ({path.counter - reference:+d})")
+
+def create_stride(config):
+    """Cria o AdaptiveStride configurado em config['adaptive_stride'], se habilitado."""
+    stride_config = config.get('adaptive_stride', {})
+    if not stride_config.get('enabled', False):
+        return None
+    return AdaptiveStride(stride_config.get('min_stride', 1), stride_config.get('max_stride', 4),
+                          stride_config.get('near_distance', 20))
@@ -0,0 +1,123 @@
+import hashlib
+import json
+import os
+import numpy as np
+
+# Arquivos colunares do cache: detecções de todos os frames concatenadas, e offsets por frame
+COLUMNS = {'boxes': np.float32, 'scores': np.float32, 'classes': np.int16}
+OFFSETS_FILE = 'offsets.npy'
+# Versão do formato em disco (entra na chave): 2 = colunas em arquivos brutos anexados a cada flush
+FORMAT = 2
+
+def _column_shape(name, rows):
+    return (rows, 4) if name == 'boxes' else (rows,)
+
+def _file_identity(path):
+    """Identifica um arquivo pelo caminho absoluto, tamanho e data de modificação."""
+    stat = os.stat(path)
+    return [os.path.realpath(path), stat.st_size, int(stat.st_mtime)]
+
+# Opções do backend de detecção que mudam as detecções
+DETECTOR_KEYS = ('backend', 'imgsz', 'int8', 'calibration_frames', 'iou_threshold', 'max_det')
+
+def cache_key(video_path, model_path, resolution, min_confidence, rois=None, detector=None):
+    """Chave do cache: vídeo, pesos do modelo, resolução de trabalho, confiança mínima armazenada, recortes de ROI e backend de detecção."""
+    key_data = {
+        'video': _file_identity(video_path),
+        'model': _file_identity(model_path),
+        'resolution': list(resolution),
+        'min_confidence': min_confidence,
+        'format': FORMAT,
+    }
+    if rois is not None:
+        key_data['rois'] = [list(rect) for rect in rois]
+    if detector and detector.get('backend', 'ultralytics') != 'ultralytics':
+        key_data['detector'] = {name: detector[name] for name in DETECTOR_KEYS if name in detector}
+    digest = hashlib.sha1(json.dumps(key_data, sort_keys=True).encode()).hexdigest()[:16]
+    return digest, key_data
+
+class DetectionCache:
+    """Cache em disco das detecções brutas (caixas, confianças e IDs de classe) de cada frame.
+
+    As detecções ficam em arquivos brutos colunares ({coluna}.bin) lidos com memory-map, e
+    offsets.npy guarda onde começam as detecções de cada frame, permitindo acesso aleatório por
+    índice de frame. Frames novos são acumulados em memória e anexados aos arquivos a cada
+    flush_frames frames e em close(). offsets.npy é regravado por último em cada escrita: linhas
+    além do último offset (escrita interrompida) são descartadas ao abrir o cache, e um processo
+    encerrado no meio perde só os frames ainda não gravados.
+    """
+    def __init__(self, cache_dir, video_path, model_path, resolution, min_confidence=0.05, rois=None, detector=None, flush_frames=1000):
+        self.key, key_data = cache_key(video_path, model_path, resolution, min_confidence, rois, detector)
+        self.path = os.path.join(cache_dir, self.key)
+        self.min_confidence = min_confidence
+        self.flush_frames = flush_frames
+        os.makedirs(self.path, exist_ok=True)
+        with open(os.path.join(self.path, 'meta.json'), 'w') as f:
+            json.dump(key_data, f, indent=2)
+
+        self.offsets = np.zeros(1, dtype=np.int64)
+        if os.path.exists(os.path.join(self.path, OFFSETS_FILE)):
+            self.offsets = np.load(os.path.join(self.path, OFFSETS_FILE))
+        sizes = {name: np.dtype(dtype).itemsize * int(np.prod(_column_shape(name, int(self.offsets[-1])))) for name, dtype in COLUMNS.items()}
+        if not all(os.path.exists(self._column_path(name)) and os.path.getsize(self._column_path(name)) >= size for name, size in sizes.items()):
+            # Colunas ausentes ou menores que os offsets: o cache recomeça vazio
+            self.offsets = np.zeros(1, dtype=np.int64)
+            sizes = dict.fromkeys(COLUMNS, 0)
+        for name, size in sizes.items():
+            with open(self._column_path(name), 'ab') as f:
+                f.truncate(size)
+        self._load_columns()
+        self.pending = []
+
+    def _column_path(self, name):
+        return os.path.join(self.path, f'{name}.bin')
+
+    def _load_columns(self):
+        rows = int(self.offsets[-1])
+        self.columns = {name: np.memmap(self._column_path(name), dtype, 'r', shape=_column_shape(name, rows)) if rows
+                        else np.empty(_column_shape(name, 0), dtype) for name, dtype in COLUMNS.items()}
+
+    def __len__(self):
+        """Número de frames presentes no cache (gravados e pendentes)."""
+        return len(self.offsets) - 1 + len(self.pending)
+
+    def __contains__(self, frame_index):
+        return 0 <= frame_index < len(self)
+
+    def get(self, frame_index):
+        """Retorna (caixas, confianças, classes) brutas de um frame."""
+        stored = len(self.offsets) - 1
+        if frame_index >= stored:
+            return self.pending[frame_index - stored]
+        start, end = self.offsets[frame_index], self.offsets[frame_index + 1]
+        return tuple(np.asarray(self.columns[name][start:end]) for name in COLUMNS)
+
+    def put(self, frame_index, boxes, scores, classes):
+        """Adiciona as detecções brutas do próximo frame ainda não armazenado."""
+        if frame_index != len(self):
+            return
+        keep = scores >= self.min_confidence
+        self.pending.append((boxes[keep].astype(np.float32), scores[keep].astype(np.float32), classes[keep].astype(np.int16)))
+        if len(self.pending) >= self.flush_frames:
+            self.flush()
+
+    def flush(self):
+        """Anexa os frames pendentes aos arquivos das colunas e regrava offsets.npy."""
+        if not self.pending:
+            return
+        for (name, dtype), new in zip(COLUMNS.items(), zip(*self.pending)):
+            with open(self._column_path(name), 'ab') as f:
+                f.write(np.concatenate(new).astype(dtype).tobytes())
+        counts = [len(scores) for _, scores, _ in self.pending]
+        offsets = np.concatenate((self.offsets, self.offsets[-1] + np.cumsum(counts)))
+        # offsets.npy é gravado por último: só então os novos frames passam a valer
+        tmp_path = os.path.join(self.path, 'offsets.tmp.npy')
+        np.save(tmp_path, offsets)
+        os.replace(tmp_path, os.path.join(self.path, OFFSETS_FILE))
+        self.offsets = offsets
+        self._load_columns()
+        self.pending = []
+
+    def close(self):
+        """Grava em disco os frames pendentes."""
+        self.flush()
@@ -0,0 +1,75 @@
+import time
+from itertools import islice
+import cv2
+import numpy as np
+from .process_video import detector_params, read_frames, tracker_params, working_resolution
+from .sort import iou_batch, linear_assignment
+from .vehicle_tracker import VehicleTracker
+
+def timed_detections(tracker, frames):
+    """Detecções filtradas de cada frame e o tempo total da detecção, depois de uma detecção de aquecimento."""
+    tracker.detect(frames[0])
+    start = time.perf_counter()
+    detections = [tracker.detect(frame) for frame in frames]
+    return detections, time.perf_counter() - start
+
+def detection_agreement(reference, candidate, iou_threshold=0.5):
+    """Concordância entre as detecções de dois backends nos mesmos frames.
+
+    Em cada frame, as caixas são associadas um-para-um pelo maior IoU (pares com IoU >=
+    iou_threshold). Retorna a fração das detecções de referência encontradas (recall), a fração
+    das detecções do candidato que correspondem a uma de referência (precisão), o IoU médio e a
+    diferença média de confiança dos pares.
+    """
+    n_ref = n_cand = matched = 0
+    ious, conf_diffs = [], []
+    for ref, cand in zip(reference, candidate):
+        n_ref += len(ref)
+        n_cand += len(cand)
+        if len(ref) == 0 or len(cand) == 0:
+            continue
+        iou = iou_batch(ref[:, :4], cand[:, :4])
+        pairs = linear_assignment(-iou).reshape(-1, 2).astype(int)
+        pairs = pairs[iou[pairs[:, 0], pairs[:, 1]] >= iou_threshold]
+        matched += len(pairs)
+        ious.extend(iou[pairs[:, 0], pairs[:, 1]])
+        conf_diffs.extend(np.abs(ref[pairs[:, 0], 4] - cand[pairs[:, 1], 4]))
+    return {
+        'recall': matched / n_ref if n_ref else 1.0,
+        'precision': matched / n_cand if n_cand else 1.0,
+        'mean_iou': float(np.mean(ious)) if ious else 0.0,
+        'mean_conf_diff': float(np.mean(conf_diffs)) if conf_diffs else 0.0,
+        'reference_detections': n_ref,
+        'candidate_detections': n_cand,
+    }
+
+def compare_detectors(config, backend, n_frames=300):
+    """Compara um backend de detecção com o Ultralytics nos primeiros n_frames do vídeo: FPS e concordância."""
+    cap = cv2.VideoCapture(config['video_path'])
+    ret, first_frame = cap.read()
+    if not ret:
+        cap.release()
+        raise IOError(f"Erro ao ler o vídeo: {config['video_path']}")
+    target_w, target_h = working_resolution(first_frame, config['output_resolution'])
+    cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+    frames = list(islice(read_frames(cap, target_w, target_h), n_frames))
+    cap.release()
+
+    timings = {}
+    detections = {}
+    for name in ('ultralytics', backend):
+        tracker = VehicleTracker(config['model_path'], config['classes_path'], config['target_classes'], config['confidence_threshold'],
+                                 tracker_params(config), dict(detector_params(config), backend=name))
+        detections[name], timings[name] = timed_detections(tracker, frames)
+
+    results = detection_agreement(detections['ultralytics'], detections[backend])
+    results['frames'] = len(frames)
+    results['fps'] = {name: len(frames) / max(elapsed, 1e-9) for name, elapsed in timings.items()}
+
+    print(f"\n--- Detecção: {backend} x ultralytics ({len(frames)} frames de {target_w}x{target_h}) ---")
+    for name, fps in results['fps'].items():
+        print(f"{name:<12} {fps:7.1f} frames/s ({1000 / max(fps, 1e-9):.1f} ms por frame)")
+    print(f"Detecções: {results['reference_detections']} (ultralytics), {results['candidate_detections']} ({backend})")
+    print(f"Concordância (IoU >= 0.5): recall {100 * results['recall']:.1f}%, precisão {100 * results['precision']:.1f}%, "
+          f"IoU médio {results['mean_iou']:.3f}, diferença média de confiança {results['mean_conf_diff']:.3f}")
+    return results
@@ -0,0 +1,252 @@
+import hashlib
+import json
+import os
+import cv2
+import numpy as np
+
+# Deslocamento das caixas por classe no NMS, para que classes diferentes não se suprimam (como no Ultralytics)
+MAX_WH = 7680
+MAX_NMS = 30000 # Candidatos no máximo antes do NMS
+
+def result_arrays(res):
+    """Extrai (caixas, confianças, classes) de um resultado do YOLO como arrays NumPy."""
+    return res.boxes.xyxy.cpu().numpy(), res.boxes.conf.cpu().numpy(), res.boxes.cls.cpu().numpy()
+
+class UltralyticsDetector:
+    """O modelo YOLO do Ultralytics (PyTorch), como na detecção original."""
+    def __init__(self, model_path):
+        from ultralytics import YOLO
+        self.model = YOLO(model_path)
+
+    def predict(self, images, conf=0.25, classes=None, imgsz=None, stream=False):
+        """(caixas, confianças, classes) de cada imagem; com stream, um gerador que roda o modelo sob demanda."""
+        kwargs = {'conf': conf, 'classes': classes}
+        if imgsz is not None:
+            kwargs['imgsz'] = imgsz
+        arrays = map(result_arrays, self.model(images, stream=stream, verbose=False, **kwargs))
+        return arrays if stream else list(arrays)
+
+class MockDetector:
+    """Detector determinístico sem modelo, para os vídeos sintéticos do benchmark.
+
+    Cada região clara (acima de threshold) do frame, com pelo menos min_area pixels, vira uma
+    detecção da classe class_id com confiança fixa. Veículos que se tocam viram uma única região,
+    e faixas escuras desenhadas sobre eles os escondem, como oclusões.
+    """
+    def __init__(self, class_id=2, threshold=128, min_area=50, confidence=0.9):
+        self.class_id = class_id
+        self.threshold = threshold
+        self.min_area = min_area
+        self.confidence = confidence
+
+    def detect_image(self, image, conf, classes):
+        if self.confidence <= conf or (classes is not None and self.class_id not in classes):
+            return np.empty((0, 4), np.float32), np.empty(0, np.float32), np.empty(0, np.float32)
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+        _, mask = cv2.threshold(gray, self.threshold, 255, cv2.THRESH_BINARY)
+        _, _, stats, _ = cv2.connectedComponentsWithStats(mask)
+        stats = stats[1:][stats[1:, 4] >= self.min_area]
+        x, y, w, h = stats[:, :4].T.astype(np.float32)
+        n = len(stats)
+        return np.column_stack((x, y, x + w, y + h)), np.full(n, self.confidence, np.float32), np.full(n, self.class_id, np.float32)
+
+    def predict(self, images, conf=0.25, classes=None, imgsz=None, stream=False):
+        if isinstance(images, np.ndarray):
+            images = [images]
+        return [self.detect_image(image, conf, classes) for image in images]
+
+def letterbox(image, canvas, out):
+    """Redimensiona image mantendo a proporção e centraliza em canvas (quadrado, borda 114), como no Ultralytics.
+
+    A entrada do modelo (1, 3, S, S), RGB em [0, 1], é escrita em out. Retorna (escala, pad_x, pad_y).
+    """
+    size = canvas.shape[0]
+    h, w = image.shape[:2]
+    ratio = min(size / h, size / w)
+    new_w, new_h = int(round(w * ratio)), int(round(h * ratio))
+    left, top = int(round((size - new_w) / 2 - 0.1)), int(round((size - new_h) / 2 - 0.1))
+    canvas.fill(114)
+    cv2.resize(image, (new_w, new_h), dst=canvas[top:top + new_h, left:left + new_w], interpolation=cv2.INTER_LINEAR)
+    np.multiply(canvas.transpose(2, 0, 1)[::-1], 1 / 255, out=out[0], casting='unsafe')
+    return ratio, left, top
+
+def nms(boxes, scores, iou_threshold):
+    """Índices das caixas mantidas pela supressão de não-máximos gulosa, em ordem decrescente de score."""
+    x1, y1, x2, y2 = boxes.T
+    areas = (x2 - x1) * (y2 - y1)
+    order = np.argsort(-scores, kind='stable')
+    keep = []
+    while order.size:
+        i = order[0]
+        keep.append(i)
+        rest = order[1:]
+        w = np.clip(np.minimum(x2[i], x2[rest]) - np.maximum(x1[i], x1[rest]), 0, None)
+        h = np.clip(np.minimum(y2[i], y2[rest]) - np.maximum(y1[i], y1[rest]), 0, None)
+        inter = w * h
+        order = rest[inter / (areas[i] + areas[rest] - inter + 1e-9) <= iou_threshold]
+    return np.array(keep, dtype=np.int64)
+
+def decode_yolo(output, conf, classes, iou_threshold, max_det=300):
+    """Decodifica a saída (1, 4 + classes, N) do YOLOv8 em (caixas xyxy, confianças, classes) na entrada do modelo.
+
+    Cada candidato fica com a classe de maior score; os abaixo de conf ou fora de classes são
+    descartados antes do NMS, feito por classe, como no Ultralytics.
+    """
+    pred = output[0]
+    scores = pred[4:]
+    cls = scores.argmax(axis=0)
+    best = scores[cls, np.arange(scores.shape[1])]
+    keep = best > conf
+    if classes is not None:
+        keep &= np.isin(cls, classes)
+    candidates = np.flatnonzero(keep)
+    if len(candidates) > MAX_NMS:
+        candidates = candidates[np.argsort(-best[candidates])[:MAX_NMS]]
+    cx, cy, w, h = pred[:4, candidates]
+    xyxy = np.column_stack((cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2))
+    best, cls = best[candidates], cls[candidates].astype(np.float32)
+    kept = nms(xyxy + cls[:, None] * MAX_WH, best, iou_threshold)[:max_det]
+    return xyxy[kept], best[kept], cls[kept]
+
+def onnxruntime_session(onnx_path, threads=None):
+    """Sessão do ONNX Runtime em CPU; retorna uma função entrada -> saída."""
+    import onnxruntime as ort
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+    if threads:
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+    session = ort.InferenceSession(onnx_path, options, providers=['CPUExecutionProvider'])
+    input_name = session.get_inputs()[0].name
+    return lambda blob: session.run(None, {input_name: blob})[0]
+
+def openvino_session(onnx_path, threads=None):
+    """Modelo compilado pelo OpenVINO para CPU, com uma única requisição reaproveitada."""
+    import openvino as ov
+    properties = {'PERFORMANCE_HINT': 'LATENCY'}
+    if threads:
+        properties['INFERENCE_NUM_THREADS'] = threads
+    request = ov.Core().compile_model(onnx_path, 'CPU', properties).create_infer_request()
+    def run(blob):
+        request.infer({0: blob})
+        return request.get_output_tensor(0).data
+    return run
+
+RUNTIMES = {'onnxruntime': onnxruntime_session, 'openvino': openvino_session}
+
+class OnnxDetector:
+    """YOLOv8 exportado para ONNX com entrada fixa (1, 3, imgsz, imgsz), em um runtime otimizado para CPU.
+
+    Cada imagem (frame ou recorte de ROI) passa por letterbox para imgsz em buffers
+    pré-alocados, e a saída é decodificada e suprimida em NumPy. O imgsz pedido por chamada é
+    ignorado: o tamanho da entrada é o da exportação, e recortes de ROI menores que ele são
+    ampliados e inferidos um a um. O modelo é aquecido com warmup inferências.
+    """
+    def __init__(self, onnx_path, runtime='onnxruntime', imgsz=640, threads=None, warmup=3, iou_threshold=0.7, max_det=300):
+        if runtime not in RUNTIMES:
+            raise ValueError(f"Runtime de inferência desconhecido: '{runtime}'")
+        self.run = RUNTIMES[runtime](onnx_path, threads)
+        self.iou_threshold = iou_threshold
+        self.max_det = max_det
+        self.canvas = np.full((imgsz, imgsz, 3), 114, dtype=np.uint8)
+        self.blob = np.zeros((1, 3, imgsz, imgsz), dtype=np.float32)
+        for _ in range(warmup):
+            self.run(self.blob)
+
+    def detect_image(self, image, conf, classes):
+        ratio, pad_x, pad_y = letterbox(image, self.canvas, self.blob)
+        xyxy, scores, cls = decode_yolo(self.run(self.blob), conf, classes, self.iou_threshold, self.max_det)
+        # Caixas de volta às coordenadas da imagem
+        xyxy = (xyxy - [pad_x, pad_y, pad_x, pad_y]) / ratio
+        h, w = image.shape[:2]
+        xyxy = np.clip(xyxy, 0, [w, h, w, h]).astype(np.float32)
+        return xyxy, scores.astype(np.float32), cls
+
+    def predict(self, images, conf=0.25, classes=None, imgsz=None, stream=False):
+        """(caixas, confianças, classes) de cada imagem, uma inferência por imagem."""
+        if isinstance(images, np.ndarray):
+            images = [images]
+        return [self.detect_image(image, conf, classes) for image in images]
+
+def export_onnx(model_path, imgsz):
+    """Exporta o modelo .pt para ONNX com entrada fixa, reaproveitando a exportação já feita ao lado do modelo."""
+    if model_path.endswith('.onnx'):
+        return model_path
+    onnx_path = f'{os.path.splitext(model_path)[0]}_{imgsz}.onnx'
+    if not os.path.exists(onnx_path):
+        from ultralytics import YOLO
+        exported = YOLO(model_path).export(format='onnx', imgsz=imgsz, dynamic=False, batch=1)
+        os.replace(exported, onnx_path)
+    return onnx_path
+
+def calibration_blobs(video_path, imgsz, n_frames):
+    """Entradas do modelo para n_frames frames espalhados pelo vídeo, para calibrar a quantização."""
+    cap = cv2.VideoCapture(video_path)
+    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    canvas = np.full((imgsz, imgsz, 3), 114, dtype=np.uint8)
+    blobs = []
+    for frame_index in np.linspace(0, max(total - 1, 0), n_frames).astype(int):
+        cap.set(cv2.CAP_PROP_POS_FRAMES, int(frame_index))
+        ret, frame = cap.read()
+        if not ret:
+            continue
+        blob = np.empty((1, 3, imgsz, imgsz), dtype=np.float32)
+        letterbox(frame, canvas, blob)
+        blobs.append(blob)
+    cap.release()
+    if not blobs:
+        raise IOError(f"Nenhum frame lido para a calibração INT8: {video_path}")
+    return blobs
+
+def calibration_id(video_path, n_frames):
+    """Identifica a calibração INT8: caminho absoluto, tamanho e data de modificação do vídeo, e frames usados."""
+    stat = os.stat(video_path)
+    key_data = [os.path.realpath(video_path), stat.st_size, int(stat.st_mtime), n_frames]
+    return hashlib.sha1(json.dumps(key_data).encode()).hexdigest()[:12]
+
+def quantize_int8(onnx_path, video_path, imgsz, n_frames=64):
+    """Quantização estática INT8 (formato QDQ, aceito pelo ONNX Runtime e pelo OpenVINO), calibrada com frames do vídeo.
+
+    O modelo quantizado fica ao lado do ONNX com a identidade da calibração no nome: cada vídeo
+    usa a sua própria calibração em vez de reaproveitar a do primeiro vídeo processado.
+    """
+    int8_path = f'{os.path.splitext(onnx_path)[0]}_int8_{calibration_id(video_path, n_frames)}.onnx'
+    if os.path.exists(int8_path):
+        return int8_path
+    import onnxruntime as ort
+    from onnxruntime.quantization import CalibrationDataReader, QuantFormat, QuantType, quantize_static
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+
+    # Inferência de formas e otimização do grafo antes da quantização, como recomendado pelo ONNX Runtime
+    prepared_path = f'{os.path.splitext(onnx_path)[0]}_prep.onnx'
+    quant_pre_process(onnx_path, prepared_path, skip_symbolic_shape=True) # Entrada de forma fixa: a inferência simbólica é dispensável
+    input_name = ort.InferenceSession(onnx_path, providers=['CPUExecutionProvider']).get_inputs()[0].name
+    blobs = iter(calibration_blobs(video_path, imgsz, n_frames))
+
+    class VideoCalibration(CalibrationDataReader):
+        def get_next(self):
+            blob = next(blobs, None)
+            return None if blob is None else {input_name: blob}
+
+    quantize_static(prepared_path, int8_path, VideoCalibration(), quant_format=QuantFormat.QDQ,
+                    activation_type=QuantType.QUInt8, weight_type=QuantType.QInt8, per_channel=True)
+    os.remove(prepared_path)
+    return int8_path
+
+def create_detector(model_path, params=None):
+    """Cria o backend de detecção configurado em params (config['detector']); o padrão é o Ultralytics."""
+    params = params or {}
+    backend = params.get('backend', 'ultralytics')
+    if backend == 'ultralytics':
+        return UltralyticsDetector(model_path)
+    if backend == 'mock':
+        return MockDetector(params.get('class_id', 2))
+    if backend not in RUNTIMES:
+        raise ValueError(f"Backend de detecção desconhecido: '{backend}'")
+    imgsz = params.get('imgsz', 640)
+    onnx_path = export_onnx(model_path, imgsz)
+    if params.get('int8', False):
+        onnx_path = quantize_int8(onnx_path, params['calibration_video'], imgsz, params.get('calibration_frames', 64))
+    return OnnxDetector(onnx_path, backend, imgsz, params.get('threads'), params.get('warmup', 3),
+                        params.get('iou_threshold', 0.7), params.get('max_det', 300))
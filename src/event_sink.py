@@ -0,0 +1,172 @@
+import csv
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+# Campos dos registros: eventos de contagem ('count') e totais por percurso ('aggregate')
+FIELDS = ['type', 'timestamp', 'stream', 'frame_index', 'track_id', 'path', 'x1', 'y1', 'x2', 'y2', 'total']
+
+_CLOSE = object() # Marca o fim da fila do escritor
+
+class JsonlWriter:
+    """Um objeto JSON por linha."""
+    def __init__(self, path):
+        self.file = open(path, 'a', encoding='utf-8')
+
+    def write(self, records):
+        self.file.write(''.join(json.dumps(record, ensure_ascii=False) + '\n' for record in records))
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+class CsvWriter:
+    """Uma linha por registro, com as colunas de FIELDS (vazias quando não se aplicam)."""
+    def __init__(self, path):
+        self.file = open(path, 'a', newline='', encoding='utf-8')
+        self.writer = csv.DictWriter(self.file, fieldnames=FIELDS)
+        if self.file.tell() == 0:
+            self.writer.writeheader()
+
+    def write(self, records):
+        self.writer.writerows(records)
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+class SqliteWriter:
+    """Tabelas count_events e path_totals; cada lote é gravado em uma única transação."""
+    def __init__(self, path):
+        self.connection = sqlite3.connect(path)
+        self.connection.execute('CREATE TABLE IF NOT EXISTS count_events (timestamp REAL, stream TEXT, frame_index INTEGER, track_id INTEGER, path TEXT, x1 REAL, y1 REAL, x2 REAL, y2 REAL)')
+        self.connection.execute('CREATE TABLE IF NOT EXISTS path_totals (timestamp REAL, stream TEXT, frame_index INTEGER, path TEXT, total INTEGER)')
+        self.connection.commit()
+
+    def write(self, records):
+        counts = [(r['timestamp'], r['stream'], r['frame_index'], r['track_id'], r['path'], r['x1'], r['y1'], r['x2'], r['y2'])
+                  for r in records if r['type'] == 'count']
+        totals = [(r['timestamp'], r['stream'], r['frame_index'], r['path'], r['total']) for r in records if r['type'] == 'aggregate']
+        with self.connection:
+            self.connection.executemany('INSERT INTO count_events VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', counts)
+            self.connection.executemany('INSERT INTO path_totals VALUES (?, ?, ?, ?, ?)', totals)
+
+    def close(self):
+        self.connection.close()
+
+WRITERS = {'jsonl': JsonlWriter, 'csv': CsvWriter, 'sqlite': SqliteWriter}
+
+class EventSink(threading.Thread):
+    """Fila de eventos de contagem gravada em lotes por uma thread própria.
+
+    count() e aggregate() só enfileiram e nunca bloqueiam o loop de processamento: com a fila
+    cheia, o registro é descartado e contabilizado em dropped. O escritor grava quando junta
+    batch_size registros ou a cada flush_interval segundos, e close() grava o que restar.
+    """
+    def __init__(self, backend, path, queue_size=10000, batch_size=256, flush_interval=1.0, aggregate_interval=0):
+        super().__init__(name='event-sink', daemon=True)
+        if backend not in WRITERS:
+            raise ValueError(f"Destino de eventos desconhecido: '{backend}'")
+        self.backend = backend
+        self.path = path
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.aggregate_interval = aggregate_interval
+        self.written = 0
+        self.dropped = 0
+        self._dropped_lock = threading.Lock() # count() e aggregate() são chamados pelas threads de todas as câmeras
+        self.error = None
+
+    def _put(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._dropped_lock:
+                self.dropped += 1
+
+    def count(self, frame_index, track_id, path_name, box, stream=None):
+        x1, y1, x2, y2 = (float(v) for v in box)
+        self._put({'type': 'count', 'timestamp': time.time(), 'stream': stream, 'frame_index': frame_index, 'track_id': int(track_id),
+                   'path': path_name, 'x1': x1, 'y1': y1, 'x2': x2, 'y2': y2, 'total': None})
+
+    def aggregate(self, frame_index, counters, stream=None):
+        timestamp = time.time()
+        for path_name, total in counters.items():
+            self._put({'type': 'aggregate', 'timestamp': timestamp, 'stream': stream, 'frame_index': frame_index, 'track_id': None,
+                       'path': path_name, 'x1': None, 'y1': None, 'x2': None, 'y2': None, 'total': int(total)})
+
+    def frame_done(self, frame_index, counters, stream=None):
+        """Enfileira os totais por percurso a cada aggregate_interval frames (counters é chamado só nesses frames)."""
+        if self.aggregate_interval and (frame_index + 1) % self.aggregate_interval == 0:
+            self.aggregate(frame_index, counters(), stream)
+
+    def run(self):
+        writer = None
+        batch = []
+        closing = False
+        try:
+            # O escritor é criado nesta thread (conexões SQLite ficam presas à thread que as abriu)
+            writer = WRITERS[self.backend](self.path)
+            deadline = time.monotonic() + self.flush_interval
+            while not closing:
+                try:
+                    record = self.queue.get(timeout=max(deadline - time.monotonic(), 0))
+                    if record is _CLOSE:
+                        closing = True
+                    else:
+                        batch.append(record)
+                except queue.Empty:
+                    pass
+                if batch and (closing or len(batch) >= self.batch_size or time.monotonic() >= deadline):
+                    writer.write(batch)
+                    self.written += len(batch)
+                    batch = []
+                if time.monotonic() >= deadline:
+                    deadline = time.monotonic() + self.flush_interval
+        except Exception as e:
+            self.error = e
+            # Sem escritor, a fila continua sendo esvaziada para que close() não trave
+            while not closing:
+                closing = self.queue.get() is _CLOSE
+        finally:
+            if writer is not None:
+                try:
+                    writer.close()
+                except Exception as e:
+                    self.error = self.error or e
+
+    def close(self):
+        """Grava os registros pendentes e encerra a thread do escritor.
+
+        Não levanta exceções: é chamado em blocos finally, onde mascararia o erro original do
+        processamento. Falhas de gravação são registradas em error e mostradas por print_summary().
+        """
+        try:
+            if self.is_alive():
+                self.queue.put(_CLOSE)
+                self.join()
+        except BaseException as e:
+            self.error = self.error or e
+        if self.error is not None:
+            print(f"Erro ao gravar eventos em {self.path}: {self.error!r}")
+
+    def print_summary(self):
+        line = f"Eventos: {self.written} gravados em {self.path}, {self.dropped} descartados com a fila cheia"
+        print(line + (" (gravação interrompida por erro)" if self.error is not None else ""))
+
+def open_event_sink(config):
+    """Cria o EventSink configurado em config['events'], se habilitado."""
+    events_config = config.get('events', {})
+    if not events_config.get('enabled', False):
+        return None
+    path = events_config.get('path', './data/events.jsonl')
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    sink = EventSink(events_config.get('backend', 'jsonl'), path, events_config.get('queue_size', 10000),
+                     events_config.get('batch_size', 256), events_config.get('flush_interval', 1.0),
+                     events_config.get('aggregate_interval', 0))
+    sink.start()
+    return sink
@@ -0,0 +1,122 @@
+import shutil
+import subprocess
+import time
+import cv2
+import numpy as np
+
+DECODERS = ('opencv', 'ffmpeg')
+
+class FramePool:
+    """Anel de size buffers (altura, largura, 3) pré-alocados, entregues em rodízio.
+
+    Um buffer volta a ser escrito size frames depois de entregue: quem recebe um frame não pode
+    guardá-lo por mais de size - 1 frames (lotes, filas do pipeline).
+    """
+    def __init__(self, width, height, size):
+        self.buffers = [np.empty((height, width, 3), dtype=np.uint8) for _ in range(max(size, 1))]
+        self.index = 0
+
+    def next(self):
+        buffer = self.buffers[self.index]
+        self.index = (self.index + 1) % len(self.buffers)
+        return buffer
+
+class PooledReader:
+    """Decodificação pelo OpenCV sem alocação por frame.
+
+    cap.read escreve sempre no mesmo buffer da resolução de origem e o cv2.resize escreve (dst=)
+    no próximo buffer do pool. Se a origem já está na resolução de trabalho, a leitura vai direto
+    para o pool, sem o redimensionamento. As cópias internas do decodificador continuam: o que
+    deixa de existir são os arrays novos de cada frame.
+    """
+    def __init__(self, cap, width, height, pool_size):
+        self.cap = cap
+        self.size = (width, height)
+        self.pool = FramePool(width, height, pool_size)
+        self.source = None # Buffer da resolução de origem, reaproveitado por cap.read
+        self.direct = False
+
+    def read(self, profiler=None):
+        """Próximo frame na resolução de trabalho (buffer do pool), ou None no fim do vídeo."""
+        start = time.perf_counter()
+        if self.direct:
+            ret, frame = self.cap.read(image=self.pool.next())
+            if ret and profiler is not None:
+                profiler.since('decode', start)
+            return frame if ret else None
+        ret, source = self.cap.read(image=self.source)
+        if not ret:
+            return None
+        if profiler is not None:
+            start = profiler.since('decode', start)
+        if self.source is None and source.shape[1::-1] == self.size:
+            # Primeiro frame já na resolução de trabalho: os próximos são lidos direto no pool
+            self.direct = True
+            frame = self.pool.next()
+            np.copyto(frame, source)
+            return frame
+        self.source = source
+        frame = cv2.resize(source, self.size, dst=self.pool.next())
+        if profiler is not None:
+            profiler.since('resize', start)
+        return frame
+
+    def release(self):
+        pass
+
+class FFmpegReader:
+    """Decodificação por um processo ffmpeg, com a escala e a conversão para BGR feitas na decodificação.
+
+    O ffmpeg escreve os frames já na resolução de trabalho em um pipe (rawvideo bgr24), e os bytes
+    de cada frame são lidos direto no próximo buffer do pool, sem cópia intermediária. A escala é
+    bilinear, como o cv2.resize, mas os pixels não são idênticos aos do caminho do OpenCV.
+    """
+    def __init__(self, source, width, height, pool_size, ffmpeg='ffmpeg', threads=0):
+        self.size = (width, height)
+        self.pool = FramePool(width, height, pool_size)
+        command = [ffmpeg, '-nostdin', '-loglevel', 'error', '-threads', str(threads), '-i', str(source),
+                   '-vf', f'scale={width}:{height}:flags=bilinear', '-vsync', '0', '-f', 'rawvideo', '-pix_fmt', 'bgr24', '-']
+        # bufsize=0: sem o buffer do Python, readinto lê do pipe direto no frame
+        self.process = subprocess.Popen(command, stdout=subprocess.PIPE, bufsize=0)
+
+    def read(self, profiler=None):
+        """Próximo frame na resolução de trabalho (buffer do pool), ou None no fim do vídeo."""
+        start = time.perf_counter()
+        frame = self.pool.next()
+        view = memoryview(frame).cast('B')
+        filled = 0
+        while filled < len(view):
+            n = self.process.stdout.readinto(view[filled:])
+            if not n:
+                return None
+            filled += n
+        if profiler is not None:
+            profiler.since('decode', start)
+        return frame
+
+    def release(self):
+        if self.process.poll() is None:
+            self.process.kill()
+        self.process.stdout.close()
+        self.process.wait()
+
+def open_frame_reader(config, cap, target_w, target_h, frames_in_flight=1, allow_ffmpeg=True):
+    """Cria o leitor com pool de buffers configurado em config['ingest'], se habilitado.
+
+    frames_in_flight é o máximo de frames entregues que ainda podem estar em uso ao mesmo tempo
+    (o lote da detecção, as filas do pipeline); o pool tem um buffer a mais. Sem allow_ffmpeg
+    (captura já posicionada em outro frame), a decodificação fica com o OpenCV.
+    """
+    ingest_config = config.get('ingest', {})
+    if not ingest_config.get('enabled', False):
+        return None
+    decoder = ingest_config.get('decoder', 'opencv')
+    if decoder not in DECODERS:
+        raise ValueError(f"Decodificador desconhecido: '{decoder}'")
+    pool_size = frames_in_flight + 1
+    if decoder == 'ffmpeg' and allow_ffmpeg:
+        ffmpeg = shutil.which(ingest_config.get('ffmpeg_path', 'ffmpeg'))
+        if ffmpeg is not None:
+            return FFmpegReader(config['video_path'], target_w, target_h, pool_size, ffmpeg, ingest_config.get('threads', 0))
+        print("ffmpeg não encontrado; decodificando com o OpenCV.")
+    return PooledReader(cap, target_w, target_h, pool_size)
@@ -0,0 +1,181 @@
+import collections
+import os
+import threading
+import time
+import cv2
+import numpy as np
+
+DROP_POLICIES = ('latest', 'drop_oldest', 'block')
+
+class LiveSource(threading.Thread):
+    """Leitura de um stream ao vivo em uma thread própria, para que o buffer da captura não acumule atraso.
+
+    Cada frame lido recebe um índice sequencial, o timestamp do stream (CAP_PROP_POS_MSEC) e o
+    instante da captura. Políticas de descarte quando o processamento não acompanha a fonte:
+    'latest' guarda só o frame mais novo, 'drop_oldest' guarda os buffer_size mais novos e
+    'block' não descarta nada (a leitura espera o consumidor, como em um arquivo).
+
+    Se a leitura falhar ou nenhum frame chegar em stall_timeout segundos, a captura é reaberta
+    após reconnect_delay segundos. Arquivos locais terminam no fim do vídeo; com realtime, são
+    lidos no ritmo do seu FPS, simulando uma câmera ao vivo.
+    """
+    def __init__(self, source, policy='latest', buffer_size=4, stall_timeout=5.0, reconnect_delay=1.0,
+                 max_reconnects=None, realtime=False):
+        super().__init__(name='live-source', daemon=True)
+        if policy not in DROP_POLICIES:
+            raise ValueError(f"Política de descarte desconhecida: '{policy}'")
+        self.source = source
+        self.policy = policy
+        self.buffer = collections.deque(maxlen=1 if policy == 'latest' else max(buffer_size, 1))
+        self.stall_timeout = stall_timeout
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnects = max_reconnects
+        self.is_file = os.path.isfile(str(source))
+        self.realtime = realtime and self.is_file
+        self.condition = threading.Condition()
+        self.stop_event = threading.Event()
+        self.finished = False
+        self.fps = 0.0
+        self.cap = None
+        self.current = None # Último item entregue por live_frames
+
+        self.grabbed = 0
+        self.dropped = 0
+        self.reconnects = 0
+        self.latencies = []
+
+    def _open(self):
+        timeout_ms = int(self.stall_timeout * 1000)
+        params = [cv2.CAP_PROP_OPEN_TIMEOUT_MSEC, timeout_ms, cv2.CAP_PROP_READ_TIMEOUT_MSEC, timeout_ms]
+        cap = cv2.VideoCapture(self.source, cv2.CAP_ANY, params)
+        if cap.isOpened():
+            self.fps = cap.get(cv2.CAP_PROP_FPS) or self.fps
+        return cap
+
+    def _push(self, item):
+        with self.condition:
+            if self.policy == 'block':
+                while len(self.buffer) == self.buffer.maxlen and not self.stop_event.is_set():
+                    self.condition.wait(0.1)
+            elif len(self.buffer) == self.buffer.maxlen:
+                self.dropped += 1
+            self.buffer.append(item)
+            self.condition.notify_all()
+
+    def _reconnect(self):
+        """Reabre a captura; retorna False quando as tentativas se esgotam ou a leitura é interrompida."""
+        self.cap.release()
+        while not self.stop_event.is_set():
+            if self.max_reconnects is not None and self.reconnects >= self.max_reconnects:
+                return False
+            self.stop_event.wait(self.reconnect_delay)
+            self.reconnects += 1
+            print(f"Reconectando ao stream ({self.reconnects}): {self.source}")
+            self.cap = self._open()
+            if self.cap.isOpened():
+                return True
+        return False
+
+    def run(self):
+        self.cap = self._open()
+        frame_index = 0
+        last_frame_time = time.monotonic()
+        start = None
+        try:
+            if not self.cap.isOpened() and (self.is_file or not self._reconnect()):
+                return
+            while not self.stop_event.is_set():
+                ret, frame = self.cap.read()
+                now = time.monotonic()
+                if not ret:
+                    if self.is_file:
+                        return
+                    if now - last_frame_time < self.stall_timeout:
+                        self.stop_event.wait(0.01)
+                        continue
+                    if not self._reconnect():
+                        return
+                    last_frame_time = time.monotonic()
+                    continue
+                stream_ms = self.cap.get(cv2.CAP_PROP_POS_MSEC)
+                if self.realtime and self.fps > 0:
+                    # Arquivo lido no ritmo de uma câmera: cada frame só fica disponível no seu instante
+                    start = now if start is None else start
+                    delay = start + frame_index / self.fps - now
+                    if delay > 0:
+                        self.stop_event.wait(delay)
+                        now = time.monotonic()
+                last_frame_time = now
+                self.grabbed += 1
+                self._push((frame_index, stream_ms, now, frame))
+                frame_index += 1
+        finally:
+            self.cap.release()
+            with self.condition:
+                self.finished = True
+                self.condition.notify_all()
+
+    def get(self):
+        """Próximo frame guardado (índice, timestamp do stream em ms, instante da captura, frame), ou None no fim."""
+        with self.condition:
+            while not self.buffer and not self.finished:
+                self.condition.wait(0.1)
+            if not self.buffer:
+                return None
+            item = self.buffer.popleft()
+            self.condition.notify_all()
+            return item
+
+    def stop(self):
+        self.stop_event.set()
+        self.join()
+
+    def record_latency(self, captured_at):
+        self.latencies.append(time.monotonic() - captured_at)
+
+    def print_summary(self):
+        print(f"Stream ao vivo: {self.grabbed} frames lidos, {self.dropped} descartados ({self.policy}), {self.reconnects} reconexões")
+        if self.latencies:
+            latencies = 1000 * np.array(self.latencies)
+            print(f"Latência da captura à contagem: média {latencies.mean():.1f} ms, p95 {np.percentile(latencies, 95):.1f} ms, máxima {latencies.max():.1f} ms")
+
+def live_frames(source, target_w, target_h, max_coast=10):
+    """Gera os frames guardados pela LiveSource, redimensionados, na ordem da captura.
+
+    Antes de cada frame, gera None para cada intervalo de frame decorrido desde o anterior
+    (pelo timestamp do stream, ou pelo índice se a fonte não informar FPS), até max_coast, para
+    que o rastreador avance as predições pelo tempo real que passou entre os frames guardados.
+    source.current é o item do último frame gerado.
+    """
+    previous = None
+    while True:
+        item = source.get()
+        if item is None:
+            return
+        frame_index, stream_ms, captured_at, frame = item
+        if previous is not None:
+            gap = frame_index - previous[0]
+            if source.fps > 0 and stream_ms > 0 and previous[1] > 0:
+                gap = int(round((stream_ms - previous[1]) * source.fps / 1000))
+            for _ in range(min(gap - 1, max_coast)):
+                yield None
+        previous = item
+        source.current = item
+        yield cv2.resize(frame, (target_w, target_h))
+
+def open_live_source(config, cap=None):
+    """Cria e inicia a LiveSource de config['video_path'] configurada em config['live'], se habilitada.
+
+    cap, a captura já aberta do mesmo vídeo, é fechada antes, para não manter duas conexões com a câmera.
+    """
+    live_config = config.get('live', {})
+    if not live_config.get('enabled', False):
+        return None
+    if cap is not None:
+        cap.release()
+    source = LiveSource(config['video_path'], live_config.get('policy', 'latest'),
+                        live_config.get('buffer_size', 4), live_config.get('stall_timeout', 5.0),
+                        live_config.get('reconnect_delay', 1.0), live_config.get('max_reconnects'),
+                        live_config.get('realtime', False))
+    source.start()
+    return source
@@ -0,0 +1,24 @@
+import os
+
+def process_memory():
+    """Memória residente atual do processo, em bytes (None fora do Linux)."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+def memory_stats(sort, counter):
+    """Tamanho das estruturas que crescem com o tempo de execução: rastreador, contagem e processo."""
+    stats = dict(sort.stats())
+    stats.update(counter.stats())
+    stats['rss_mb'] = None
+    rss = process_memory()
+    if rss is not None:
+        stats['rss_mb'] = round(rss / 2**20, 1)
+    return stats
+
+def print_memory_stats(frame_index, sort, counter, label=None):
+    stats = ', '.join(f'{name}={value}' for name, value in memory_stats(sort, counter).items())
+    prefix = f'[{label}] ' if label else ''
+    print(f"{prefix}Memória no frame {frame_index}: {stats}")
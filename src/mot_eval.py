@@ -0,0 +1,328 @@
+"""Avaliação do SORT em lote sobre sequências no formato MOT, com grade de parâmetros em paralelo.
+
+Cada sequência (det/det.txt e, se houver, gt/gt.txt) é lida uma única vez e agrupada por frame;
+cada combinação de max_age, min_hits e iou_threshold roda sobre cada sequência em um pool de
+processos, grava as saídas no formato MOT e calcula as métricas CLEAR MOT e IDF1. O resumo vai
+para summary.csv e summary.json no diretório de saída.
+
+    python -m src.mot_eval --seq_path data --phase train --max_age 1 30 60 --min_hits 1 3 --iou_threshold 0.2 0.3
+"""
+import argparse
+import configparser
+import csv
+import glob
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from .sort import KalmanBoxTracker, Sort, iou_batch, linear_assignment
+
+# Contagens somáveis entre sequências; as métricas são calculadas a partir delas
+COUNTS = ('frames', 'gt', 'pred', 'matches', 'fp', 'fn', 'idsw', 'frag', 'iou_sum', 'idtp', 'gt_tracks', 'mt', 'ml')
+PARAMS = ('max_age', 'min_hits', 'iou_threshold')
+RESULT_FORMAT = '%d,%d,%.2f,%.2f,%.2f,%.2f,1,-1,-1,-1'
+
+def load_mot(file_path):
+    """Linhas de um arquivo MOT (det.txt, gt.txt ou saída do rastreador) como array float, (0, 10) se vazio."""
+    rows = np.loadtxt(file_path, delimiter=',', ndmin=2)
+    return rows if rows.size else np.empty((0, 10))
+
+def group_by_frame(rows, n_frames):
+    """Ordena as linhas pelo frame (coluna 0, a partir de 1) e retorna (linhas, offsets).
+
+    As linhas do frame f ficam em linhas[offsets[f - 1]:offsets[f]]: uma ordenação e uma busca
+    binária por frame, em vez de uma varredura do array inteiro a cada frame.
+    """
+    rows = rows[np.argsort(rows[:, 0], kind='stable')]
+    return rows, np.searchsorted(rows[:, 0], np.arange(1, n_frames + 2))
+
+class MotSequence:
+    """Detecções [x1,y1,x2,y2,score] e, se houver, verdade [id,x1,y1,x2,y2] de uma sequência, agrupadas por frame.
+
+    Da verdade ficam só as linhas consideradas na avaliação (coluna 7 diferente de 0) e, quando há
+    a coluna de classe, as de classe 1 (pedestre no MOT16/17) ou -1 (MOT15). Os distratores são
+    descartados em vez de terem as associações ignoradas, como faz o devkit oficial: um rastro
+    sobre um distrator conta como falso positivo.
+    """
+    def __init__(self, name, dets, gt=None, n_frames=None):
+        self.name = name
+        if n_frames is None:
+            n_frames = int(max(dets[:, 0].max(initial=0), 0 if gt is None else gt[:, 0].max(initial=0)))
+        self.n_frames = n_frames
+        # MOT: [frame, id, x, y, w, h, score, ...] -> [frame, x1, y1, x2, y2, score]
+        dets = dets[:, [0, 2, 3, 4, 5, 6]].copy()
+        dets[:, 3:5] += dets[:, 1:3]
+        rows, self.det_offsets = group_by_frame(dets, n_frames)
+        self.dets = np.ascontiguousarray(rows[:, 1:])
+        self.gt = self.gt_offsets = None
+        if gt is not None:
+            keep = gt[:, 6] != 0
+            if gt.shape[1] > 7:
+                keep &= np.isin(gt[:, 7], (-1, 1))
+            gt = gt[keep][:, :6].copy()
+            gt[:, 4:6] += gt[:, 2:4]
+            rows, self.gt_offsets = group_by_frame(gt, n_frames)
+            self.gt = np.ascontiguousarray(rows[:, 1:])
+
+    def frame_dets(self, frame):
+        return self.dets[self.det_offsets[frame - 1]:self.det_offsets[frame]]
+
+def load_sequence(seq_dir):
+    """Lê uma sequência MOT: det/det.txt, gt/gt.txt (opcional) e o número de frames de seqinfo.ini (opcional)."""
+    gt_path = os.path.join(seq_dir, 'gt', 'gt.txt')
+    gt = load_mot(gt_path) if os.path.exists(gt_path) else None
+    n_frames = None
+    info = configparser.ConfigParser()
+    if info.read(os.path.join(seq_dir, 'seqinfo.ini')) and info.has_option('Sequence', 'seqLength'):
+        n_frames = info.getint('Sequence', 'seqLength')
+    return MotSequence(os.path.basename(os.path.normpath(seq_dir)), load_mot(os.path.join(seq_dir, 'det', 'det.txt')), gt, n_frames)
+
+def load_sequences(seq_path, phase):
+    """Sequências de seq_path/phase/*/det/det.txt, como o runner de src/sort.py."""
+    pattern = os.path.join(seq_path, phase, '*', 'det', 'det.txt')
+    return [load_sequence(os.path.dirname(os.path.dirname(path))) for path in sorted(glob.glob(pattern))]
+
+def track_sequence(sequence, params, backend='batched'):
+    """Rastreia a sequência com um SORT novo; retorna (linhas [frame,id,x1,y1,x2,y2] em ordem de frame, segundos no Sort.update).
+
+    O contador de IDs é zerado antes, então os IDs não dependem das execuções anteriores no mesmo processo.
+    """
+    KalmanBoxTracker.count = 0
+    tracker = Sort(backend=backend, **params)
+    results = []
+    elapsed = 0.0
+    for frame in range(1, sequence.n_frames + 1):
+        start = time.perf_counter()
+        tracked = tracker.update(sequence.frame_dets(frame))
+        elapsed += time.perf_counter() - start
+        if len(tracked):
+            results.append(np.column_stack((np.full(len(tracked), frame), tracked[:, 4], tracked[:, :4])))
+    return (np.concatenate(results) if results else np.empty((0, 6))), elapsed
+
+def write_results(file_path, results):
+    """Grava as linhas [frame,id,x1,y1,x2,y2] no formato MOT (x, y, w, h) em uma única escrita."""
+    rows = results.copy()
+    rows[:, 4:6] -= rows[:, 2:4]
+    with open(file_path, 'w') as f:
+        f.write(''.join(RESULT_FORMAT % tuple(row) + '\n' for row in rows.tolist()))
+
+def clear_mot(sequence, results, threshold=0.5):
+    """Contagens das métricas CLEAR MOT e IDF1 das linhas [frame,id,x1,y1,x2,y2] contra a verdade da sequência.
+
+    Em cada frame, um objeto e um rastro só podem ser associados com IoU >= threshold; as
+    associações do frame anterior são mantidas enquanto válidas e as demais são decididas pelo
+    algoritmo húngaro. Há troca de identidade quando um objeto é associado a um rastro diferente
+    do da sua última associação, e fragmentação quando ele volta a ser associado depois de ter
+    sido perdido. Para o IDF1, cada par (objeto, rastro) vale o número de frames com IoU >=
+    threshold, e os pares um-para-um são escolhidos globalmente (algoritmo húngaro).
+    """
+    counts = dict.fromkeys(COUNTS, 0)
+    counts['frames'] = sequence.n_frames
+    results, offsets = group_by_frame(results, sequence.n_frames)
+    last_match = {} # ID do objeto -> ID do rastro da última associação
+    lost = set() # Objetos já associados e perdidos desde então
+    matched_ids, pairs = [], []
+    for frame in range(1, sequence.n_frames + 1):
+        gt = sequence.gt[sequence.gt_offsets[frame - 1]:sequence.gt_offsets[frame]]
+        tracked = results[offsets[frame - 1]:offsets[frame]]
+        counts['gt'] += len(gt)
+        counts['pred'] += len(tracked)
+        if len(gt) == 0:
+            continue
+        gt_ids = gt[:, 0].astype(np.int64).tolist()
+        rows, cols = [], []
+        if len(tracked):
+            track_ids = tracked[:, 1].astype(np.int64).tolist()
+            iou = iou_batch(gt[:, 1:5], tracked[:, 2:6])
+            valid = iou >= threshold
+            gi, ti = np.nonzero(valid)
+            pairs.append(np.column_stack((gt[gi, 0], tracked[ti, 1])))
+            column = {track_id: j for j, track_id in enumerate(track_ids)}
+            for i, gt_id in enumerate(gt_ids):
+                j = column.get(last_match.get(gt_id))
+                if j is not None and valid[i, j]:
+                    rows.append(i)
+                    cols.append(j)
+            free_gt = np.setdiff1d(np.arange(len(gt)), rows)
+            free_tracks = np.setdiff1d(np.arange(len(tracked)), cols)
+            if valid[np.ix_(free_gt, free_tracks)].any():
+                sub = np.ix_(free_gt, free_tracks)
+                # Pares inválidos com custo alto: o húngaro maximiza primeiro o número de associações
+                assigned = linear_assignment(np.where(valid[sub], 1 - iou[sub], len(gt) + len(tracked)))
+                assigned = assigned[valid[sub][assigned[:, 0], assigned[:, 1]]]
+                for i, j in zip(free_gt[assigned[:, 0]].tolist(), free_tracks[assigned[:, 1]].tolist()):
+                    if gt_ids[i] in last_match and last_match[gt_ids[i]] != track_ids[j]:
+                        counts['idsw'] += 1
+                    rows.append(i)
+                    cols.append(j)
+            for i, j in zip(rows, cols):
+                last_match[gt_ids[i]] = track_ids[j]
+            counts['iou_sum'] += float(iou[rows, cols].sum())
+        for i in rows:
+            if gt_ids[i] in lost:
+                counts['frag'] += 1
+                lost.discard(gt_ids[i])
+        missed = np.ones(len(gt), dtype=bool)
+        missed[rows] = False
+        lost.update(gt_id for gt_id in np.asarray(gt_ids)[missed].tolist() if gt_id in last_match)
+        counts['matches'] += len(rows)
+        matched_ids.append(gt[rows, 0])
+
+    counts['fp'] = counts['pred'] - counts['matches']
+    counts['fn'] = counts['gt'] - counts['matches']
+    # Objetos rastreados em >= 80% (MT) e em < 20% (ML) dos frames em que aparecem
+    gt_ids, frames_per_id = np.unique(sequence.gt[:, 0], return_counts=True)
+    matched_per_id = np.zeros(len(gt_ids))
+    if matched_ids:
+        matched, n = np.unique(np.concatenate(matched_ids), return_counts=True)
+        matched_per_id[np.searchsorted(gt_ids, matched)] = n
+    ratio = matched_per_id / np.maximum(frames_per_id, 1)
+    counts['gt_tracks'] = len(gt_ids)
+    counts['mt'] = int((ratio >= 0.8).sum())
+    counts['ml'] = int((ratio < 0.2).sum())
+    if pairs and sum(map(len, pairs)):
+        keys, n = np.unique(np.concatenate(pairs), axis=0, return_counts=True)
+        objects, oi = np.unique(keys[:, 0], return_inverse=True)
+        tracks, ti = np.unique(keys[:, 1], return_inverse=True)
+        overlap = np.zeros((len(objects), len(tracks)))
+        overlap[oi, ti] = n
+        assigned = linear_assignment(-overlap)
+        counts['idtp'] = int(overlap[assigned[:, 0], assigned[:, 1]].sum())
+    return counts
+
+def mot_metrics(counts):
+    """MOTA, MOTP (IoU médio das associações), IDF1, IDP, IDR, MT, ML, FP, FN, IDSW e fragmentações a partir das contagens."""
+    gt, pred = max(counts['gt'], 1), max(counts['pred'], 1)
+    return {
+        'MOTA': 1 - (counts['fn'] + counts['fp'] + counts['idsw']) / gt,
+        'MOTP': counts['iou_sum'] / max(counts['matches'], 1),
+        'IDF1': 2 * counts['idtp'] / max(counts['gt'] + counts['pred'], 1),
+        'IDP': counts['idtp'] / pred,
+        'IDR': counts['idtp'] / gt,
+        'MT': counts['mt'],
+        'ML': counts['ml'],
+        'FP': counts['fp'],
+        'FN': counts['fn'],
+        'IDSW': counts['idsw'],
+        'Frag': counts['frag'],
+    }
+
+def run_tag(params):
+    return '_'.join(f'{name}{params[name]:g}' for name in PARAMS)
+
+_sequences = {} # Sequências carregadas uma vez por processo (initializer do pool)
+
+def _init_worker(sequences):
+    _sequences.update((sequence.name, sequence) for sequence in sequences)
+
+def evaluate_run(name, params, backend='batched', output_dir=None, threshold=0.5):
+    """Rastreia e avalia uma sequência já carregada no processo com uma combinação de parâmetros."""
+    sequence = _sequences[name]
+    results, elapsed = track_sequence(sequence, params, backend)
+    if output_dir is not None:
+        run_dir = os.path.join(output_dir, run_tag(params))
+        os.makedirs(run_dir, exist_ok=True)
+        write_results(os.path.join(run_dir, f'{name}.txt'), results)
+    record = dict(params, sequence=name, seconds=elapsed)
+    if sequence.gt is not None:
+        record.update(clear_mot(sequence, results, threshold))
+    else:
+        record['frames'] = sequence.n_frames
+    return record
+
+def evaluate_grid(sequences, grid, backend='batched', workers=None, output_dir=None, threshold=0.5):
+    """Avalia cada combinação de parâmetros de grid ({parâmetro: valores}) em cada sequência.
+
+    As execuções (sequência, combinação) são independentes e rodam em workers processos, que
+    recebem as sequências uma única vez na criação; as mais longas são enviadas primeiro. Com
+    um único worker, tudo roda no próprio processo. Retorna um registro por execução, na ordem
+    da grade e das sequências.
+    """
+    combinations = [dict(zip(PARAMS, values)) for values in itertools.product(*(grid[name] for name in PARAMS))]
+    runs = [(sequence.name, params) for params in combinations for sequence in sequences]
+    frames = {sequence.name: sequence.n_frames for sequence in sequences}
+    order = sorted(range(len(runs)), key=lambda k: -frames[runs[k][0]])
+    workers = min(workers or os.cpu_count() or 1, len(runs))
+    records = [None] * len(runs)
+    if workers <= 1:
+        _init_worker(sequences)
+        for k in order:
+            records[k] = evaluate_run(*runs[k], backend, output_dir, threshold)
+        return records
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(sequences,)) as pool:
+        futures = {k: pool.submit(evaluate_run, *runs[k], backend, output_dir, threshold) for k in order}
+        for k, future in futures.items():
+            records[k] = future.result()
+    return records
+
+def summarize(records):
+    """Métricas por execução e, por combinação de parâmetros, das contagens somadas sobre as sequências ('ALL')."""
+    rows = []
+    for params, group in itertools.groupby(records, key=lambda record: tuple(record[name] for name in PARAMS)):
+        group = list(group)
+        total = dict(zip(PARAMS, params), sequence='ALL', seconds=sum(record['seconds'] for record in group))
+        for key in COUNTS:
+            if all(key in record for record in group):
+                total[key] = sum(record[key] for record in group)
+        for record in group + [total]:
+            row = dict(record)
+            row['fps'] = row['frames'] / max(row['seconds'], 1e-9)
+            if 'gt' in row:
+                row.update(mot_metrics(row))
+            rows.append(row)
+    return rows
+
+def write_summary(rows, output_dir):
+    os.makedirs(output_dir, exist_ok=True)
+    with open(os.path.join(output_dir, 'summary.json'), 'w') as f:
+        json.dump(rows, f, indent=2)
+    fields = list(dict.fromkeys(key for row in rows for key in row))
+    with open(os.path.join(output_dir, 'summary.csv'), 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        writer.writerows(rows)
+
+def print_summary(rows):
+    """Tabela das combinações (todas as sequências somadas), da melhor para a pior MOTA."""
+    totals = [row for row in rows if row['sequence'] == 'ALL']
+    totals.sort(key=lambda row: -row.get('MOTA', 0.0))
+    print(f"\n{'max_age':>7} {'min_hits':>8} {'iou':>5} {'MOTA':>7} {'MOTP':>6} {'IDF1':>6} {'FP':>7} {'FN':>7} {'IDSW':>6} {'Frag':>6} {'FPS':>8}")
+    for row in totals:
+        metrics = (f"{100 * row['MOTA']:6.1f}% {row['MOTP']:6.3f} {100 * row['IDF1']:5.1f}% {row['FP']:7d} {row['FN']:7d} {row['IDSW']:6d} {row['Frag']:6d}"
+                   if 'MOTA' in row else f"{'-':>7} {'-':>6} {'-':>6} {'-':>7} {'-':>7} {'-':>6} {'-':>6}")
+        print(f"{row['max_age']:7d} {row['min_hits']:8d} {row['iou_threshold']:5.2f} {metrics} {row['fps']:8.1f}")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Avaliação do SORT em lote (formato MOT) com grade de parâmetros')
+    parser.add_argument('--seq_path', default='data', help='Diretório das sequências')
+    parser.add_argument('--phase', default='train', help='Subdiretório em seq_path')
+    parser.add_argument('--max_age', type=int, nargs='+', default=[1], help='Valores de max_age')
+    parser.add_argument('--min_hits', type=int, nargs='+', default=[3], help='Valores de min_hits')
+    parser.add_argument('--iou_threshold', type=float, nargs='+', default=[0.3], help='Valores de iou_threshold')
+    parser.add_argument('--backend', choices=('batched', 'filterpy'), default='batched', help='Backend do SORT')
+    parser.add_argument('--workers', type=int, help='Processos (padrão: número de CPUs)')
+    parser.add_argument('--output', default=os.path.join('output', 'mot_eval'), help='Diretório das saídas e do resumo')
+    parser.add_argument('--no-results', action='store_true', help='Não grava as saídas do rastreador, só o resumo')
+    parser.add_argument('--match-iou', type=float, default=0.5, help='IoU mínimo de uma associação na avaliação')
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    start = time.perf_counter()
+    sequences = load_sequences(args.seq_path, args.phase)
+    if not sequences:
+        raise FileNotFoundError(f"Nenhuma sequência em {os.path.join(args.seq_path, args.phase, '*', 'det', 'det.txt')}")
+    print(f"{len(sequences)} sequências carregadas em {time.perf_counter() - start:.2f} s.")
+    grid = {'max_age': args.max_age, 'min_hits': args.min_hits, 'iou_threshold': args.iou_threshold}
+    start = time.perf_counter()
+    records = evaluate_grid(sequences, grid, args.backend, args.workers, None if args.no_results else args.output, args.match_iou)
+    print(f"{len(records)} execuções em {time.perf_counter() - start:.2f} s.")
+    rows = summarize(records)
+    write_summary(rows, args.output)
+    print_summary(rows)
+    print(f"\nResumo salvo em '{args.output}'.")
+
+if __name__ == '__main__':
+    main()
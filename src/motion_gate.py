@@ -0,0 +1,83 @@
+import cv2
+import numpy as np
+from .roi import crop_imgsz, crop_rects, merge_rects
+
+class MotionGate:
+    """Filtro de movimento barato na frente do YOLO, por subtração de fundo em baixa resolução.
+
+    Sem movimento dentro das áreas dos percursos e sem veículos rastreados, o frame não passa
+    pelo YOLO e o SORT recebe detecções vazias. Com movimento, a detecção é restrita às regiões
+    que se moveram e às caixas dos veículos já rastreados (que podem estar parados).
+    """
+    def __init__(self, paths, frame_w, frame_h, scale=0.25, threshold=16, min_area=400, margin=40,
+                 restrict=True, max_region_fraction=0.5, imgsz=640):
+        self.frame_w, self.frame_h = frame_w, frame_h
+        self.scale = scale
+        self.small_size = (max(int(frame_w * scale), 1), max(int(frame_h * scale), 1))
+        self.subtractor = cv2.createBackgroundSubtractorMOG2(varThreshold=threshold, detectShadows=False)
+        self.kernel = np.ones((3, 3), np.uint8)
+        self.min_pixels = max(min_area * scale * scale, 1) # min_area é dado em pixels do frame de trabalho
+        self.margin = margin
+        self.restrict = restrict
+        self.max_area = max_region_fraction * frame_w * frame_h
+        self.imgsz = imgsz
+
+        # Máscara (em baixa resolução) das áreas em volta dos percursos
+        self.path_mask = np.zeros(self.small_size[::-1], dtype=np.uint8)
+        for x1, y1, x2, y2 in crop_rects([path.points for path in paths.values()], frame_w, frame_h, margin):
+            cv2.rectangle(self.path_mask, (int(x1 * scale), int(y1 * scale)), (int(x2 * scale), int(y2 * scale)), 255, -1)
+
+        self.frames = 0
+        self.gated = 0 # Frames sem movimento: YOLO não executado
+        self.restricted = 0 # Frames detectados só nas regiões em movimento
+        self.full = 0 # Frames detectados por inteiro
+
+    def motion_mask(self, frame):
+        """Máscara de primeiro plano, em baixa resolução, restrita às áreas dos percursos."""
+        small = cv2.resize(frame, self.small_size, interpolation=cv2.INTER_AREA)
+        foreground = self.subtractor.apply(cv2.cvtColor(small, cv2.COLOR_BGR2GRAY))
+        foreground = cv2.morphologyEx(foreground, cv2.MORPH_OPEN, self.kernel)
+        return cv2.bitwise_and(foreground, self.path_mask)
+
+    def moving_regions(self, mask, tracked_results):
+        """Retângulos (x1,y1,x2,y2), no frame de trabalho, das regiões em movimento e dos veículos rastreados."""
+        _, _, stats, _ = cv2.connectedComponentsWithStats(cv2.dilate(mask, self.kernel))
+        stats = stats[1:]
+        x, y, w, h = (stats[:, :4] / self.scale).T
+        boxes = np.column_stack((x, y, x + w, y + h))
+        boxes = np.concatenate((boxes, np.asarray(tracked_results, dtype=float).reshape(-1, 5)[:, :4]))
+        boxes += [-self.margin, -self.margin, self.margin, self.margin]
+        boxes = np.clip(boxes, 0, [self.frame_w, self.frame_h, self.frame_w, self.frame_h]).astype(int)
+        return merge_rects(rect for rect in boxes.tolist() if rect[2] > rect[0] and rect[3] > rect[1])
+
+    def detect(self, tracker, frame):
+        """Detecta os veículos de um frame, pulando ou restringindo o YOLO conforme o movimento."""
+        self.frames += 1
+        mask = self.motion_mask(frame)
+        if cv2.countNonZero(mask) < self.min_pixels and len(tracker.last_tracked) == 0:
+            self.gated += 1
+            return np.empty((0, 5))
+
+        if self.restrict:
+            regions = self.moving_regions(mask, tracker.last_tracked)
+            area = sum((x2 - x1) * (y2 - y1) for x1, y1, x2, y2 in regions)
+            if regions and area <= self.max_area:
+                self.restricted += 1
+                return tracker.detect_regions(frame, regions, crop_imgsz(regions, self.frame_w, self.frame_h, self.imgsz))
+        self.full += 1
+        return tracker.detect(frame)
+
+    def print_summary(self):
+        if self.frames == 0:
+            return
+        print(f"Filtro de movimento: {self.gated} de {self.frames} frames sem YOLO ({100 * self.gated / self.frames:.1f}%), "
+              f"{self.restricted} detectados só nas regiões em movimento, {self.full} por inteiro")
+
+def create_motion_gate(config, paths, frame_w, frame_h):
+    """Cria o MotionGate configurado em config['motion_gate'], se habilitado."""
+    gate_config = config.get('motion_gate', {})
+    if not gate_config.get('enabled', False):
+        return None
+    return MotionGate(paths, frame_w, frame_h, gate_config.get('scale', 0.25), gate_config.get('threshold', 16),
+                      gate_config.get('min_area', 400), gate_config.get('margin', 40), gate_config.get('restrict', True),
+                      gate_config.get('max_region_fraction', 0.5), config.get('roi', {}).get('imgsz', 640))
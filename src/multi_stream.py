@@ -0,0 +1,274 @@
+import queue
+import threading
+import time
+import cv2
+from .path_config import load_paths
+from .memory_stats import print_memory_stats
+from .pipeline import _END, DecodeStage, PipelineStage
+from .event_sink import open_event_sink
+from .profiler import create_profiler
+from .trajectory_store import open_trajectory_writer
+from .process_video import count_vehicles, create_path_counter, create_paths, detector_params, long_running_config, path_counters, serial_only_options, tracker_params, working_resolution
+from .vehicle_tracker import VehicleTracker
+
+class StreamDecodeStage(DecodeStage):
+    """Decodificação de uma câmera, marcando o instante em que cada frame ficou pronto."""
+    def resize(self, item):
+        frame_index, frame = super().resize(item)
+        return frame_index, frame, time.monotonic()
+
+class CountStage(PipelineStage):
+    """Último estágio de uma câmera: rastreia e conta, sem fila de saída."""
+    def put(self, item):
+        return not self.stop_event.is_set()
+
+class CameraStream:
+    """Estado de uma câmera: captura, SORT, percursos e contadores próprios.
+
+    O VehicleTracker da câmera só filtra as detecções e rastreia; o modelo YOLO fica no detector
+    compartilhado, então cada câmera acrescenta apenas o estado do rastreador e dos percursos.
+    """
+    def __init__(self, name, config, stop_event, queue_size=4, latency_budget=0.2):
+        self.name = name
+        self.sink = None # EventSink compartilhado entre as câmeras, definido por run_streams
+        self.profiler = None # Profiler compartilhado entre as câmeras, definido por set_profiler
+        self.latency_budget = config.get('latency_budget', latency_budget)
+        cap_setup = cv2.VideoCapture(config['video_path'])
+        ret, first_frame = cap_setup.read()
+        cap_setup.release()
+        if not ret:
+            raise IOError(f"Erro ao ler o vídeo da câmera '{name}': {config['video_path']}")
+        target_w, target_h = working_resolution(first_frame, config['output_resolution'])
+
+        self.tracker = VehicleTracker(config['model_path'], config['classes_path'], config['target_classes'], config['confidence_threshold'], tracker_params(config))
+        self.paths = create_paths(load_paths(config['paths_file'], (target_w, target_h)))
+        self.counter = create_path_counter(config, self.paths)
+        self.trajectories = open_trajectory_writer(config, target_w, target_h, name)
+        self.stats_interval = long_running_config(config).get('stats_interval', 0)
+
+        self.cap = cv2.VideoCapture(config['video_path'])
+        self.decoded = queue.Queue(maxsize=queue_size)
+        self.detected = queue.Queue(maxsize=queue_size)
+        self.decode_stage = StreamDecodeStage(self.cap, target_w, target_h, self.decoded, stop_event)
+        self.decode_stage.name = f'decode-{name}'
+        self.count_stage = CountStage(f'count-{name}', self.track_and_count, self.detected, None, stop_event)
+        self.stop_event = stop_event
+        self.finished = False # Fim do vídeo já recebido do estágio de decodificação
+        self.ended = False # Fim do vídeo já repassado ao estágio de contagem
+        self.frames = 0
+        self.total_wait = 0.0 # Soma dos tempos entre a decodificação e a inferência
+        self.max_wait = 0.0
+
+    def stages(self):
+        return [self.decode_stage, self.count_stage]
+
+    def release(self):
+        """Libera a captura e fecha o gravador de trajetórias da câmera."""
+        self.cap.release()
+        if self.trajectories is not None:
+            self.trajectories.close()
+
+    def set_profiler(self, profiler):
+        self.profiler = self.decode_stage.profiler = self.tracker.tracker.profiler = profiler
+
+    def take(self):
+        """Retira o próximo frame decodificado, sem bloquear; None se não houver."""
+        try:
+            item = self.decoded.get_nowait()
+        except queue.Empty:
+            return None
+        if item is _END:
+            self.finished = True
+            return None
+        return item
+
+    def end_if_finished(self):
+        """Repassa o fim do vídeo ao estágio de contagem, depois das detecções do último lote."""
+        if self.finished and not self.ended:
+            self.ended = True
+            self.send(_END)
+
+    def send(self, item):
+        """Entrega as detecções de um frame ao estágio de contagem, desistindo se o processamento for interrompido."""
+        while not self.stop_event.is_set():
+            try:
+                self.detected.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def track_and_count(self, item):
+        frame_index, detections = item
+        tracked_results = self.tracker.tracker.update(detections)
+        start = time.perf_counter()
+        if self.sink is not None:
+            count_vehicles(tracked_results, self.counter, self.sink, frame_index, self.name)
+            self.sink.frame_done(frame_index, lambda: path_counters(self.paths), self.name)
+        else:
+            for obj_id, path_name in self.counter.update(tracked_results):
+                print(f"[{self.name}] Veículo ID {obj_id} completou o percurso '{path_name}'!")
+        if self.trajectories is not None:
+            self.trajectories.append(frame_index, tracked_results)
+        if self.profiler is not None:
+            self.profiler.since('count', start)
+            self.profiler.observe(frame_index, self.tracker.tracker, self.paths, self.name, decode=self.decoded, detect=self.detected)
+        if self.stats_interval and (frame_index + 1) % self.stats_interval == 0:
+            print_memory_stats(frame_index + 1, self.tracker.tracker, self.counter, self.name)
+
+    def print_final_counts(self):
+        mean_wait = 1000 * self.total_wait / self.frames if self.frames else 0.0
+        print(f"\n--- Contagem Final: {self.name} ({self.frames} frames, espera média {mean_wait:.1f} ms, máxima {1000 * self.max_wait:.1f} ms) ---")
+        for name, count in path_counters(self.paths).items():
+            print(f"Total no Percurso {name}: {count}")
+
+class BatchScheduler:
+    """Monta lotes de inferência com frames de várias câmeras.
+
+    As câmeras são atendidas em rodízio, um frame de cada por rodada, começando por uma câmera
+    diferente a cada lote, para que nenhuma monopolize o detector. Um lote incompleto é enviado
+    assim que o frame mais antigo dele esgota o orçamento de latência da sua câmera.
+    """
+    def __init__(self, streams, batch_size, stop_event, poll_interval=0.002):
+        self.streams = streams
+        self.batch_size = max(batch_size, 1)
+        self.stop_event = stop_event
+        self.poll_interval = poll_interval
+        self.first_stream = 0
+        self.batches = 0
+        self.batched_frames = 0
+
+    def _fill(self, batch):
+        """Completa o lote em rodadas; retorna o menor prazo de latência dos frames acrescentados."""
+        deadline = float('inf')
+        n_streams = len(self.streams)
+        added = True
+        while added and len(batch) < self.batch_size:
+            added = False
+            for k in range(n_streams):
+                stream = self.streams[(self.first_stream + k) % n_streams]
+                if stream.finished or len(batch) == self.batch_size:
+                    continue
+                item = stream.take()
+                if item is None:
+                    continue
+                frame_index, frame, decoded_at = item
+                batch.append((stream, frame_index, frame, decoded_at))
+                deadline = min(deadline, decoded_at + stream.latency_budget)
+                added = True
+        return deadline
+
+    def next_batch(self):
+        """Próximo lote [(câmera, índice, frame, instante de decodificação)]; vazio quando todas as câmeras terminam."""
+        batch = []
+        deadline = float('inf')
+        while not self.stop_event.is_set():
+            deadline = min(deadline, self._fill(batch))
+            active = not all(stream.finished for stream in self.streams)
+            if len(batch) == self.batch_size or (batch and (not active or time.monotonic() >= deadline)):
+                break
+            if not active:
+                return []
+            time.sleep(self.poll_interval)
+        if not batch:
+            return batch
+        self.first_stream = (self.first_stream + 1) % len(self.streams)
+        self.batches += 1
+        self.batched_frames += len(batch)
+        return batch
+
+def run_streams(config, stream_configs):
+    """Processa várias câmeras em um único processo, com um único modelo YOLO compartilhado.
+
+    Cada câmera tem threads próprias de decodificação e de rastreamento+contagem; a thread
+    principal monta os lotes entre câmeras, roda o YOLO e distribui as detecções. O modelo roda
+    sem filtro de classe, com a menor confiança entre as câmeras, e cada câmera aplica o seu
+    filtro de classes e de confiança na leitura, como no cache de detecções.
+    """
+    multi_config = config.get('multi_stream', {})
+    for stream_config in stream_configs:
+        options = serial_only_options(dict(config, **stream_config))
+        if options:
+            raise ValueError(f"'{options[0]}' não é suportado com várias câmeras (--streams).")
+    stop_event = threading.Event()
+    streams = []
+    sink = profiler = None
+    try:
+        for i, stream_config in enumerate(stream_configs):
+            stream_config = dict(config, **stream_config)
+            streams.append(CameraStream(stream_config.get('name', f'cam{i+1}'), stream_config, stop_event,
+                                        multi_config.get('queue_size', 4), multi_config.get('latency_budget', 0.2)))
+        if not streams:
+            print("Nenhuma câmera configurada.")
+            return
+        # Um único EventSink recebe os eventos de todas as câmeras, identificadas pelo nome
+        sink = open_event_sink(config)
+        profiler = create_profiler(config)
+        for stream in streams:
+            stream.sink = sink
+            stream.set_profiler(profiler)
+
+        # A quantização INT8, se habilitada, é calibrada com o vídeo da primeira câmera
+        detector = VehicleTracker(config['model_path'], config['classes_path'], config['target_classes'], config['confidence_threshold'], config['tracker'],
+                                  detector_params(dict(config, video_path=stream_configs[0]['video_path'])))
+        detector.profiler = profiler
+    except BaseException:
+        # Erro ao abrir uma câmera ou o detector: as câmeras já abertas são liberadas
+        for stream in streams:
+            stream.release()
+        if sink is not None:
+            sink.close()
+        if profiler is not None:
+            profiler.close()
+        raise
+    min_confidence = min(stream.tracker.conf_threshold for stream in streams)
+    scheduler = BatchScheduler(streams, multi_config.get('batch_size', 8), stop_event)
+    stages = [stage for stream in streams for stage in stream.stages()]
+    for stage in stages:
+        stage.start()
+
+    start = time.monotonic()
+    try:
+        while True:
+            batch = scheduler.next_batch()
+            if not batch:
+                break
+            inference_start = time.monotonic()
+            raw = detector.detect_raw([frame for _, _, frame, _ in batch], min_confidence)
+            for (stream, frame_index, _, decoded_at), raw_detections in zip(batch, raw):
+                wait = inference_start - decoded_at
+                stream.frames += 1
+                stream.total_wait += wait
+                stream.max_wait = max(stream.max_wait, wait)
+                stream.send((frame_index, stream.tracker.filter_detections(*raw_detections)))
+            for stream in streams:
+                stream.end_if_finished()
+        # Todas as câmeras terminaram: os estágios de contagem esvaziam as filas antes de encerrar
+        for stream in streams:
+            stream.end_if_finished()
+            stream.count_stage.join()
+    finally:
+        # Câmeras que ainda não terminaram (interrupção ou erro) são encerradas
+        stop_event.set()
+        for stage in stages:
+            stage.join()
+        for stream in streams:
+            stream.release()
+        if sink is not None:
+            for stream in streams:
+                sink.aggregate(None, path_counters(stream.paths), stream.name)
+            sink.close()
+        if profiler is not None:
+            profiler.close()
+    elapsed = time.monotonic() - start
+
+    for stage in stages:
+        if stage.error is not None:
+            raise stage.error
+    for stream in streams:
+        stream.print_final_counts()
+    if sink is not None:
+        sink.print_summary()
+    total_frames = sum(stream.frames for stream in streams)
+    if scheduler.batches:
+        print(f"\n{len(streams)} câmeras, {total_frames} frames em {elapsed:.1f} s ({total_frames / max(elapsed, 1e-9):.1f} frames/s), "
+              f"{scheduler.batches} lotes de {scheduler.batched_frames / scheduler.batches:.1f} frames em média")
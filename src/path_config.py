@@ -0,0 +1,24 @@
+import json
+
+def save_paths(file_path, paths, resolution):
+    """Salva os percursos (listas de pontos) e a resolução de trabalho em que foram desenhados."""
+    data = {
+        'resolution': list(resolution),
+        'paths': [[list(map(int, point)) for point in path] for path in paths],
+    }
+    with open(file_path, 'w') as f:
+        json.dump(data, f, indent=2)
+
+def load_paths(file_path, resolution=None):
+    """Lê os percursos salvos por save_paths.
+
+    Se resolution for informada e diferente da resolução salva, os pontos são reescalados para ela.
+    """
+    with open(file_path, 'r') as f:
+        data = json.load(f)
+    paths = [[tuple(point) for point in path] for path in data['paths']]
+    if resolution is None or tuple(data['resolution']) == tuple(resolution):
+        return paths
+    sx = resolution[0] / data['resolution'][0]
+    sy = resolution[1] / data['resolution'][1]
+    return [[(int(round(x * sx)), int(round(y * sy))) for x, y in path] for path in paths]
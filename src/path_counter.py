@@ -0,0 +1,259 @@
+import numpy as np
+
+class PathZoneCounter:
+    """Contagem original: chama PathZone.process_vehicle para cada veículo em cada percurso.
+
+    Com counted_id_ttl, os IDs já contados saem de PathZone.processed_ids depois de
+    counted_id_ttl frames sem aparecer (create_counter exige que seja maior que o max_age do
+    rastreador). Isso não garante que um veículo nunca seja contado de novo: um rastro vivo pode
+    ficar mais de counted_id_ttl frames sem ser reportado (detecções intermitentes mantêm
+    time_since_update abaixo de max_age e hit_streak abaixo de min_hits) e, ao voltar a ser
+    reportado com o mesmo ID, pode concluir o percurso outra vez.
+    """
+    def __init__(self, paths, counted_id_ttl=None):
+        self.paths = paths
+        self.vehicle_path_progress = {}
+        self.counted_id_ttl = counted_id_ttl
+        self.frame_index = 0
+        self.last_seen = {} # Último frame em que cada veículo já contado foi visto
+        # Índice incremental: quantos veículos estão em cada nível de progresso (1 em diante) de cada percurso
+        self.progress_counts = {name: [0] * path.total_checkpoints for name, path in paths.items()}
+
+    def update(self, tracked_results):
+        """Processa os veículos rastreados em um frame e retorna os eventos (obj_id, nome do percurso) concluídos."""
+        events = []
+        current_tracked_ids = set()
+        for result in tracked_results:
+            x1, y1, x2, y2, obj_id = map(int, result)
+            current_tracked_ids.add(obj_id)
+            for path in self.paths.values():
+                reached = self.vehicle_path_progress.get(obj_id, {}).get(path.name, 0)
+                if path.process_vehicle(obj_id, (x1, y1, x2, y2), self.vehicle_path_progress):
+                    events.append((obj_id, path.name))
+                self._index_progress(path.name, reached, self.vehicle_path_progress.get(obj_id, {}).get(path.name, 0))
+
+        # Limpeza do progresso de veículos que sumiram
+        ids_to_remove = set(self.vehicle_path_progress.keys()) - current_tracked_ids
+        for old_id in ids_to_remove:
+            for name, reached in self.vehicle_path_progress[old_id].items():
+                self._index_progress(name, reached, 0)
+            del self.vehicle_path_progress[old_id]
+
+        self.frame_index += 1
+        if self.counted_id_ttl is not None:
+            for obj_id in current_tracked_ids.intersection(self.last_seen):
+                self.last_seen[obj_id] = self.frame_index
+            for obj_id, _ in events:
+                self.last_seen[obj_id] = self.frame_index
+            self._evict_counted()
+        return events
+
+    def _index_progress(self, name, old, new):
+        """Move um veículo do nível de progresso old para new no índice do percurso (o nível 0 não é contado)."""
+        if old != new:
+            counts = self.progress_counts[name]
+            if old:
+                counts[old] -= 1
+            if new:
+                counts[new] += 1
+
+    def _evict_counted(self):
+        expired = [obj_id for obj_id, seen in self.last_seen.items() if self.frame_index - seen > self.counted_id_ttl]
+        for path in self.paths.values():
+            path.processed_ids.difference_update(expired)
+        for obj_id in expired:
+            del self.last_seen[obj_id]
+
+    def stats(self):
+        """Tamanho das estruturas da contagem."""
+        return {
+            'tracked_vehicles': len(self.vehicle_path_progress),
+            'progress_entries': sum(len(progress) for progress in self.vehicle_path_progress.values()),
+            'counted_ids': sum(len(path.processed_ids) for path in self.paths.values()),
+        }
+
+    def next_checkpoints(self, tracked_results):
+        """Próximo checkpoint (x, y) de cada veículo em cada percurso, (N, P, 2); NaN onde o veículo já foi contado."""
+        targets = np.full((len(tracked_results), len(self.paths), 2), np.nan)
+        for row, result in enumerate(tracked_results):
+            obj_id = int(result[4])
+            progress_dict = self.vehicle_path_progress.get(obj_id, {})
+            for col, path in enumerate(self.paths.values()):
+                if obj_id not in path.processed_ids:
+                    targets[row, col] = path.points[progress_dict.get(path.name, 0)]
+        return targets
+
+    def checkpoint_progress(self):
+        """Maior número de checkpoints alcançados por algum veículo em cada percurso (lido do índice incremental)."""
+        return {name: next((level for level in range(len(counts) - 1, 0, -1) if counts[level]), 0)
+                for name, counts in self.progress_counts.items()}
+
+class VectorizedPathCounter:
+    """Contagem vetorizada: mesmo critério de PathZone.process_vehicle, com todo o estado em arrays NumPy.
+
+    Os checkpoints de todos os percursos ficam em um único array, e o progresso de cada veículo
+    em cada percurso fica em uma matriz indexada pelo slot do veículo. A cada frame, todos os
+    pares veículo/percurso são avançados com um único teste de ponto-na-caixa.
+
+    Slots de veículos que sumiram sem nenhuma contagem são liberados na hora; com counted_id_ttl,
+    os de veículos contados são liberados (e o ID sai de PathZone.processed_ids) depois de
+    counted_id_ttl frames sem aparecer, então o número de slots se estabiliza. Como em
+    PathZoneCounter, a expiração não garante que um ID nunca seja contado de novo.
+    """
+    def __init__(self, paths, initial_slots=64, counted_id_ttl=None):
+        self.paths = paths
+        self.counted_id_ttl = counted_id_ttl
+        self.frame_index = 0
+        self.path_names = list(paths.keys())
+        lengths = np.array([path.total_checkpoints for path in paths.values()], dtype=np.int64)
+        self.path_lengths = lengths
+        self.path_starts = np.concatenate(([0], np.cumsum(lengths)[:-1])).astype(np.int64)
+        self.checkpoints = np.concatenate([path.points for path in paths.values()] or [np.empty((0, 2))]).astype(np.int64)
+
+        n_paths = len(self.path_names)
+        self.slot_ids = np.full(initial_slots, -1, dtype=np.int64) # ID do veículo em cada slot (-1 = livre)
+        self.progress = np.zeros((initial_slots, n_paths), dtype=np.int64) # Próximo checkpoint de cada veículo/percurso
+        self.completed = np.zeros((initial_slots, n_paths), dtype=bool) # Veículo já contado no percurso
+        self.present = np.zeros(initial_slots, dtype=bool) # Veículo presente no último frame
+        self.last_seen = np.zeros(initial_slots, dtype=np.int64) # Último frame em que o veículo do slot apareceu
+        # Índice incremental: quantos veículos presentes estão em cada nível de progresso de cada percurso
+        self.progress_histogram = np.zeros((n_paths, int(lengths.max(initial=1)) + 1), dtype=np.int64)
+        self.path_columns = np.arange(n_paths)
+
+    def _grow(self, min_slots):
+        n_slots = max(min_slots, 2 * len(self.slot_ids))
+        extra = n_slots - len(self.slot_ids)
+        self.slot_ids = np.concatenate((self.slot_ids, np.full(extra, -1, dtype=np.int64)))
+        self.progress = np.concatenate((self.progress, np.zeros((extra, self.progress.shape[1]), dtype=np.int64)))
+        self.completed = np.concatenate((self.completed, np.zeros((extra, self.completed.shape[1]), dtype=bool)))
+        self.present = np.concatenate((self.present, np.zeros(extra, dtype=bool)))
+        self.last_seen = np.concatenate((self.last_seen, np.zeros(extra, dtype=np.int64)))
+
+    def _find_slots(self, obj_ids):
+        """Retorna o slot de cada ID (-1 para IDs sem slot)."""
+        used = np.flatnonzero(self.slot_ids >= 0)
+        order = used[np.argsort(self.slot_ids[used])]
+        sorted_ids = self.slot_ids[order]
+        slots = np.full(len(obj_ids), -1, dtype=np.int64)
+        if len(sorted_ids):
+            pos = np.minimum(np.searchsorted(sorted_ids, obj_ids), len(sorted_ids) - 1)
+            found = sorted_ids[pos] == obj_ids
+            slots[found] = order[pos[found]]
+        return slots
+
+    def _slots_for(self, obj_ids):
+        """Retorna o slot de cada ID, alocando slots livres para IDs novos."""
+        slots = self._find_slots(obj_ids)
+        new = np.flatnonzero(slots < 0)
+        if len(new):
+            free = np.flatnonzero(self.slot_ids < 0)
+            if len(free) < len(new):
+                self._grow(len(self.slot_ids) + len(new) - len(free))
+                free = np.flatnonzero(self.slot_ids < 0)
+            slots[new] = free[:len(new)]
+            self.slot_ids[slots[new]] = obj_ids[new]
+        return slots
+
+    def update(self, tracked_results):
+        """Processa os veículos rastreados em um frame e retorna os eventos (obj_id, nome do percurso) concluídos."""
+        results = np.asarray(tracked_results).reshape(-1, 5).astype(np.int64)
+        boxes, obj_ids = results[:, :4], results[:, 4]
+        slots = self._slots_for(obj_ids)
+
+        # Veículos que sumiram perdem o progresso; slots sem nenhuma contagem são liberados
+        present = np.zeros(len(self.slot_ids), dtype=bool)
+        present[slots] = True
+        gone = self.present & ~present
+        self._index_progress(self.progress[gone], -1)
+        self.progress[gone] = 0
+        self.slot_ids[gone & ~self.completed.any(axis=1)] = -1
+        self.progress_histogram[:, 0] += np.count_nonzero(present & ~self.present)
+        self.present = present
+        self.frame_index += 1
+        self.last_seen[slots] = self.frame_index
+        if self.counted_id_ttl is not None:
+            self._evict_counted()
+        if len(slots) == 0 or len(self.path_names) == 0:
+            return []
+
+        # Checkpoint alvo de cada par veículo/percurso: (N, P, 2)
+        progress = self.progress[slots]
+        target = self.checkpoints[self.path_starts + progress]
+        px, py = target[..., 0], target[..., 1]
+        inside = ((boxes[:, None, 0] <= px) & (px <= boxes[:, None, 2]) &
+                  (boxes[:, None, 1] <= py) & (py <= boxes[:, None, 3]) & ~self.completed[slots])
+
+        old_progress = progress
+        progress = progress + inside
+        done = progress == self.path_lengths
+        progress[done] = 0
+        self.progress[slots] = progress
+        rows, cols = np.nonzero(progress != old_progress)
+        np.add.at(self.progress_histogram, (cols, old_progress[rows, cols]), -1)
+        np.add.at(self.progress_histogram, (cols, progress[rows, cols]), 1)
+        self.completed[slots] |= done
+
+        events = []
+        for row, col in zip(*np.nonzero(done)):
+            obj_id, path = int(obj_ids[row]), self.paths[self.path_names[col]]
+            path.counter += 1
+            path.processed_ids.add(obj_id)
+            path.current_color = path.counted_color
+            events.append((obj_id, path.name))
+        return events
+
+    def _evict_counted(self):
+        expired = (self.slot_ids >= 0) & ~self.present & (self.frame_index - self.last_seen > self.counted_id_ttl)
+        if not expired.any():
+            return
+        expired_ids = self.slot_ids[expired].tolist()
+        for path in self.paths.values():
+            path.processed_ids.difference_update(expired_ids)
+        self.completed[expired] = False
+        self.slot_ids[expired] = -1
+
+    def stats(self):
+        """Tamanho das estruturas da contagem."""
+        return {
+            'slots': len(self.slot_ids),
+            'slots_used': int(np.count_nonzero(self.slot_ids >= 0)),
+            'counted_ids': sum(len(path.processed_ids) for path in self.paths.values()),
+        }
+
+    def _index_progress(self, progress_rows, sign):
+        """Soma (sign=1) ou remove (sign=-1) linhas de progresso do índice por percurso."""
+        columns = np.broadcast_to(self.path_columns, progress_rows.shape)
+        np.add.at(self.progress_histogram, (columns.ravel(), progress_rows.ravel()), sign)
+
+    def next_checkpoints(self, tracked_results):
+        """Próximo checkpoint (x, y) de cada veículo em cada percurso, (N, P, 2); NaN onde o veículo já foi contado."""
+        obj_ids = np.asarray(tracked_results).reshape(-1, 5)[:, 4].astype(np.int64)
+        slots = self._find_slots(obj_ids)
+        known = slots >= 0
+        progress = np.zeros((len(obj_ids), len(self.path_names)), dtype=np.int64)
+        completed = np.zeros(progress.shape, dtype=bool)
+        progress[known] = self.progress[slots[known]]
+        completed[known] = self.completed[slots[known]]
+        targets = self.checkpoints[self.path_starts + progress].astype(float)
+        targets[completed] = np.nan
+        return targets
+
+    def checkpoint_progress(self):
+        """Maior número de checkpoints alcançados por algum veículo em cada percurso (lido do índice incremental)."""
+        reached = self.progress_histogram[:, 1:] > 0
+        progress = np.where(reached.any(axis=1), reached.shape[1] - np.argmax(reached[:, ::-1], axis=1), 0)
+        return dict(zip(self.path_names, progress.tolist()))
+
+def create_counter(paths, engine='pathzone', counted_id_ttl=None, max_age=None):
+    """Cria o contador de percursos: 'pathzone' (original) ou 'vectorized'.
+
+    max_age é o máximo de frames em que o rastreador mantém um veículo sem detecção; com ele,
+    counted_id_ttl precisa ser maior, senão um ID contado seria esquecido enquanto o rastro ainda existe.
+    """
+    if counted_id_ttl is not None and max_age is not None and counted_id_ttl <= max_age:
+        raise ValueError(f"counted_id_ttl ({counted_id_ttl}) precisa ser maior que o max_age do rastreador ({max_age} frames).")
+    if engine == 'vectorized':
+        return VectorizedPathCounter(paths, counted_id_ttl=counted_id_ttl)
+    if engine == 'pathzone':
+        return PathZoneCounter(paths, counted_id_ttl)
+    raise ValueError(f"Motor de contagem desconhecido: '{engine}'")
@@ -0,0 +1,111 @@
+import cv2
+import numpy as np
+
+CHECKPOINT_COLOR = (0, 0, 255) # Vermelho (padrão)
+REACHED_COLOR = (0, 255, 0) # Verde (concluído)
+
+class OverlayLayer:
+    """Camada de desenho em cache com máscara de cobertura (0-255), composta sobre os frames.
+
+    Os desenhos são feitos sobre fundo preto, então a camada guarda a cor já multiplicada pela
+    cobertura e a composição é layer + frame * (1 - mask). Pixels totalmente cobertos são
+    copiados de uma vez; só as bordas suavizadas (rótulos desenhados com LINE_AA) são misturadas
+    pixel a pixel.
+    """
+    def __init__(self, frame_shape):
+        self.image = np.zeros(frame_shape, dtype=np.uint8)
+        self.mask = np.zeros(frame_shape[:2], dtype=np.uint8)
+        self._dirty = True
+
+    def changed(self):
+        self._dirty = True
+
+    def _prepare(self):
+        # Tudo é feito só dentro do retângulo que contém os desenhos
+        x, y, w, h = cv2.boundingRect(self.mask)
+        self._roi = (slice(y, y + h), slice(x, x + w))
+        mask, image = self.mask[self._roi], self.image[self._roi]
+        self._opaque = np.where(mask == 255, 255, 0).astype(np.uint8)
+        self._partial = np.nonzero((mask > 0) & (mask < 255))
+        self._partial_image = image[self._partial].astype(np.uint16)
+        self._partial_weight = (255 - mask[self._partial]).astype(np.uint16)[:, None]
+        self._dirty = False
+
+    def composite(self, frame):
+        if self._dirty:
+            self._prepare()
+        roi = frame[self._roi]
+        if roi.size == 0:
+            return frame
+        cv2.copyTo(self.image[self._roi], self._opaque, roi)
+        if len(self._partial[0]):
+            blended = self._partial_image + (roi[self._partial] * self._partial_weight + 127) // 255
+            roi[self._partial] = np.minimum(blended, 255)
+        return frame
+
+class PathRenderer:
+    """Desenha os percursos e os contadores a partir de camadas em cache.
+
+    A geometria dos percursos (linhas e checkpoints) é desenhada uma única vez em uma camada, os
+    rótulos dos checkpoints (estáticos) em outra e os contadores em uma terceira; a cada frame,
+    cada camada é composta sobre o frame. Só são redesenhados os checkpoints que mudaram de
+    estado, e os contadores só quando algum valor muda.
+    """
+    def __init__(self, paths, frame_shape):
+        self.paths = paths
+        self.path_layer = OverlayLayer(frame_shape)
+        self.label_layer = OverlayLayer(frame_shape)
+        self.hud_layer = OverlayLayer(frame_shape)
+        self.reached = {name: 0 for name in paths}
+        self.counters = {}
+
+        for path in paths.values():
+            cv2.polylines(self.path_layer.image, [path.points], isClosed=False, color=path.normal_color, thickness=1)
+            cv2.polylines(self.path_layer.mask, [path.points], isClosed=False, color=255, thickness=1)
+            for i, (x, y) in enumerate(path.points.tolist()):
+                self._draw_checkpoint(path, i, CHECKPOINT_COLOR)
+                # Rótulos suavizados (LINE_AA): as bordas parcialmente cobertas são misturadas com o frame
+                cv2.putText(self.label_layer.image, str(i+1), (x+5, y-5), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255,255,255), 1, cv2.LINE_AA)
+                cv2.putText(self.label_layer.mask, str(i+1), (x+5, y-5), cv2.FONT_HERSHEY_SIMPLEX, 0.5, 255, 1, cv2.LINE_AA)
+
+    def _draw_checkpoint(self, path, i, color):
+        layer = self.path_layer
+        point = tuple(path.points[i].tolist())
+        cv2.circle(layer.image, point, 7, color, -1)
+        # O círculo é opaco e sua área na máscara não muda: a camada não precisa ser preparada de novo
+        cv2.circle(layer.mask, point, 7, 255, -1)
+
+    def _draw_counters(self, counters):
+        import cvzone
+        # As caixas dos contadores se sobrepõem, então a camada inteira é refeita quando algum muda
+        layer = self.hud_layer
+        layer.image[:] = 0
+        layer.mask[:] = 0
+        height, width = layer.mask.shape
+        y_offset = 40
+        for path in self.paths.values():
+            _, (x1, y1, x2, y2) = cvzone.putTextRect(layer.image, f'Percurso {path.name}: {counters[path.name]}', (30, y_offset), 2, 1, border=1, colorR=path.normal_color)
+            layer.mask[max(y1, 0):min(y2, height - 1)+1, max(x1, 0):min(x2, width - 1)+1] = 255
+            y_offset += 40
+        layer.changed()
+
+    def update(self, checkpoint_progress, counters):
+        """Redesenha nas camadas apenas o que mudou desde o último frame."""
+        for path in self.paths.values():
+            old, new = self.reached[path.name], checkpoint_progress[path.name]
+            if new != old:
+                for i in range(min(old, new), max(old, new)):
+                    self._draw_checkpoint(path, i, REACHED_COLOR if new > i else CHECKPOINT_COLOR)
+                self.reached[path.name] = new
+
+        if counters != self.counters:
+            self._draw_counters(counters)
+            self.counters = dict(counters)
+
+    def draw(self, frame, checkpoint_progress, counters):
+        """Atualiza as camadas e as compõe sobre o frame."""
+        self.update(checkpoint_progress, counters)
+        self.path_layer.composite(frame)
+        self.label_layer.composite(frame)
+        self.hud_layer.composite(frame)
+        return frame
@@ -0,0 +1,236 @@
+import queue
+import threading
+import time
+import cv2
+from .memory_stats import print_memory_stats
+from .path_renderer import PathRenderer
+from .frame_pool import open_frame_reader
+from .process_video import WINDOW_NAME, count_vehicles, create_path_counter, detect_batch, long_running_config, path_counters
+
+# Profundidade padrão das filas entre os estágios (saída de cada estágio)
+DEFAULT_QUEUE_SIZES = {'decode': 4, 'detect': 4, 'count': 4}
+
+_END = object() # Marca o fim do fluxo de frames
+
+class PipelineStage(threading.Thread):
+    """Thread de um estágio: consome itens da fila de entrada e publica o resultado na fila de saída.
+
+    Cada estágio roda em uma única thread e as filas são FIFO, então a ordem dos frames é
+    preservada. As filas são limitadas: um estágio rápido bloqueia até o próximo liberar espaço.
+    """
+    def __init__(self, name, func, in_queue, out_queue, stop_event):
+        super().__init__(name=name, daemon=True)
+        self.func = func
+        self.in_queue = in_queue
+        self.out_queue = out_queue
+        self.stop_event = stop_event
+        self.error = None
+
+    def put(self, item):
+        """Publica um item na fila de saída, desistindo se o pipeline for interrompido."""
+        while not self.stop_event.is_set():
+            try:
+                self.out_queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def get(self):
+        """Lê o próximo item da fila de entrada, ou _END se o pipeline for interrompido."""
+        while not self.stop_event.is_set():
+            try:
+                return self.in_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _END
+
+    def items(self):
+        while True:
+            item = self.get()
+            if item is _END:
+                return
+            yield item
+
+    def run(self):
+        try:
+            for item in self.items():
+                if not self.put(self.func(item)):
+                    break
+        except Exception as e:
+            self.error = e
+            self.stop_event.set()
+        finally:
+            self.put(_END)
+
+class BatchStage(PipelineStage):
+    """Estágio que consome os itens em lotes de até batch_size e publica um resultado por item.
+
+    func recebe a lista de itens e retorna a lista de resultados na mesma ordem. O lote espera
+    até ter batch_size itens; só o último, no fim do fluxo, pode ser menor.
+    """
+    def __init__(self, name, func, in_queue, out_queue, stop_event, batch_size):
+        super().__init__(name, func, in_queue, out_queue, stop_event)
+        self.batch_size = max(batch_size, 1)
+
+    def batches(self):
+        batch = []
+        for item in self.items():
+            batch.append(item)
+            if len(batch) == self.batch_size:
+                yield batch
+                batch = []
+        if batch and not self.stop_event.is_set():
+            yield batch
+
+    def run(self):
+        try:
+            for batch in self.batches():
+                if not all(self.put(result) for result in self.func(batch)):
+                    break
+        except Exception as e:
+            self.error = e
+            self.stop_event.set()
+        finally:
+            self.put(_END)
+
+class DecodeStage(PipelineStage):
+    """Estágio de origem: lê e redimensiona os frames do vídeo.
+
+    Com reader (open_frame_reader), os frames já saem redimensionados nos buffers do pool.
+    """
+    def __init__(self, cap, target_w, target_h, out_queue, stop_event, profiler=None, reader=None):
+        super().__init__('decode', self.resize, None, out_queue, stop_event)
+        self.cap = cap
+        self.target_size = (target_w, target_h)
+        self.profiler = profiler
+        self.reader = reader
+
+    def read(self):
+        """Próximo frame da captura, ou None no fim do vídeo."""
+        if self.reader is not None:
+            return self.reader.read(self.profiler)
+        start = time.perf_counter()
+        ret, frame = self.cap.read()
+        if not ret:
+            return None
+        if self.profiler is not None:
+            self.profiler.since('decode', start)
+        return frame
+
+    def items(self):
+        frame_index = 0
+        while not self.stop_event.is_set():
+            frame = self.read()
+            if frame is None:
+                print("Fim do vídeo ou erro de leitura.")
+                return
+            yield frame_index, frame
+            frame_index += 1
+
+    def resize(self, item):
+        if self.reader is not None:
+            return item
+        frame_index, frame = item
+        start = time.perf_counter()
+        frame = cv2.resize(frame, self.target_size)
+        if self.profiler is not None:
+            self.profiler.since('resize', start)
+        return frame_index, frame
+
+def run_pipeline(config, cap, tracker, paths, target_w, target_h, cache=None, sink=None, profiler=None, trajectories=None):
+    """Processa o vídeo em estágios paralelos: decodificação, detecção, rastreamento+contagem e renderização.
+
+    A detecção roda em lotes de config['batch_size'] frames, como no modo serial. A renderização
+    roda na thread principal (exigência do cv2.imshow). O rastreador e os
+    percursos são acessados apenas pelo estágio de contagem, que repassa cópias do progresso
+    nos checkpoints e dos contadores para a renderização.
+    """
+    queue_sizes = dict(DEFAULT_QUEUE_SIZES, **config.get('pipeline', {}).get('queue_sizes', {}))
+    draw_detections = config.get('draw_detections', True)
+    display = config.get('display', True)
+    stop_event = threading.Event()
+    decoded = queue.Queue(maxsize=queue_sizes['decode'])
+    detected = queue.Queue(maxsize=queue_sizes['detect'])
+    counted = queue.Queue(maxsize=queue_sizes['count'])
+    counter = create_path_counter(config, paths)
+    stats_interval = long_running_config(config).get('stats_interval', 0)
+    batch_size = max(config.get('batch_size', 1), 1)
+
+    def detect(batch):
+        # Os frames de um lote são consecutivos (as filas são FIFO)
+        frames = [frame for _, frame in batch]
+        if batch_size <= 1 and cache is None:
+            detections = [tracker.detect(frames[0])]
+        else:
+            detections = detect_batch(tracker, cache, batch[0][0], frames)
+        return [(frame_index, frame, frame_detections) for (frame_index, frame), frame_detections in zip(batch, detections)]
+
+    def track_and_count(item):
+        frame_index, frame, detections = item
+        tracked_results = tracker.tracker.update(detections)
+        start = time.perf_counter()
+        count_vehicles(tracked_results, counter, sink, frame_index)
+        if profiler is not None:
+            profiler.since('count', start)
+            profiler.observe(frame_index, tracker.tracker, paths, decode=decoded, detect=detected, count=counted)
+        if sink is not None:
+            sink.frame_done(frame_index, lambda: path_counters(paths))
+        if trajectories is not None:
+            trajectories.append(frame_index, tracked_results)
+        if stats_interval and (frame_index + 1) % stats_interval == 0:
+            print_memory_stats(frame_index + 1, tracker.tracker, counter)
+        return frame_index, frame, detections, counter.checkpoint_progress(), path_counters(paths)
+
+    # Frames em uso ao mesmo tempo: os das filas, um lote na detecção e um em cada outro estágio e na renderização
+    reader = open_frame_reader(config, cap, target_w, target_h, sum(queue_sizes.values()) + batch_size + 3)
+    stages = [
+        DecodeStage(cap, target_w, target_h, decoded, stop_event, profiler, reader),
+        BatchStage('detect', detect, decoded, detected, stop_event, batch_size),
+        PipelineStage('count', track_and_count, detected, counted, stop_event),
+    ]
+    for stage in stages:
+        stage.start()
+
+    renderer = None
+    try:
+        while True:
+            try:
+                item = counted.get(timeout=0.1)
+            except queue.Empty:
+                if stop_event.is_set():
+                    break
+                continue
+            if item is _END:
+                break
+            frame_index, frame, detections, checkpoint_progress, counters = item
+            if not display:
+                continue
+            start = time.perf_counter()
+            if draw_detections:
+                tracker.draw_detections(frame, detections)
+            if renderer is None:
+                renderer = PathRenderer(paths, frame.shape)
+            renderer.draw(frame, checkpoint_progress, counters)
+            if profiler is not None:
+                start = profiler.since('draw', start)
+
+            cv2.imshow(WINDOW_NAME, frame)
+            key = cv2.waitKey(1) & 0xFF
+            if profiler is not None:
+                profiler.since('display', start)
+            if key == ord('q'):
+                break
+    finally:
+        stop_event.set()
+        for stage in stages:
+            stage.join()
+        cap.release()
+        if reader is not None:
+            reader.release()
+        if display:
+            cv2.destroyAllWindows()
+
+    for stage in stages:
+        if stage.error is not None:
+            raise stage.error
@@ -1,63 +1,340 @@
+import time
 import cv2
-import cvzone
 from .vehicle_tracker import VehicleTracker
 from .path_zone import PathZone
+from .path_counter import create_counter
+from .memory_stats import print_memory_stats
+from .path_renderer import PathRenderer
+from .adaptive_stride import CountReference, create_stride
+from .motion_gate import create_motion_gate
+from .live_ingest import live_frames, open_live_source
+from .event_sink import open_event_sink
+from .profiler import create_profiler
+from .frame_pool import open_frame_reader
+from .trajectory_store import open_trajectory_writer
+from .sort import Sort
 
-def process_video(config, defined_paths_coords, target_w, target_h):
-    """Loop principal que processa o vídeo frame a frame."""
-    cap = cv2.VideoCapture(config['video_path'])
-    if not cap.isOpened():
-        print(f"Erro ao abrir o vídeo: {config['video_path']}")
-        return
+WINDOW_NAME = 'Contagem por Cobertura de Percurso'
 
-    # Inicializa o rastreador
-    tracker = VehicleTracker(config['model_path'], config['classes_path'], config['target_classes'], config['confidence_threshold'], config['tracker'])
-    
-    # Inicializa os percursos
+def create_paths(defined_paths_coords):
+    """Cria um PathZone para cada percurso definido, nomeados 'A', 'B', ..."""
     paths = {}
     zone_colors = [((0,255,0),(0,255,255)), ((255,0,0),(255,255,0)), ((255,0,255),(0,0,255)), ((255,165,0),(255,215,0))]
     for i, path_points in enumerate(defined_paths_coords):
         path_name = chr(ord('A') + i)
         normal_color, counted_color = zone_colors[i % len(zone_colors)]
         paths[path_name] = PathZone(path_name, path_points, normal_color, counted_color)
+    return paths
+
+# Opções implementadas só pelo laço serial (run_serial); os outros modos as ignorariam
+SERIAL_ONLY = ('live', 'adaptive_stride', 'motion_gate')
+
+def serial_only_options(config):
+    """Opções de SERIAL_ONLY habilitadas em config."""
+    return [option for option in SERIAL_ONLY if config.get(option, {}).get('enabled', False)]
+
+def long_running_config(config):
+    """Opções do modo de longa duração (config['long_running']), ou {} se desabilitado."""
+    long_running = config.get('long_running', {})
+    return long_running if long_running.get('enabled', False) else {}
+
+def tracker_params(config):
+    """Parâmetros do SORT, com o histórico limitado no modo de longa duração."""
+    params = dict(config['tracker'])
+    if 'max_history' in long_running_config(config):
+        params['max_history'] = long_running_config(config)['max_history']
+    return params
+
+def detector_params(config):
+    """Backend de detecção configurado, com o vídeo usado para calibrar a quantização INT8."""
+    return dict(config.get('detector', {}), calibration_video=config['video_path'])
 
-    vehicle_path_progress = {}
+def create_path_counter(config, paths):
+    """Cria o contador de percursos configurado, com a expiração de IDs contados do modo de longa duração."""
+    # Com a detecção adaptativa, max_age conta keyframes: um rastro dura até max_age * max_stride frames sem detecção
+    max_age = config['tracker'].get('max_age', 1)
+    stride_config = config.get('adaptive_stride', {})
+    if stride_config.get('enabled', False):
+        max_age *= max(stride_config.get('max_stride', 4), 1)
+    return create_counter(paths, config.get('counting_engine', 'pathzone'), long_running_config(config).get('counted_id_ttl'), max_age)
 
+def count_vehicles(tracked_results, counter, sink=None, frame_index=None, stream=None):
+    """Avança o progresso dos veículos rastreados em cada percurso e contabiliza os concluídos.
+
+    Com sink, cada conclusão vira um evento do EventSink (gravado em segundo plano) em vez de
+    uma linha no terminal.
+    """
+    events = counter.update(tracked_results)
+    if sink is None:
+        for obj_id, path_name in events:
+            print(f"Veículo ID {obj_id} completou o percurso '{path_name}'!")
+        return
+    if events:
+        boxes = {int(result[4]): result[:4] for result in tracked_results}
+        for obj_id, path_name in events:
+            sink.count(frame_index, obj_id, path_name, boxes[obj_id], stream)
+
+def path_counters(paths):
+    return {name: path.counter for name, path in paths.items()}
+
+def print_final_counts(paths):
+    print("\n--- Contagem Final ---")
+    for path in paths.values(): print(f"Total no Percurso {path.name}: {path.counter}")
+
+def working_resolution(frame, output_resolution):
+    """Dimensões de trabalho (largura, altura) que cabem em output_resolution mantendo a proporção do frame."""
+    max_w, max_h = output_resolution
+    h_orig, w_orig = frame.shape[:2]
+    ratio = min(max_w / w_orig, max_h / h_orig)
+    return int(w_orig * ratio), int(h_orig * ratio)
+
+def read_frames(cap, target_w, target_h, profiler=None, reader=None):
+    """Lê e redimensiona os frames do vídeo até o fim.
+
+    Com reader (open_frame_reader), os frames vêm já redimensionados em buffers reutilizados do pool.
+    """
+    while reader is not None:
+        frame = reader.read(profiler)
+        if frame is None:
+            print("Fim do vídeo ou erro de leitura.")
+            return
+        yield frame
     while True:
+        start = time.perf_counter()
         ret, frame = cap.read()
         if not ret:
             print("Fim do vídeo ou erro de leitura.")
-            break
-        
-        frame_resized = cv2.resize(frame, (target_w, target_h))
-        
-        tracked_results = tracker.track_vehicles(frame_resized)
-        
-        current_tracked_ids = set()
-        for result in tracked_results:
-            x1, y1, x2, y2, obj_id = map(int, result)
-            current_tracked_ids.add(obj_id)
-            for path in paths.values():
-                if path.process_vehicle(obj_id, (x1, y1, x2, y2), vehicle_path_progress):
-                    print(f"Veículo ID {obj_id} completou o percurso '{path.name}'!")
-
-        # Limpeza do progresso de veículos que sumiram
-        ids_to_remove = set(vehicle_path_progress.keys()) - current_tracked_ids
-        for old_id in ids_to_remove:
-            del vehicle_path_progress[old_id]
+            return
+        if profiler is None:
+            yield cv2.resize(frame, (target_w, target_h))
+            continue
+        start = profiler.since('decode', start)
+        frame = cv2.resize(frame, (target_w, target_h))
+        profiler.since('resize', start)
+        yield frame
+
+def open_detection_cache(config, target_w, target_h, rois=None):
+    """Abre o cache de detecções configurado em config['detection_cache'], se habilitado."""
+    cache_config = config.get('detection_cache', {})
+    if not cache_config.get('enabled', False):
+        return None
+    from .detection_cache import DetectionCache
+    return DetectionCache(cache_config.get('dir', './data/cache'), config['video_path'], config['model_path'],
+                          (target_w, target_h), cache_config.get('min_confidence', 0.05), rois, config.get('detector'),
+                          cache_config.get('flush_frames', 1000))
+
+def detect_cached(tracker, cache, first_index, frames):
+    """Detecta um lote de frames consecutivos, repetindo do cache os que já foram processados.
+
+    O cache guarda as detecções brutas; o filtro de classe e confiança é aplicado na leitura.
+    """
+    raw = {}
+    missing = [i for i in range(len(frames)) if first_index + i not in cache]
+    if missing:
+        for i, raw_detections in zip(missing, tracker.detect_raw([frames[i] for i in missing], cache.min_confidence)):
+            raw[i] = raw_detections
+            cache.put(first_index + i, *raw_detections)
+    return [tracker.filter_detections(*(raw[i] if i in raw else cache.get(first_index + i))) for i in range(len(frames))]
+
+def detect_batch(tracker, cache, first_index, frames):
+    """Detecta um lote de frames consecutivos, usando o cache quando habilitado."""
+    if cache is None:
+        return tracker.detect_batch(frames)
+    return detect_cached(tracker, cache, first_index, frames)
+
+def detect_frames(frames, tracker, batch_size=1, cache=None):
+    """Gera pares (frame, detecções) na ordem original, rodando o YOLO em lotes de batch_size frames."""
+    if batch_size <= 1 and cache is None:
+        for frame in frames:
+            yield frame, tracker.detect(frame)
+        return
+    batch_size = max(batch_size, 1)
+    frame_index = 0
+    batch = []
+    for frame in frames:
+        batch.append(frame)
+        if len(batch) == batch_size:
+            yield from zip(batch, detect_batch(tracker, cache, frame_index, batch))
+            frame_index += len(batch)
+            batch = []
+    if batch:
+        yield from zip(batch, detect_batch(tracker, cache, frame_index, batch))
+
+def detect_keyframes(frames, tracker, stride=None, gate=None):
+    """Gera pares (frame, detecções) frame a frame, com a detecção adaptativa e o filtro de movimento.
+
+    Com stride, o YOLO só roda nos keyframes e detecções é None nos demais. Com gate, cada frame
+    detectado passa antes pelo filtro de movimento. Frames None (descartados da fonte ao vivo)
+    geram (None, None). O cache de detecções não é usado: os frames sem YOLO interromperiam a
+    gravação, que só aceita frames consecutivos.
+    """
+    for frame in frames:
+        if frame is None:
+            # Frame descartado da fonte ao vivo: o rastreador só avança as predições
+            yield None, None
+        elif stride is not None and not stride.keyframe():
+            yield frame, None
+        elif gate is not None:
+            yield frame, gate.detect(tracker, frame)
+        else:
+            yield frame, tracker.detect(frame)
+
+def process_video(config, defined_paths_coords, target_w, target_h):
+    """Loop principal que processa o vídeo frame a frame; retorna a contagem final de cada percurso."""
+    for option in serial_only_options(config):
+        for mode in ('pipeline', 'segments'):
+            if config.get(mode, {}).get('enabled', False):
+                raise ValueError(f"'{option}' só funciona no modo serial; desabilite '{mode}'.")
+    cap = cv2.VideoCapture(config['video_path'])
+    if not cap.isOpened():
+        print(f"Erro ao abrir o vídeo: {config['video_path']}")
+        return None
+
+    # Inicializa o rastreador
+    tracker = VehicleTracker(config['model_path'], config['classes_path'], config['target_classes'], config['confidence_threshold'], tracker_params(config), detector_params(config))
+
+    # Inicializa os percursos
+    paths = create_paths(defined_paths_coords)
+
+    # Detecção só nas regiões que cobrem os percursos
+    roi_config = config.get('roi', {})
+    if roi_config.get('enabled', False):
+        from .roi import crop_imgsz, crop_rects
+        rects = crop_rects(defined_paths_coords, target_w, target_h, roi_config.get('margin', 60))
+        tracker.set_rois(rects, crop_imgsz(rects, target_w, target_h, roi_config.get('imgsz', 640)))
+        backend = config.get('detector', {}).get('backend', 'ultralytics')
+        if backend in ('onnxruntime', 'openvino'):
+            # O modelo exportado tem entrada fixa: o imgsz por recorte não se aplica
+            imgsz = config['detector'].get('imgsz', 640)
+            print(f"Aviso: com o backend '{backend}', cada recorte de ROI roda em uma inferência própria na entrada fixa de "
+                  f"{imgsz}x{imgsz} (recortes menores são ampliados); as ROIs podem deixar a detecção mais lenta que o frame inteiro.")
+
+    # Detecções já calculadas para este vídeo/modelo/resolução são lidas do cache em vez de rodar o YOLO
+    cache = open_detection_cache(config, target_w, target_h, tracker.rois)
+    sink = open_event_sink(config)
+    # Saídas do rastreador gravadas para recontar outras definições de percursos sem reprocessar o vídeo
+    trajectories = open_trajectory_writer(config, target_w, target_h)
+    # Os processos do modo em segmentos não são medidos: cada um tem o seu próprio rastreador
+    profiler = None if config.get('segments', {}).get('enabled', False) else create_profiler(config)
+    tracker.profiler = tracker.tracker.profiler = profiler
+
+    try:
+        if config.get('segments', {}).get('enabled', False):
+            from .segments import run_segments
+            # Cada segmento abre a sua própria captura
+            cap.release()
+            run_segments(config, paths, target_w, target_h, tracker.rois, tracker.roi_imgsz, sink, trajectories)
+        elif config.get('pipeline', {}).get('enabled', False):
+            from .pipeline import run_pipeline
+            run_pipeline(config, cap, tracker, paths, target_w, target_h, cache, sink, profiler, trajectories)
+        else:
+            run_serial(config, cap, tracker, paths, target_w, target_h, cache, sink, profiler, trajectories)
+    finally:
+        if profiler is not None:
+            profiler.close()
+        if cache is not None:
+            cache.close()
+        if sink is not None:
+            sink.aggregate(None, path_counters(paths))
+            sink.close()
+        if trajectories is not None:
+            trajectories.close()
+    print_final_counts(paths)
+    if sink is not None:
+        sink.print_summary()
+    return path_counters(paths)
+
+def run_serial(config, cap, tracker, paths, target_w, target_h, cache=None, sink=None, profiler=None, trajectories=None):
+    """Processa o vídeo frame a frame em uma única thread."""
+    counter = create_path_counter(config, paths)
+    stats_interval = long_running_config(config).get('stats_interval', 0)
+    display = config.get('display', True)
+    renderer = None
+    stride = create_stride(config)
+    gate = create_motion_gate(config, paths, target_w, target_h)
+    reference = None
+    if stride is not None and config['adaptive_stride'].get('compare_counts', False):
+        reference_paths = create_paths([path.points.tolist() for path in paths.values()])
+        reference = CountReference(Sort(**tracker_params(config)), reference_paths, create_path_counter(config, reference_paths))
+    if cache is not None and (stride is not None or gate is not None):
+        print("Cache de detecções desativado: não é usado com a detecção adaptativa nem com o filtro de movimento.")
+        cache = None
+
+    # Com batch_size > 1, os frames são lidos antecipadamente e detectados em lotes (modo offline);
+    # o SORT continua recebendo as detecções frame a frame, na ordem.
+    # A detecção adaptativa e o filtro de movimento dependem do rastreamento do frame anterior,
+    # então detectam frame a frame e batch_size é ignorado.
+    # Ao vivo, os frames vêm da thread da LiveSource (sem o cache de detecções).
+    live = open_live_source(config, cap)
+    reader = None
+    if live is None:
+        # O lote da detecção é o máximo de frames em uso ao mesmo tempo
+        reader = open_frame_reader(config, cap, target_w, target_h, max(config.get('batch_size', 1), 1))
+        frames = read_frames(cap, target_w, target_h, profiler, reader)
+    else:
+        frames = live_frames(live, target_w, target_h, config['live'].get('max_coast', 10))
+        cache = None
+    if stride is None and gate is None and live is None:
+        detected_frames = detect_frames(frames, tracker, config.get('batch_size', 1), cache)
+    else:
+        detected_frames = detect_keyframes(frames, tracker, stride, gate)
+    for frame_index, (frame_resized, detections) in enumerate(detected_frames):
+        if reference is not None:
+            # A referência detecta o frame inteiro também nos frames pulados ou filtrados pelo movimento
+            reference.update(None if frame_resized is None else
+                             detections if detections is not None and gate is None else tracker.detect(frame_resized))
+        if detections is None:
+            tracked_results = tracker.coast_vehicles()
+        else:
+            tracked_results = tracker.track_vehicles(frame_resized, detections)
+        start = time.perf_counter()
+        count_vehicles(tracked_results, counter, sink, frame_index)
+        if profiler is not None:
+            profiler.since('count', start)
+            profiler.observe(frame_index, tracker.tracker, paths)
+        if sink is not None:
+            sink.frame_done(frame_index, lambda: path_counters(paths))
+        if trajectories is not None:
+            trajectories.append(frame_index, tracked_results)
+        if stride is not None:
+            stride.update(tracked_results, counter.next_checkpoints(tracked_results), tracker.tracker.unstable_count())
+        if stats_interval and (frame_index + 1) % stats_interval == 0:
+            print_memory_stats(frame_index + 1, tracker.tracker, counter)
+        if frame_resized is None:
+            continue
+        if live is not None:
+            live.record_latency(live.current[2])
+        if not display:
+            continue
 
         # Desenha as informações no frame
-        y_offset = 40
-        for path in paths.values():
-            path.draw(frame_resized, vehicle_path_progress)
-            cvzone.putTextRect(frame_resized, f'Percurso {path.name}: {path.counter}', (30, y_offset), 2, 1, border=1, colorR=path.normal_color)
-            y_offset += 40
-
-        cv2.imshow('Contagem por Cobertura de Percurso', frame_resized)
-        if cv2.waitKey(1) & 0xFF == ord('q'):
+        start = time.perf_counter()
+        if config.get('draw_detections', True):
+            tracker.draw_detections(frame_resized)
+        if renderer is None:
+            renderer = PathRenderer(paths, frame_resized.shape)
+        renderer.draw(frame_resized, counter.checkpoint_progress(), path_counters(paths))
+        if profiler is not None:
+            start = profiler.since('draw', start)
+
+        cv2.imshow(WINDOW_NAME, frame_resized)
+        key = cv2.waitKey(1) & 0xFF
+        if profiler is not None:
+            profiler.since('display', start)
+        if key == ord('q'):
             break
-            
+
     cap.release()
-    cv2.destroyAllWindows()
-    print("\n--- Contagem Final ---")
-    for path in paths.values(): print(f"Total no Percurso {path.name}: {path.counter}")
\ No newline at end of file
+    if reader is not None:
+        reader.release()
+    if live is not None:
+        live.stop()
+        live.print_summary()
+    if display:
+        cv2.destroyAllWindows()
+    if stride is not None:
+        stride.print_summary()
+    if reference is not None:
+        reference.print_summary(paths)
+    if gate is not None:
+        gate.print_summary()
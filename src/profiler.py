@@ -0,0 +1,149 @@
+import collections
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+
+# Estágios medidos, na ordem do resumo
+STAGES = ['decode', 'resize', 'inference', 'postprocess', 'sort_predict', 'sort_associate', 'sort_update', 'count', 'draw', 'display']
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+def _labels(labels):
+    if not labels:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for value in labels.values())
+    return '{' + ','.join(f'{name}="{value}"' for name, value in zip(labels, escaped)) + '}'
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = self.server.profiler.prometheus().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+class Profiler:
+    """Tempos por estágio em janelas deslizantes e medidores de filas, rastros e contadores.
+
+    Os estágios registram a duração de cada frame com since()/record(); em lotes, a duração é
+    dividida entre os frames. Os percentis são calculados sobre os últimos window frames de cada
+    estágio, só quando o resumo é impresso ou o endpoint é lido. Desabilitado, o profiler é None
+    e cada ponto de medição custa apenas essa verificação.
+
+    Com port, um servidor HTTP local publica as métricas em /metrics no formato texto do Prometheus.
+    """
+    def __init__(self, window=1000, summary_interval=0, port=None, host='127.0.0.1'):
+        self.window = window
+        self.summary_interval = summary_interval
+        self.lock = threading.Lock()
+        self.samples = {} # Estágio -> últimas durações (s)
+        self.totals = {} # Estágio -> [frames, soma das durações]
+        self.gauges = {} # (nome, rótulos) -> valor
+        self.frames = 0
+        self.server = None
+        if port is not None:
+            self.server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            self.server.daemon_threads = True
+            self.server.profiler = self
+            threading.Thread(target=self.server.serve_forever, name='metrics', daemon=True).start()
+            print(f"Métricas em http://{host}:{self.server.server_address[1]}/metrics")
+
+    def record(self, stage, seconds, n=1):
+        """Registra a duração por frame de um estágio em n frames."""
+        with self.lock:
+            if stage not in self.samples:
+                self.samples[stage] = collections.deque(maxlen=self.window)
+                self.totals[stage] = [0, 0.0]
+            self.samples[stage].extend([seconds] * n)
+            totals = self.totals[stage]
+            totals[0] += n
+            totals[1] += seconds * n
+
+    def since(self, stage, start, n=1):
+        """Registra o tempo desde start (time.perf_counter()) dividido entre n frames; retorna o instante atual."""
+        now = time.perf_counter()
+        self.record(stage, (now - start) / n, n)
+        return now
+
+    def set_gauge(self, name, value, **labels):
+        with self.lock:
+            self.gauges[(name, tuple(labels.items()))] = value
+
+    def observe(self, frame_index, sort, paths, stream=None, **queues):
+        """Atualiza os medidores de um frame processado (rastros ativos, contadores e filas) e imprime o resumo periódico."""
+        labels = {'stream': stream} if stream is not None else {}
+        self.set_gauge('active_tracks', sort.stats()['tracks'], **labels)
+        for name, path in paths.items():
+            self.set_gauge('path_count', path.counter, path=name, **labels)
+        for name, q in queues.items():
+            self.set_gauge('queue_depth', q.qsize(), queue=name, **labels)
+        with self.lock:
+            self.frames += 1
+            frames = self.frames
+        if self.summary_interval and frames % self.summary_interval == 0:
+            self.print_summary(f"frame {frame_index + 1}")
+
+    def percentiles(self):
+        """{estágio: (frames, média, p50, p95, p99, máximo)} em segundos, na janela de cada estágio."""
+        with self.lock:
+            snapshot = {stage: (np.array(samples), self.totals[stage][0]) for stage, samples in self.samples.items()}
+        order = [stage for stage in STAGES if stage in snapshot] + sorted(set(snapshot) - set(STAGES))
+        out = {}
+        for stage in order:
+            samples, count = snapshot[stage]
+            if len(samples) == 0:
+                continue
+            p50, p95, p99 = np.percentile(samples, [100 * q for q in QUANTILES])
+            out[stage] = (count, samples.mean(), p50, p95, p99, samples.max())
+        return out
+
+    def print_summary(self, label='final'):
+        print(f"\n--- Tempos por estágio ({label}; últimos {self.window} frames, ms) ---")
+        total = 0.0
+        for stage, (count, mean, p50, p95, p99, worst) in self.percentiles().items():
+            total += mean
+            print(f"{stage:<15} média {1000 * mean:7.2f}  p50 {1000 * p50:7.2f}  p95 {1000 * p95:7.2f}  "
+                  f"p99 {1000 * p99:7.2f}  máx {1000 * worst:7.2f}  ({count} frames)")
+        print(f"{'soma das médias':<15} {1000 * total:7.2f}")
+
+    def prometheus(self):
+        """Métricas no formato texto do Prometheus."""
+        lines = ['# HELP vehicle_stage_seconds Duração por frame de cada estágio (percentis na janela deslizante).',
+                 '# TYPE vehicle_stage_seconds summary']
+        with self.lock:
+            totals = {stage: tuple(values) for stage, values in self.totals.items()}
+            gauges = dict(self.gauges)
+        for stage, (count, _, p50, p95, p99, _) in self.percentiles().items():
+            for q, value in zip(QUANTILES, (p50, p95, p99)):
+                lines.append(f'vehicle_stage_seconds{_labels({"stage": stage, "quantile": q})} {value:.9f}')
+            lines.append(f'vehicle_stage_seconds_sum{_labels({"stage": stage})} {totals[stage][1]:.9f}')
+            lines.append(f'vehicle_stage_seconds_count{_labels({"stage": stage})} {count}')
+        for name in sorted({name for name, _ in gauges}):
+            lines.append(f'# TYPE vehicle_{name} gauge')
+            for (gauge, labels), value in gauges.items():
+                if gauge == name:
+                    lines.append(f'vehicle_{name}{_labels(dict(labels))} {value}')
+        return '\n'.join(lines) + '\n'
+
+    def close(self):
+        """Imprime o resumo final e encerra o endpoint de métricas."""
+        self.print_summary()
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+
+def create_profiler(config):
+    """Cria o Profiler configurado em config['profiling'], se habilitado."""
+    profiling_config = config.get('profiling', {})
+    if not profiling_config.get('enabled', False):
+        return None
+    return Profiler(profiling_config.get('window', 1000), profiling_config.get('summary_interval', 0),
+                    profiling_config.get('port'), profiling_config.get('host', '127.0.0.1'))
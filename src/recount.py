@@ -0,0 +1,99 @@
+import json
+import time
+import numpy as np
+from .path_config import load_paths
+from .trajectory_store import TrajectoryStore
+
+def path_completions(store, points, frame_range=None):
+    """Veículos que completam um percurso nas trajetórias gravadas, com o mesmo critério de PathZone.process_vehicle.
+
+    Cada veículo avança no máximo um checkpoint por frame, quando sua caixa cobre o próximo
+    checkpoint; o progresso é perdido quando o veículo some por um frame, e cada ID conta uma
+    vez. Com frame_range (início, fim), só esses frames são considerados, como se a contagem
+    começasse em início. Retorna (IDs, frame da conclusão), em ordem de ID.
+
+    Só são lidas as linhas que cobrem cada checkpoint (índice espacial). Como as linhas estão
+    ordenadas por (ID, frame), o checkpoint k de um trecho contínuo é alcançado na primeira linha
+    que o cobre depois da linha em que o checkpoint k-1 foi alcançado.
+    """
+    if len(points) < 2:
+        raise ValueError("Um percurso precisa de pelo menos 2 pontos.")
+    hit_runs = hit_rows = None
+    for px, py in points:
+        rows, runs = store.covering_rows(int(px), int(py))
+        if frame_range is not None:
+            frames = np.asarray(store.frames[rows])
+            inside = (frames >= frame_range[0]) & (frames < frame_range[1])
+            rows, runs = rows[inside], runs[inside]
+        if hit_runs is not None:
+            if len(hit_runs) == 0:
+                break
+            # Só os trechos que alcançaram o checkpoint anterior, depois da linha em que o alcançaram
+            base = hit_runs[0]
+            limit = np.full(hit_runs[-1] - base + 1, np.iinfo(np.int64).max)
+            limit[hit_runs - base] = hit_rows
+            inside = (runs >= base) & (runs <= hit_runs[-1])
+            rows, runs = rows[inside], runs[inside]
+            keep = rows > limit[runs - base]
+            rows, runs = rows[keep], runs[keep]
+        # Primeira linha de cada trecho (as linhas estão em ordem, e os trechos também)
+        first = np.ones(len(runs), dtype=bool)
+        first[1:] = runs[1:] != runs[:-1]
+        hit_runs, hit_rows = runs[first], rows[first]
+
+    ids = np.asarray(store.ids[hit_rows]).astype(np.int64)
+    # Um ID conta uma única vez: vale a primeira conclusão (as linhas de um ID estão em ordem de frame)
+    ids, first = np.unique(ids, return_index=True)
+    return ids, np.asarray(store.frames[hit_rows[first]]).astype(np.int64)
+
+def recount(store, variants, frame_range=None):
+    """Conta cada variante de percursos sobre as trajetórias gravadas.
+
+    variants é um dicionário {nome da variante: lista de percursos (listas de pontos)}; os
+    percursos de cada variante recebem os nomes 'A', 'B', ... como em create_paths. Os percursos
+    são independentes entre si, então cada percurso distinto é avaliado uma única vez, mesmo
+    que apareça em várias variantes. Retorna {variante: {percurso: contagem}}.
+    """
+    completions = {}
+    results = {}
+    for variant_name, paths in variants.items():
+        counts = {}
+        for i, points in enumerate(paths):
+            key = tuple(map(tuple, points))
+            if key not in completions:
+                completions[key] = path_completions(store, points, frame_range)
+            counts[chr(ord('A') + i)] = len(completions[key][0])
+        results[variant_name] = counts
+    return results
+
+def load_variants(file_path, resolution):
+    """Lê as variantes de percursos de um arquivo JSON, na resolução das trajetórias.
+
+    O arquivo é um dicionário {nome: variante}, em que cada variante é o caminho de um arquivo
+    salvo por save_paths ou um objeto {"paths": [...], "resolution": [w, h]}; os pontos são
+    reescalados para resolution quando a resolução informada é outra.
+    """
+    with open(file_path, 'r') as f:
+        data = json.load(f)
+    variants = {}
+    for name, variant in data.items():
+        if isinstance(variant, str):
+            variants[name] = load_paths(variant, resolution)
+            continue
+        paths = [[tuple(point) for point in path] for path in variant['paths']]
+        source = variant.get('resolution', resolution)
+        sx, sy = resolution[0] / source[0], resolution[1] / source[1]
+        variants[name] = [[(int(round(x * sx)), int(round(y * sy))) for x, y in path] for path in paths]
+    return variants
+
+def recount_variants(store_path, variants_file, frame_range=None):
+    """Conta as variantes de variants_file sobre as trajetórias de store_path e imprime a tabela."""
+    store = TrajectoryStore(store_path)
+    variants = load_variants(variants_file, store.resolution)
+    start = time.perf_counter()
+    results = recount(store, variants, frame_range)
+    elapsed = time.perf_counter() - start
+    print(f"\n--- Recontagem: {len(variants)} variantes sobre {len(store)} linhas de {len(store.track_ids)} veículos ({elapsed:.2f} s) ---")
+    for name, counts in results.items():
+        print(f"{name:<20} " + '  '.join(f"{path}: {count}" for path, count in counts.items()))
+    return results
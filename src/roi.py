@@ -0,0 +1,43 @@
+import math
+import numpy as np
+
+def _overlaps(a, b):
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+def merge_rects(rects):
+    """Une os retângulos (x1,y1,x2,y2) que se sobrepõem, até que nenhum par se sobreponha."""
+    rects = [list(rect) for rect in rects]
+    merged = True
+    while merged:
+        merged = False
+        for i in range(len(rects)):
+            for j in range(i + 1, len(rects)):
+                if _overlaps(rects[i], rects[j]):
+                    a, b = rects[i], rects.pop(j)
+                    rects[i] = [min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3])]
+                    merged = True
+                    break
+            if merged:
+                break
+    return [tuple(rect) for rect in sorted(rects)]
+
+def crop_rects(paths_coords, frame_w, frame_h, margin):
+    """Calcula os recortes de ROI que cobrem os checkpoints de todos os percursos.
+
+    Cada percurso gera o retângulo envolvente de seus checkpoints, ampliado por margin pixels
+    (espaço para a extensão dos veículos) e limitado ao frame. Retângulos que se sobrepõem são
+    unidos, para que nenhuma região seja detectada duas vezes.
+    """
+    rects = []
+    for path in paths_coords:
+        points = np.array(path)
+        x1, y1 = points.min(axis=0) - margin
+        x2, y2 = points.max(axis=0) + margin + 1
+        rects.append([max(int(x1), 0), max(int(y1), 0), min(int(x2), frame_w), min(int(y2), frame_h)])
+    return merge_rects(rects)
+
+def crop_imgsz(rects, frame_w, frame_h, full_imgsz=640, stride=32):
+    """Tamanho de entrada do modelo para os recortes, na mesma escala usada para o frame inteiro."""
+    scale = full_imgsz / max(frame_w, frame_h)
+    longest = max(max(x2 - x1, y2 - y1) for x1, y1, x2, y2 in rects)
+    return min(full_imgsz, max(stride, math.ceil(longest * scale / stride) * stride))
@@ -0,0 +1,156 @@
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+import cv2
+import numpy as np
+from .frame_pool import open_frame_reader
+from .process_video import count_vehicles, create_path_counter, detect_frames, detector_params, path_counters, read_frames, tracker_params
+from .sort import iou_batch, linear_assignment
+from .vehicle_tracker import VehicleTracker
+
+def plan_segments(n_frames, workers, segment_frames=0):
+    """Divide [0, n_frames) em segmentos (início, fim) consecutivos; 0 em segment_frames = um segmento por worker."""
+    if segment_frames <= 0:
+        segment_frames = math.ceil(n_frames / max(workers, 1))
+    segment_frames = max(segment_frames, 1)
+    return [(start, min(start + segment_frames, n_frames)) for start in range(0, n_frames, segment_frames)]
+
+def seek(cap, frame_index):
+    """Posiciona a captura para que a próxima leitura seja o frame frame_index.
+
+    Em alguns codecs (GOP longo sem índice, taxa de quadros variável), CAP_PROP_POS_FRAMES para
+    em outro frame, o que deslocaria as fronteiras dos segmentos; se a posição informada depois
+    da busca não é a pedida, os frames anteriores são lidos e descartados desde o início. A
+    verificação depende da posição informada pelo backend, que nem sempre reflete o frame real.
+    """
+    if frame_index <= 0:
+        return
+    cap.set(cv2.CAP_PROP_POS_FRAMES, frame_index)
+    if int(cap.get(cv2.CAP_PROP_POS_FRAMES)) == frame_index:
+        return
+    print(f"Busca imprecisa no frame {frame_index}: descartando os frames anteriores.")
+    cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+    for _ in range(frame_index):
+        if not cap.grab():
+            break
+
+def track_segment(config, start, end, overlap, target_w, target_h, rois=None, roi_imgsz=None):
+    """Detecta e rastreia os frames [start - overlap, end) em um processo próprio, com um SORT novo.
+
+    Os overlap frames antes de start servem de aquecimento do rastreador e de região de junção
+    com o segmento anterior. end None lê até o fim do vídeo. Retorna (primeiro frame lido,
+    índices dos frames, resultados [x1,y1,x2,y2,id]) com uma linha por veículo rastreado.
+    """
+    first = max(start - overlap, 0)
+    cap = cv2.VideoCapture(config['video_path'])
+    seek(cap, first)
+    tracker = VehicleTracker(config['model_path'], config['classes_path'], config['target_classes'], config['confidence_threshold'], tracker_params(config), detector_params(config))
+    if rois is not None:
+        tracker.set_rois(rois, roi_imgsz)
+
+    # O ffmpeg leria desde o início do vídeo: cada segmento decodifica com o OpenCV a partir de first
+    reader = open_frame_reader(config, cap, target_w, target_h, max(config.get('batch_size', 1), 1), allow_ffmpeg=False)
+    frames = islice(read_frames(cap, target_w, target_h, reader=reader), None if end is None else end - first)
+    frame_indices, rows = [np.empty(0, dtype=np.int64)], [np.empty((0, 5))]
+    for i, (frame, detections) in enumerate(detect_frames(frames, tracker, config.get('batch_size', 1))):
+        tracked_results = tracker.track_vehicles(frame, detections)
+        frame_indices.append(np.full(len(tracked_results), first + i, dtype=np.int64))
+        rows.append(tracked_results)
+    cap.release()
+    return first, np.concatenate(frame_indices), np.concatenate(rows)
+
+def match_overlap(prev_frames, prev_results, frames, results, first, start, iou_threshold=0.3):
+    """Associa os IDs de dois segmentos consecutivos pelos frames [first, start) rastreados por ambos.
+
+    Cada par de IDs recebe um voto por frame em que as caixas têm IoU >= iou_threshold, e a
+    associação um-para-um maximiza o total de votos. Retorna {ID do segmento novo: ID do anterior}.
+    """
+    prev_in = (prev_frames >= first) & (prev_frames < start)
+    cur_in = (frames >= first) & (frames < start)
+    prev_ids, prev_inv = np.unique(prev_results[prev_in, 4].astype(np.int64), return_inverse=True)
+    cur_ids, cur_inv = np.unique(results[cur_in, 4].astype(np.int64), return_inverse=True)
+    if len(prev_ids) == 0 or len(cur_ids) == 0:
+        return {}
+
+    votes = np.zeros((len(prev_ids), len(cur_ids)))
+    prev_f, prev_boxes = prev_frames[prev_in], prev_results[prev_in, :4]
+    cur_f, cur_boxes = frames[cur_in], results[cur_in, :4]
+    for frame_index in np.intersect1d(prev_f, cur_f):
+        a, b = prev_f == frame_index, cur_f == frame_index
+        hits = iou_batch(prev_boxes[a], cur_boxes[b]) >= iou_threshold
+        rows, cols = np.nonzero(hits)
+        np.add.at(votes, (prev_inv[a][rows], cur_inv[b][cols]), 1)
+
+    matches = linear_assignment(-votes).reshape(-1, 2).astype(int)
+    return {int(cur_ids[j]): int(prev_ids[i]) for i, j in matches if votes[i, j] > 0}
+
+def stitch_segments(segments, iou_threshold=0.3):
+    """Junta os resultados dos segmentos em uma única sequência de frames, com IDs globais.
+
+    segments é uma lista de (início, primeiro frame lido, índices dos frames, resultados), em
+    ordem. Cada segmento contribui com os frames do seu trecho próprio [início, início do
+    próximo); veículos que atravessam a junção herdam o ID global do segmento anterior.
+    """
+    out_frames, out_results = [], []
+    prev = None
+    next_id = 1
+    for k, (start, first, frames, results) in enumerate(segments):
+        local_ids = results[:, 4].astype(np.int64)
+        mapping = {}
+        if prev is not None:
+            prev_frames, prev_results, prev_global = prev
+            for local_id, prev_id in match_overlap(prev_frames, prev_results, frames, results, first, start, iou_threshold).items():
+                if prev_id in prev_global:
+                    mapping[local_id] = prev_global[prev_id]
+
+        end = segments[k + 1][0] if k + 1 < len(segments) else np.iinfo(np.int64).max
+        core = (frames >= start) & (frames < end)
+        # IDs novos em ordem de primeira aparição no trecho próprio do segmento
+        unique_ids, first_seen = np.unique(local_ids[core], return_index=True)
+        for local_id in unique_ids[np.argsort(first_seen)].tolist():
+            if local_id not in mapping:
+                mapping[local_id] = next_id
+                next_id += 1
+
+        global_ids = np.array([mapping.get(local_id, 0) for local_id in local_ids.tolist()], dtype=float)
+        stitched = results.copy()
+        stitched[:, 4] = global_ids
+        out_frames.append(frames[core])
+        out_results.append(stitched[core])
+        prev = (frames, results, mapping)
+    return np.concatenate(out_frames), np.concatenate(out_results)
+
+def run_segments(config, paths, target_w, target_h, rois=None, roi_imgsz=None, sink=None, trajectories=None):
+    """Processa o vídeo em segmentos sobrepostos em um pool de processos e conta sobre as trajetórias unidas.
+
+    Cada processo detecta e rastreia um segmento com o seu próprio SORT; os IDs são unidos nas
+    sobreposições e a contagem roda uma única vez, na ordem dos frames, sobre o resultado.
+    """
+    segment_config = config.get('segments', {})
+    cap = cv2.VideoCapture(config['video_path'])
+    n_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+    if n_frames <= 0:
+        raise ValueError(f"Número de frames desconhecido para o vídeo: {config['video_path']}")
+
+    workers = segment_config.get('workers') or os.cpu_count() or 1
+    overlap = segment_config.get('overlap', 60)
+    plan = plan_segments(n_frames, workers, segment_config.get('segment_frames', 0))
+    with ProcessPoolExecutor(max_workers=min(workers, len(plan))) as pool:
+        # O último segmento lê até o fim do vídeo, caso a contagem de frames do contêiner seja inexata
+        futures = [pool.submit(track_segment, config, start, end if k + 1 < len(plan) else None, overlap, target_w, target_h, rois, roi_imgsz)
+                   for k, (start, end) in enumerate(plan)]
+        segments = [(start, *future.result()) for (start, _), future in zip(plan, futures)]
+    print(f"{len(plan)} segmentos processados em {min(workers, len(plan))} processos.")
+
+    frames, results = stitch_segments(segments, segment_config.get('iou_threshold', 0.3))
+    counter = create_path_counter(config, paths)
+    last_frame = int(frames.max(initial=-1)) + 1
+    bounds = np.searchsorted(frames, np.arange(last_frame + 1))
+    for frame_index in range(last_frame):
+        count_vehicles(results[bounds[frame_index]:bounds[frame_index + 1]], counter, sink, frame_index)
+        if sink is not None:
+            sink.frame_done(frame_index, lambda: path_counters(paths))
+        if trajectories is not None:
+            trajectories.append(frame_index, results[bounds[frame_index]:bounds[frame_index + 1]])
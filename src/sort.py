@@ -19,20 +19,20 @@ from __future__ import print_function
 
 import os
 import numpy as np
-import matplotlib
-matplotlib.use('TkAgg')
-import matplotlib.pyplot as plt
-import matplotlib.patches as patches
-from skimage import io
 
 import glob
 import time
 import argparse
-from filterpy.kalman import KalmanFilter
+# filterpy, matplotlib and skimage are imported where they are used, so that importing
+# this module for tracking only costs numpy
 
 np.random.seed(0)
 
 
+# above this many detection/tracker pairs the IOU matrix is no longer built in full
+DENSE_ASSOCIATION_SIZE = 200 * 200
+
+
 def linear_assignment(cost_matrix):
   try:
     import lap
@@ -96,10 +96,13 @@ class KalmanBoxTracker(object):
   This class represents the internal state of individual tracked objects observed as bbox.
   """
   count = 0
-  def __init__(self,bbox):
+  def __init__(self,bbox,max_history=None):
     """
     Initialises a tracker using initial bounding box.
+
+    max_history caps the number of predictions kept while the track coasts (None keeps all).
     """
+    from filterpy.kalman import KalmanFilter
     #define constant velocity model
     self.kf = KalmanFilter(dim_x=7, dim_z=4) 
     self.kf.F = np.array([[1,0,0,0,1,0,0],[0,1,0,0,0,1,0],[0,0,1,0,0,0,1],[0,0,0,1,0,0,0],  [0,0,0,0,1,0,0],[0,0,0,0,0,1,0],[0,0,0,0,0,0,1]])
@@ -116,6 +119,7 @@ class KalmanBoxTracker(object):
     self.id = KalmanBoxTracker.count
     KalmanBoxTracker.count += 1
     self.history = []
+    self.max_history = None if max_history is None else max(int(max_history), 1)
     self.hits = 0
     self.hit_streak = 0
     self.age = 0
@@ -142,8 +146,21 @@ class KalmanBoxTracker(object):
       self.hit_streak = 0
     self.time_since_update += 1
     self.history.append(convert_x_to_bbox(self.kf.x))
+    if self.max_history is not None and len(self.history) > self.max_history:
+      del self.history[0]
     return self.history[-1]
 
+  def coast(self):
+    """
+    Advances the state vector for a frame on which no detection was run, without
+    counting it as a missed detection. Returns the predicted bounding box estimate.
+    """
+    if((self.kf.x[6]+self.kf.x[2])<=0):
+      self.kf.x[6] *= 0.0
+    self.kf.predict()
+    self.age += 1
+    return convert_x_to_bbox(self.kf.x)
+
   def get_state(self):
     """
     Returns the current bounding box estimate.
@@ -151,61 +168,308 @@ class KalmanBoxTracker(object):
     return convert_x_to_bbox(self.kf.x)
 
 
+def convert_bboxes_to_z(bboxes):
+  """
+  Vectorised convert_bbox_to_z: takes an (N,4+) array of [x1,y1,x2,y2] boxes and
+    returns an (N,4) array of [x,y,s,r] rows
+  """
+  w = bboxes[:, 2] - bboxes[:, 0]
+  h = bboxes[:, 3] - bboxes[:, 1]
+  return np.stack([bboxes[:, 0] + w/2., bboxes[:, 1] + h/2., w * h, w / h], axis=1)
+
+
+def convert_xs_to_bboxes(xs):
+  """
+  Vectorised convert_x_to_bbox: takes an (N,4+) array of [x,y,s,r] rows and
+    returns an (N,4) array of [x1,y1,x2,y2] boxes
+  """
+  w = np.sqrt(xs[:, 2] * xs[:, 3])
+  h = xs[:, 2] / w
+  return np.stack([xs[:, 0]-w/2., xs[:, 1]-h/2., xs[:, 0]+w/2., xs[:, 1]+h/2.], axis=1)
+
+
+class KalmanBoxTrackerBank(object):
+  """
+  Batched counterpart of KalmanBoxTracker: keeps the state and covariance of every
+    tracked object in contiguous arrays and predicts/updates all of them at once.
+
+  The arrays are a pool of track slots: live tracks occupy the first len(self) slots in
+    creation order, new tracks take the next free slots and dead tracks are compacted away
+    in place. The pool doubles when it runs out of slots and is never reallocated otherwise,
+    so its size settles at the peak number of simultaneous tracks.
+  """
+  # same constant velocity model and noise settings as KalmanBoxTracker
+  F = np.array([[1,0,0,0,1,0,0],[0,1,0,0,0,1,0],[0,0,1,0,0,0,1],[0,0,0,1,0,0,0],  [0,0,0,0,1,0,0],[0,0,0,0,0,1,0],[0,0,0,0,0,0,1]], dtype=float)
+  H = np.array([[1,0,0,0,0,0,0],[0,1,0,0,0,0,0],[0,0,1,0,0,0,0],[0,0,0,1,0,0,0]], dtype=float)
+  R = np.diag([1., 1., 10., 10.])
+  Q = np.diag([1., 1., 1., 1., 0.01, 0.01, 0.0001])
+  P0 = np.diag([10., 10., 10., 10., 10000., 10000., 10000.])
+  # per-slot arrays and the trailing shape of each slot
+  SLOTS = {'_x': ((7,), float), '_P': ((7, 7), float), '_x_next': ((7,), float), '_P_next': ((7, 7), float),
+           '_id': ((), int), '_time_since_update': ((), int), '_hits': ((), int), '_hit_streak': ((), int), '_age': ((), int)}
+
+  def __init__(self, capacity=64):
+    self.n = 0
+    for name, (shape, dtype) in self.SLOTS.items():
+      setattr(self, name, np.empty((capacity,) + shape, dtype=dtype))
+
+  def __len__(self):
+    return self.n
+
+  # live tracks, as views of the first len(self) slots
+  x = property(lambda self: self._x[:self.n])
+  P = property(lambda self: self._P[:self.n])
+  id = property(lambda self: self._id[:self.n])
+  time_since_update = property(lambda self: self._time_since_update[:self.n])
+  hits = property(lambda self: self._hits[:self.n])
+  hit_streak = property(lambda self: self._hit_streak[:self.n])
+  age = property(lambda self: self._age[:self.n])
+
+  @property
+  def capacity(self):
+    return len(self._id)
+
+  def _reserve(self, size):
+    """
+    Grows the pool (doubling) so that it holds at least size tracks.
+    """
+    if size <= self.capacity:
+      return
+    capacity = max(size, 2 * self.capacity)
+    for name, (shape, dtype) in self.SLOTS.items():
+      grown = np.empty((capacity,) + shape, dtype=dtype)
+      grown[:self.n] = getattr(self, name)[:self.n]
+      setattr(self, name, grown)
+
+  def add(self, bboxes):
+    """
+    Starts one new track per row of bboxes, taking IDs from KalmanBoxTracker.count.
+    """
+    n = len(bboxes)
+    if n == 0:
+      return
+    self._reserve(self.n + n)
+    new = slice(self.n, self.n + n)
+    self._x[new] = 0.
+    self._x[new, :4] = convert_bboxes_to_z(bboxes)
+    self._P[new] = self.P0
+    self._id[new] = KalmanBoxTracker.count + np.arange(n)
+    KalmanBoxTracker.count += n
+    for counter in (self._time_since_update, self._hits, self._hit_streak, self._age):
+      counter[new] = 0
+    self.n += n
+
+  def keep(self, mask):
+    """
+    Drops every track whose entry in the boolean mask is False, keeping the order of the rest.
+    """
+    if mask.all():
+      return
+    idx = np.flatnonzero(mask)
+    for name in ('_x', '_P', '_id', '_time_since_update', '_hits', '_hit_streak', '_age'):
+      slots = getattr(self, name)
+      slots[:len(idx)] = slots[idx]
+    self.n = len(idx)
+
+  def predict(self):
+    """
+    Advances all state vectors and returns the (N,4) predicted bounding boxes.
+    """
+    bboxes = self.coast()
+    self.hit_streak[self.time_since_update > 0] = 0
+    self.time_since_update[:] += 1
+    return bboxes
+
+  def coast(self):
+    """
+    Advances all state vectors for a frame on which no detection was run, without
+    counting it as a missed detection. Returns the (N,4) predicted bounding boxes.
+    """
+    n = self.n
+    x = self.x
+    x[(x[:, 6] + x[:, 2]) <= 0, 6] = 0.
+    # predicted state and covariance go to the spare slots, which then become the live ones
+    np.matmul(x, self.F.T, out=self._x_next[:n])
+    np.matmul(self.F, self.P, out=self._P_next[:n])
+    np.matmul(self._P_next[:n], self.F.T, out=self._P[:n])
+    self._P[:n] += self.Q
+    self._x, self._x_next = self._x_next, self._x
+    self.age[:] += 1
+    return convert_xs_to_bboxes(self.x)
+
+  def update(self, idx, bboxes):
+    """
+    Updates the tracks at positions idx with the observed bboxes (one row each).
+    """
+    if len(idx) == 0:
+      return
+    self.time_since_update[idx] = 0
+    self.hits[idx] += 1
+    self.hit_streak[idx] += 1
+
+    x, P = self.x[idx], self.P[idx]
+    y = convert_bboxes_to_z(bboxes) - x[:, :4]
+    PHT = P @ self.H.T
+    S = self.H @ PHT + self.R
+    K = PHT @ np.linalg.inv(S)
+    self.x[idx] = x + (K @ y[:, :, None])[:, :, 0]
+    I_KH = np.eye(7) - K @ self.H
+    self.P[idx] = I_KH @ P @ I_KH.transpose(0, 2, 1) + K @ self.R @ K.transpose(0, 2, 1)
+
+  def get_state(self):
+    """
+    Returns the (N,4) current bounding box estimates.
+    """
+    return convert_xs_to_bboxes(self.x)
+
+
+def iou_pairs(bb_test, bb_gt):
+  """
+  Computes IOU between row-aligned bboxes in the form [x1,y1,x2,y2], i.e. the
+    diagonal of iou_batch(bb_test, bb_gt)
+  """
+  w = np.maximum(0., np.minimum(bb_test[:, 2], bb_gt[:, 2]) - np.maximum(bb_test[:, 0], bb_gt[:, 0]))
+  h = np.maximum(0., np.minimum(bb_test[:, 3], bb_gt[:, 3]) - np.maximum(bb_test[:, 1], bb_gt[:, 1]))
+  wh = w * h
+  return wh / ((bb_test[:, 2] - bb_test[:, 0]) * (bb_test[:, 3] - bb_test[:, 1])
+    + (bb_gt[:, 2] - bb_gt[:, 0]) * (bb_gt[:, 3] - bb_gt[:, 1]) - wh)
+
+
+def overlapping_pairs(bb_test, bb_gt):
+  """
+  Finds every pair of boxes [x1,y1,x2,y2] that overlap, using a sorted-interval sweep
+    on x instead of the full len(bb_test) x len(bb_gt) matrix
+
+  Returns the (i, j) index arrays of the pairs and their IOU (same values as iou_batch)
+  """
+  order = np.argsort(bb_gt[:, 0], kind='stable')
+  gx1 = bb_gt[order, 0]
+  max_w = (bb_gt[:, 2] - bb_gt[:, 0]).max()
+  # any bb_gt overlapping a bb_test in x starts inside (test.x1 - max_w, test.x2)
+  lo = np.searchsorted(gx1, bb_test[:, 0] - max_w, side='right')
+  hi = np.searchsorted(gx1, bb_test[:, 2], side='left')
+  counts = np.maximum(hi - lo, 0)
+  i = np.repeat(np.arange(len(bb_test)), counts)
+  offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+  j = order[np.repeat(lo, counts) + offsets]
+
+  o = iou_pairs(bb_test[i], bb_gt[j])
+  keep = o > 0
+  return i[keep], j[keep], o[keep]
+
+
+def gated_assignment(detections, trackers, iou_threshold):
+  """
+  Solves the detection/tracker assignment only over overlapping pairs, one connected
+    group of overlapping boxes at a time, which gives the same matches as solving it
+    over the full IOU matrix
+
+  Returns the (K,2) array of [detection, tracker] index pairs
+  """
+  n_dets, n_trks = len(detections), len(trackers)
+  di, ti, iou = overlapping_pairs(detections, trackers)
+
+  above = iou > iou_threshold
+  det_hits = np.bincount(di[above], minlength=n_dets)
+  trk_hits = np.bincount(ti[above], minlength=n_trks)
+  if det_hits.max() == 1 and trk_hits.max() == 1:
+    return np.stack((di[above], ti[above]), axis=1)
+
+  from scipy.sparse import coo_matrix
+  from scipy.sparse.csgraph import connected_components
+  graph = coo_matrix((np.ones(len(di)), (di, n_dets + ti)), shape=(n_dets + n_trks,)*2)
+  _, labels = connected_components(graph, directed=False)
+  edge_label = labels[di]
+  edges_per_label = np.bincount(edge_label, minlength=n_dets + n_trks)
+  single = edges_per_label[edge_label] == 1
+  matched_indices = [np.stack((di[single], ti[single]), axis=1)]
+
+  # solve each remaining group of overlapping boxes on its own small IOU matrix
+  multi = np.flatnonzero(~single)
+  multi = multi[np.argsort(edge_label[multi], kind='stable')]
+  bounds = np.flatnonzero(np.diff(edge_label[multi])) + 1
+  for sel in np.split(multi, bounds):
+    if len(sel) == 0:
+      continue
+    rows, row_idx = np.unique(di[sel], return_inverse=True)
+    cols, col_idx = np.unique(ti[sel], return_inverse=True)
+    sub_iou = np.zeros((len(rows), len(cols)))
+    sub_iou[row_idx, col_idx] = iou[sel]
+    sub = linear_assignment(-sub_iou).reshape(-1, 2).astype(int)
+    matched_indices.append(np.stack((rows[sub[:, 0]], cols[sub[:, 1]]), axis=1))
+  return np.concatenate(matched_indices)
+
+
 def associate_detections_to_trackers(detections,trackers,iou_threshold = 0.3):
   """
   Assigns detections to tracked object (both represented as bounding boxes)
 
+  Large problems are gated to overlapping pairs (see gated_assignment) instead of
+    building the full IOU matrix. Unmatched indices come in the original SORT order:
+    those left out of the assignment in ascending order, then the assigned pairs
+    rejected for low IOU. A gated problem only assigns overlapping pairs, so a detection
+    the full matrix would have paired with a non-overlapping tracker comes in the first
+    group there instead of the second.
+
   Returns 3 lists of matches, unmatched_detections and unmatched_trackers
   """
   if(len(trackers)==0):
     return np.empty((0,2),dtype=int), np.arange(len(detections)), np.empty((0,5),dtype=int)
+  n_dets, n_trks = len(detections), len(trackers)
+  if(n_dets==0):
+    return np.empty((0,2),dtype=int), np.empty(0,dtype=int), np.arange(n_trks)
 
-  iou_matrix = iou_batch(detections, trackers)
-
-  if min(iou_matrix.shape) > 0:
+  if n_dets * n_trks <= DENSE_ASSOCIATION_SIZE:
+    # small problems are cheaper to solve on the full IOU matrix
+    iou_matrix = iou_batch(detections, trackers)
     a = (iou_matrix > iou_threshold).astype(np.int32)
     if a.sum(1).max() == 1 and a.sum(0).max() == 1:
-        matched_indices = np.stack(np.where(a), axis=1)
+      matched_indices = np.stack(np.where(a), axis=1)
     else:
-      matched_indices = linear_assignment(-iou_matrix)
+      matched_indices = linear_assignment(-iou_matrix).reshape(-1, 2).astype(int)
   else:
-    matched_indices = np.empty(shape=(0,2))
-
-  unmatched_detections = []
-  for d, det in enumerate(detections):
-    if(d not in matched_indices[:,0]):
-      unmatched_detections.append(d)
-  unmatched_trackers = []
-  for t, trk in enumerate(trackers):
-    if(t not in matched_indices[:,1]):
-      unmatched_trackers.append(t)
+    matched_indices = gated_assignment(detections, trackers, iou_threshold)
 
+  matched_indices = matched_indices[np.argsort(matched_indices[:, 0], kind='stable')]
   #filter out matched with low IOU
-  matches = []
-  for m in matched_indices:
-    if(iou_matrix[m[0], m[1]]<iou_threshold):
-      unmatched_detections.append(m[0])
-      unmatched_trackers.append(m[1])
-    else:
-      matches.append(m.reshape(1,2))
-  if(len(matches)==0):
-    matches = np.empty((0,2),dtype=int)
-  else:
-    matches = np.concatenate(matches,axis=0)
+  matched_iou = iou_pairs(detections[matched_indices[:, 0]], trackers[matched_indices[:, 1]])
+  low_iou = matched_iou < iou_threshold
+  matches = matched_indices[~low_iou]
 
-  return matches, np.array(unmatched_detections), np.array(unmatched_trackers)
+  # unassigned indices first, then the low IOU rejects: Sort.update starts new tracks in this order
+  det_assigned = np.zeros(n_dets, dtype=bool)
+  det_assigned[matched_indices[:, 0]] = True
+  trk_assigned = np.zeros(n_trks, dtype=bool)
+  trk_assigned[matched_indices[:, 1]] = True
+  unmatched_detections = np.concatenate((np.flatnonzero(~det_assigned), matched_indices[low_iou, 0]))
+  unmatched_trackers = np.concatenate((np.flatnonzero(~trk_assigned), matched_indices[low_iou, 1]))
+  return matches, unmatched_detections, unmatched_trackers
 
 
 class Sort(object):
-  def __init__(self, max_age=1, min_hits=3, iou_threshold=0.3):
+  def __init__(self, max_age=1, min_hits=3, iou_threshold=0.3, backend='filterpy', max_history=None):
     """
     Sets key parameters for SORT
+
+    backend - 'filterpy' keeps one KalmanBoxTracker per object, 'batched' keeps all
+      objects in a single KalmanBoxTrackerBank. Both produce the same IDs and boxes.
+    max_history - caps KalmanBoxTracker.history for the 'filterpy' backend (None keeps all).
+
+    Set the .profiler attribute after construction to an object with a since(stage, start)
+    method to have update and coast report the time spent in prediction, association and
+    track update (None, the default, disables it).
     """
+    if backend not in ('filterpy', 'batched'):
+      raise ValueError("Unknown SORT backend '%s'" % backend)
     self.max_age = max_age
     self.min_hits = min_hits
     self.iou_threshold = iou_threshold
+    self.backend = backend
+    self.max_history = max_history
     self.trackers = []
+    self.bank = KalmanBoxTrackerBank()
     self.frame_count = 0
+    self.profiler = None # Set by the caller; see the docstring above
 
   def update(self, dets=np.empty((0, 5))):
     """
@@ -216,6 +480,11 @@ class Sort(object):
 
     NOTE: The number of objects returned may differ from the number of detections provided.
     """
+    if self.backend == 'batched':
+      return self._update_batched(dets)
+    profiler = self.profiler
+    if profiler is not None:
+      start = time.perf_counter()
     self.frame_count += 1
     # get predicted locations from existing trackers.
     trks = np.zeros((len(self.trackers), 5))
@@ -229,7 +498,11 @@ class Sort(object):
     trks = np.ma.compress_rows(np.ma.masked_invalid(trks))
     for t in reversed(to_del):
       self.trackers.pop(t)
+    if profiler is not None:
+      start = profiler.since('sort_predict', start)
     matched, unmatched_dets, unmatched_trks = associate_detections_to_trackers(dets,trks, self.iou_threshold)
+    if profiler is not None:
+      start = profiler.since('sort_associate', start)
 
     # update matched trackers with assigned detections
     for m in matched:
@@ -237,7 +510,7 @@ class Sort(object):
 
     # create and initialise new trackers for unmatched detections
     for i in unmatched_dets:
-        trk = KalmanBoxTracker(dets[i,:])
+        trk = KalmanBoxTracker(dets[i,:], self.max_history)
         self.trackers.append(trk)
     i = len(self.trackers)
     for trk in reversed(self.trackers):
@@ -248,10 +521,105 @@ class Sort(object):
         # remove dead tracklet
         if(trk.time_since_update > self.max_age):
           self.trackers.pop(i)
+    ret = np.concatenate(ret) if len(ret) > 0 else np.empty((0,5))
+    if profiler is not None:
+      profiler.since('sort_update', start)
+    return ret
+
+  def coast(self):
+    """
+    Advances all tracks by prediction alone, for frames on which no detection was run.
+    Tracks keep their hit and miss counts, and the tracks that were reported on the last
+    updated frame are reported again at their predicted positions.
+
+    Returns the same format as update.
+    """
+    if self.profiler is not None:
+      start = time.perf_counter()
+      ret = self._coast()
+      self.profiler.since('sort_predict', start)
+      return ret
+    return self._coast()
+
+  def _coast(self):
+    self.frame_count += 1
+    if self.backend == 'batched':
+      bank = self.bank
+      trks = bank.coast()
+      valid = ~np.any(np.isnan(trks), axis=1)
+      if not valid.all():
+        bank.keep(valid)
+        trks = trks[valid]
+      alive = (bank.time_since_update < 1) & ((bank.hit_streak >= self.min_hits) | (self.frame_count <= self.min_hits))
+      return np.concatenate((trks[alive], bank.id[alive, None] + 1), axis=1)[::-1]
+
+    ret = []
+    for t in reversed(range(len(self.trackers))):
+      trk = self.trackers[t]
+      pos = trk.coast()[0]
+      if np.any(np.isnan(pos)):
+        self.trackers.pop(t)
+      elif (trk.time_since_update < 1) and (trk.hit_streak >= self.min_hits or self.frame_count <= self.min_hits):
+        ret.append(np.concatenate((pos,[trk.id+1])).reshape(1,-1))
     if(len(ret)>0):
       return np.concatenate(ret)
     return np.empty((0,5))
 
+  def unstable_count(self):
+    """
+    Number of tracks that are still tentative or just missed a detection. Tracks that have been
+    lost for longer are not counted, since they are no longer reported.
+    """
+    if self.backend == 'batched':
+      bank = self.bank
+      return int(np.count_nonzero((bank.time_since_update == 1) | ((bank.time_since_update == 0) & (bank.hit_streak < self.min_hits))))
+    return sum(1 for trk in self.trackers if trk.time_since_update == 1 or (trk.time_since_update == 0 and trk.hit_streak < self.min_hits))
+
+  def stats(self):
+    """
+    Sizes of the tracker state: live tracks, pooled track slots (batched backend), stored
+      history entries and IDs handed out so far.
+    """
+    if self.backend == 'batched':
+      return {'tracks': len(self.bank), 'track_slots': self.bank.capacity, 'history_entries': 0, 'ids_issued': KalmanBoxTracker.count}
+    tracks, history = len(self.trackers), sum(len(trk.history) for trk in self.trackers)
+    return {'tracks': tracks, 'history_entries': history, 'ids_issued': KalmanBoxTracker.count}
+
+  def _update_batched(self, dets):
+    """
+    Same as update, but predicts and updates all tracks with batched array operations.
+    """
+    profiler = self.profiler
+    if profiler is not None:
+      start = time.perf_counter()
+    self.frame_count += 1
+    bank = self.bank
+    trks = bank.predict()
+    valid = ~np.any(np.isnan(trks), axis=1)
+    if not valid.all():
+      bank.keep(valid)
+      trks = trks[valid]
+    if profiler is not None:
+      start = profiler.since('sort_predict', start)
+    matched, unmatched_dets, unmatched_trks = associate_detections_to_trackers(dets, trks, self.iou_threshold)
+    if profiler is not None:
+      start = profiler.since('sort_associate', start)
+
+    # update matched trackers with assigned detections
+    bank.update(matched[:, 1], dets[matched[:, 0], :4])
+
+    # create and initialise new trackers for unmatched detections
+    bank.add(dets[unmatched_dets.astype(int), :4])
+
+    # report in the same (reverse creation) order as the per-object backend
+    alive = (bank.time_since_update < 1) & ((bank.hit_streak >= self.min_hits) | (self.frame_count <= self.min_hits))
+    ret = np.concatenate((bank.get_state()[alive], bank.id[alive, None] + 1), axis=1)[::-1]
+    # remove dead tracklets
+    bank.keep(bank.time_since_update <= self.max_age)
+    if profiler is not None:
+      profiler.since('sort_update', start)
+    return ret
+
 def parse_args():
     """Parse input arguments."""
     parser = argparse.ArgumentParser(description='SORT demo')
@@ -277,6 +645,11 @@ if __name__ == '__main__':
   total_frames = 0
   colours = np.random.rand(32, 3) #used only for display
   if(display):
+    import matplotlib
+    matplotlib.use('TkAgg')
+    import matplotlib.pyplot as plt
+    import matplotlib.patches as patches
+    from skimage import io
     if not os.path.exists('mot_benchmark'):
       print('\n\tERROR: mot_benchmark link not found!\n\n    Create a symbolic link to the MOT benchmark\n    (https://motchallenge.net/data/2D_MOT_2015/#download). E.g.:\n\n    $ ln -s /path/to/MOT2015_challenge/2DMOT2015 mot_benchmark\n\n')
       exit()
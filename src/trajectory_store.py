@@ -0,0 +1,208 @@
+import json
+import os
+import numpy as np
+
+# Colunas do armazenamento: uma linha por veículo rastreado em cada frame
+COLUMNS = {'frames': np.int32, 'ids': np.int32, 'boxes': np.int32}
+# Índice temporal (por veículo e por trecho contínuo de frames consecutivos) e espacial (por célula da grade)
+INDEX = ('track_ids', 'track_offsets', 'track_frames', 'run_offsets', 'cell_rows', 'cell_runs', 'cell_boxes', 'cell_offsets', 'cell_bounds')
+
+def _ranges(starts, ends):
+    """Concatenação de np.arange(start, end) para cada par, sem laço em Python."""
+    lengths = ends - starts
+    if lengths.sum() == 0:
+        return np.empty(0, dtype=np.int64)
+    steps = np.ones(int(lengths.sum()), dtype=np.int64)
+    nonempty = lengths > 0
+    first = np.concatenate(([0], np.cumsum(lengths[nonempty])[:-1]))
+    steps[first] = starts[nonempty] - np.concatenate(([0], ends[nonempty][:-1] - 1))
+    return np.cumsum(steps)
+
+class TrajectoryWriter:
+    """Grava as saídas do rastreador (frame, ID, caixa) em um TrajectoryStore.
+
+    As caixas são truncadas para inteiros, como na contagem. As linhas chegam em ordem de frame
+    e são anexadas a arquivos brutos a cada flush_rows linhas, então a memória não cresce com a
+    duração do vídeo; em close() elas são reordenadas por veículo e o índice é gerado.
+    """
+    def __init__(self, path, resolution, video_path=None, flush_rows=100000, cell_size=32):
+        self.path = path
+        self.flush_rows = flush_rows
+        os.makedirs(path, exist_ok=True)
+        # Uma gravação anterior no mesmo diretório deixa de valer até o novo close()
+        if os.path.exists(os.path.join(path, 'meta.json')):
+            os.remove(os.path.join(path, 'meta.json'))
+        self.meta = {'resolution': list(resolution), 'video': video_path, 'frames': 0, 'cell_size': cell_size}
+        self.raw = {name: open(os.path.join(path, f'{name}.raw'), 'wb') for name in COLUMNS}
+        self.pending = []
+        self.pending_rows = 0
+        self.rows = 0
+
+    def append(self, frame_index, tracked_results):
+        """Adiciona os veículos rastreados [x1,y1,x2,y2,id] de um frame."""
+        self.meta['frames'] = max(self.meta['frames'], frame_index + 1)
+        if len(tracked_results) == 0:
+            return
+        self.pending.append((frame_index, np.asarray(tracked_results).reshape(-1, 5)))
+        self.pending_rows += len(self.pending[-1][1])
+        if self.pending_rows >= self.flush_rows:
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+        results = np.concatenate([results for _, results in self.pending])
+        frames = np.repeat([frame_index for frame_index, _ in self.pending], [len(results) for _, results in self.pending])
+        self.raw['frames'].write(frames.astype(np.int32).tobytes())
+        self.raw['ids'].write(results[:, 4].astype(np.int32).tobytes())
+        self.raw['boxes'].write(results[:, :4].astype(np.int32).tobytes())
+        self.rows += len(results)
+        self.pending = []
+        self.pending_rows = 0
+
+    def close(self):
+        """Reordena as linhas por (ID, frame), grava as colunas e o índice, e remove os arquivos brutos."""
+        self.flush()
+        for f in self.raw.values():
+            f.close()
+        raw = {name: np.fromfile(os.path.join(self.path, f'{name}.raw'), dtype=dtype) for name, dtype in COLUMNS.items()}
+        raw['boxes'] = raw['boxes'].reshape(-1, 4)
+        order = np.lexsort((raw['frames'], raw['ids']))
+        columns = {name: column[order] for name, column in raw.items()}
+        index = build_index(columns['frames'], columns['ids'], columns['boxes'], self.meta['resolution'], self.meta['cell_size'])
+        for name, column in dict(columns, **index).items():
+            np.save(os.path.join(self.path, f'{name}.npy'), column)
+        for name in COLUMNS:
+            os.remove(os.path.join(self.path, f'{name}.raw'))
+        self.meta['rows'] = len(order)
+        # meta.json é gravado por último: só então o armazenamento está completo
+        with open(os.path.join(self.path, 'meta.json'), 'w') as f:
+            json.dump(self.meta, f, indent=2)
+        print(f"Trajetórias salvas em '{self.path}': {len(order)} linhas, {len(np.unique(columns['ids']))} veículos.")
+
+def build_index(frames, ids, boxes, resolution, cell_size=32):
+    """Índice das linhas ordenadas por (ID, frame).
+
+    Temporal: por veículo, o ID, a primeira linha e o primeiro e o último frame; por trecho
+    contínuo (frames consecutivos do mesmo veículo), a primeira linha. Espacial: as linhas
+    agrupadas pela célula da grade (cell_size pixels) que contém o centro da caixa, com a caixa
+    que envolve todas as caixas de cada célula; um ponto só pode ser coberto por linhas das
+    células cuja caixa envolvente o contém. Na ordem das células também ficam o trecho e as
+    coordenadas (uma linha por coordenada) de cada linha, para que a consulta leia memória
+    contígua. As listas de offsets terminam com o total.
+    """
+    n = len(ids)
+    new_track = np.ones(n, dtype=bool)
+    new_track[1:] = ids[1:] != ids[:-1]
+    new_run = new_track.copy()
+    new_run[1:] |= frames[1:] != frames[:-1] + 1
+    # Índices de linha em 32 bits enquanto couberem
+    row_dtype = np.int32 if n < np.iinfo(np.int32).max else np.int64
+    runs = np.cumsum(new_run) - 1
+    track_starts = np.flatnonzero(new_track)
+    track_offsets = np.append(track_starts, n).astype(np.int64)
+    track_frames = np.column_stack((frames[track_starts], frames[track_offsets[1:] - 1])) if n else np.empty((0, 2), dtype=np.int32)
+
+    grid_w, grid_h = -(-resolution[0] // cell_size), -(-resolution[1] // cell_size)
+    cx = np.clip((boxes[:, 0] + boxes[:, 2]) // 2 // cell_size, 0, grid_w - 1)
+    cy = np.clip((boxes[:, 1] + boxes[:, 3]) // 2 // cell_size, 0, grid_h - 1)
+    cells = cy.astype(np.int64) * grid_w + cx
+    cell_rows = np.argsort(cells, kind='stable')
+    cell_offsets = np.searchsorted(cells[cell_rows], np.arange(grid_w * grid_h + 1))
+    # Células vazias ficam com uma caixa envolvente que não contém nenhum ponto
+    cell_bounds = np.tile(np.array([np.iinfo(np.int32).max, np.iinfo(np.int32).max, np.iinfo(np.int32).min, np.iinfo(np.int32).min], dtype=np.int32), (grid_w * grid_h, 1))
+    cell_boxes = np.ascontiguousarray(boxes[cell_rows].T)
+    filled = np.flatnonzero(np.diff(cell_offsets) > 0)
+    if len(filled):
+        starts = cell_offsets[filled]
+        cell_bounds[filled] = np.column_stack((np.minimum.reduceat(cell_boxes[0], starts), np.minimum.reduceat(cell_boxes[1], starts),
+                                               np.maximum.reduceat(cell_boxes[2], starts), np.maximum.reduceat(cell_boxes[3], starts)))
+    return {
+        'track_ids': ids[track_starts],
+        'track_offsets': track_offsets,
+        'track_frames': track_frames,
+        'run_offsets': np.append(np.flatnonzero(new_run), n).astype(np.int64),
+        'cell_rows': cell_rows.astype(row_dtype),
+        'cell_runs': runs[cell_rows].astype(row_dtype),
+        'cell_boxes': cell_boxes,
+        'cell_offsets': cell_offsets.astype(np.int64),
+        'cell_bounds': cell_bounds,
+    }
+
+class TrajectoryStore:
+    """Trajetórias gravadas por TrajectoryWriter, lidas com memory-map.
+
+    As colunas frames, ids e boxes têm uma linha por veículo por frame, ordenadas por (ID,
+    frame); o índice permite selecionar os veículos por intervalo de frames (temporal) e as
+    linhas cujas caixas cobrem um ponto (espacial) sem percorrer todas as linhas.
+    """
+    def __init__(self, path):
+        meta_path = os.path.join(path, 'meta.json')
+        if not os.path.exists(meta_path):
+            raise FileNotFoundError(f"Trajetórias não encontradas (ou incompletas): {path}")
+        with open(meta_path, 'r') as f:
+            self.meta = json.load(f)
+        self.path = path
+        self.resolution = tuple(self.meta['resolution'])
+        for name in list(COLUMNS) + list(INDEX):
+            setattr(self, name, np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r'))
+        # Índices pequenos ficam em memória
+        self.run_offsets = np.asarray(self.run_offsets)
+        self.track_offsets = np.asarray(self.track_offsets)
+        self.cell_offsets = np.asarray(self.cell_offsets)
+        self.cell_bounds = np.asarray(self.cell_bounds)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def select_tracks(self, start, end):
+        """Índices dos veículos que aparecem em algum frame de [start, end)."""
+        track_frames = np.asarray(self.track_frames)
+        return np.flatnonzero((track_frames[:, 1] >= start) & (track_frames[:, 0] < end))
+
+    def covering_rows(self, px, py):
+        """Linhas cujas caixas cobrem o ponto (px, py) e o trecho contínuo de cada uma, em ordem."""
+        b = self.cell_bounds
+        cells = np.flatnonzero((b[:, 0] <= px) & (px <= b[:, 2]) & (b[:, 1] <= py) & (py <= b[:, 3]))
+        parts = [slice(start, end) for start, end in zip(self.cell_offsets[cells].tolist(), self.cell_offsets[cells + 1].tolist())]
+        x1, y1, x2, y2 = (np.concatenate([self.cell_boxes[k, part] for part in parts] or [np.empty(0, np.int32)]) for k in range(4))
+        covered = (x1 <= px) & (px <= x2) & (y1 <= py) & (py <= y2)
+        rows, runs = (np.concatenate([column[part] for part in parts] or [np.empty(0, column.dtype)])[covered]
+                      for column in (self.cell_rows, self.cell_runs))
+        # Cada célula já está em ordem: a ordenação estável (timsort) só intercala as sequências.
+        # Os trechos crescem com as linhas, então as duas ordenações independentes mantêm os pares.
+        rows.sort(kind='stable')
+        runs.sort(kind='stable')
+        return rows, runs
+
+    def track_rows(self, tracks):
+        """Linhas (ordenadas) dos veículos de índices tracks."""
+        return _ranges(self.track_offsets[tracks], self.track_offsets[np.asarray(tracks) + 1])
+
+    def track(self, track_id):
+        """Frames e caixas de um veículo."""
+        k = np.searchsorted(self.track_ids, track_id)
+        if k == len(self.track_ids) or self.track_ids[k] != track_id:
+            raise KeyError(track_id)
+        rows = slice(self.track_offsets[k], self.track_offsets[k + 1])
+        return np.asarray(self.frames[rows]), np.asarray(self.boxes[rows])
+
+    def frame(self, frame_index):
+        """Veículos rastreados [x1,y1,x2,y2,id] em um frame (só percorre os veículos presentes nele)."""
+        tracks = self.select_tracks(frame_index, frame_index + 1)
+        rows = self.track_rows(tracks)
+        rows = rows[np.asarray(self.frames[rows]) == frame_index]
+        return np.column_stack((self.boxes[rows], self.ids[rows])).astype(float)
+
+def open_trajectory_writer(config, target_w, target_h, name=None):
+    """Abre o gravador de trajetórias configurado em config['trajectories'], se habilitado.
+
+    Cada vídeo (ou câmera, com name) grava em um diretório próprio dentro de config['trajectories']['dir'].
+    """
+    trajectory_config = config.get('trajectories', {})
+    if not trajectory_config.get('enabled', False):
+        return None
+    if name is None:
+        name = os.path.splitext(os.path.basename(str(config['video_path'])))[0] or 'stream'
+    return TrajectoryWriter(os.path.join(trajectory_config.get('dir', './data/trajectories'), name), (target_w, target_h),
+                            str(config['video_path']), trajectory_config.get('flush_rows', 100000), trajectory_config.get('cell_size', 32))
@@ -1,37 +1,163 @@
+import functools
+import time
 import cv2
 import numpy as np
-from ultralytics import YOLO
+from .detectors import create_detector
 from .sort import Sort
 
+def _timed_detection(method):
+    """Registra no profiler, por frame, o tempo de uma detecção gasto fora do YOLO (pós-processamento).
+
+    Chamadas aninhadas (detect -> detect_batch) são medidas uma única vez, na mais externa.
+    """
+    @functools.wraps(method)
+    def wrapper(self, frames, *args, **kwargs):
+        if self.profiler is None or self._timing:
+            return method(self, frames, *args, **kwargs)
+        self._timing = True
+        self._inference_time = 0.0
+        start = time.perf_counter()
+        try:
+            return method(self, frames, *args, **kwargs)
+        finally:
+            self._timing = False
+            n = 1 if isinstance(frames, np.ndarray) else max(len(frames), 1)
+            self.profiler.record('postprocess', (time.perf_counter() - start - self._inference_time) / n, n)
+    return wrapper
+
 class VehicleTracker:
     """Encapsula o modelo YOLO e o rastreador SORT."""
-    def __init__(self, model_path, classes_path, target_classes, conf_threshold, tracker_params):
-        self.model = YOLO(model_path)
+    def __init__(self, model_path, classes_path, target_classes, conf_threshold, tracker_params, detector_params=None):
+        self.model_path = model_path
+        self.detector_params = detector_params # Backend de detecção (config['detector']); None = Ultralytics
+        self._detector = None
         try:
             with open(classes_path, 'r') as f:
                 self.classnames = f.read().splitlines()
         except FileNotFoundError:
             print(f"Erro: Arquivo de classes '{classes_path}' não encontrado.")
             self.classnames = []
-        
+
         self.target_classes = set(target_classes)
         self.conf_threshold = conf_threshold
         self.tracker = Sort(**tracker_params)
 
-    def track_vehicles(self, frame):
-        """Detecta e rastreia veículos em um frame."""
-        detections = np.empty((0, 5))
-        results = self.model(frame, stream=True, verbose=False)
-
-        for res in results:
-            for box in res.boxes:
-                x1, y1, x2, y2 = map(int, box.xyxy[0])
-                confidence, cls_index = float(box.conf[0]), int(box.cls[0])
-                
-                if 0 <= cls_index < len(self.classnames):
-                    class_name = self.classnames[cls_index]
-                    if class_name in self.target_classes and confidence > self.conf_threshold:
-                        detections = np.vstack((detections, [x1, y1, x2, y2, confidence]))
-                        cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 150, 0), 2)
-        
-        return self.tracker.update(detections)
\ No newline at end of file
+        # Máscara de classes-alvo indexada pelo ID da classe (calculada uma única vez)
+        self.target_class_mask = np.array([name in self.target_classes for name in self.classnames], dtype=bool)
+        self.target_class_ids = np.flatnonzero(self.target_class_mask).tolist()
+        self.last_detections = np.empty((0, 5))
+        self.last_tracked = np.empty((0, 5)) # Veículos rastreados reportados no último frame
+        self.rois = None # Recortes (x1,y1,x2,y2) onde a detecção é feita; None = frame inteiro
+        self.roi_imgsz = None
+        self.profiler = None # Profiler que recebe os tempos de inferência e de pós-processamento
+        self._timing = False
+        self._inference_time = 0.0
+
+    @property
+    def detector(self):
+        """Backend de detecção, carregado só no primeiro uso (ultralytics/torch são pesados e dispensáveis com o cache de detecções)."""
+        if self._detector is None:
+            self._detector = create_detector(self.model_path, self.detector_params)
+        return self._detector
+
+    def set_rois(self, rects, imgsz):
+        """Restringe a detecção aos recortes informados, com o modelo rodando em imgsz."""
+        self.rois = [tuple(map(int, rect)) for rect in rects] or None
+        self.roi_imgsz = imgsz
+
+    def run_model(self, inputs, n_frames, **model_kwargs):
+        """Roda o YOLO sobre inputs (n_frames frames) e retorna (caixas, confianças, classes) de cada imagem.
+
+        Com profiler, registra o tempo da inferência por frame.
+        """
+        detector = self.detector
+        if self.profiler is None:
+            return detector.predict(inputs, **model_kwargs)
+        start = time.perf_counter()
+        results = list(detector.predict(inputs, **model_kwargs))
+        elapsed = time.perf_counter() - start
+        self._inference_time += elapsed
+        self.profiler.record('inference', elapsed / n_frames, n_frames)
+        return results
+
+    def model_filters(self):
+        # O filtro de classes e de confiança é aplicado já na chamada do modelo
+        return {'classes': self.target_class_ids or None, 'conf': self.conf_threshold}
+
+    def predict(self, frames, rois=None, imgsz=None, **model_kwargs):
+        """Roda o YOLO sobre um lote de frames e retorna (caixas, confianças, classes) de cada frame.
+
+        Com ROIs definidas (as de set_rois, ou rois/imgsz informados), o modelo roda só sobre os
+        recortes de cada frame, e as caixas são devolvidas em coordenadas do frame.
+        """
+        frames = list(frames)
+        if rois is None:
+            rois, imgsz = self.rois, self.roi_imgsz
+        if rois is None:
+            return list(self.run_model(frames, len(frames), **model_kwargs))
+
+        crops = [frame[y1:y2, x1:x2] for frame in frames for x1, y1, x2, y2 in rois]
+        results = self.run_model(crops, len(frames), imgsz=imgsz, **model_kwargs)
+        offsets = np.array([[x1, y1, x1, y1] for x1, y1, _, _ in rois], dtype=np.float32)
+        n_rois = len(rois)
+        per_frame = []
+        for i in range(len(frames)):
+            parts = results[i*n_rois:(i+1)*n_rois]
+            per_frame.append((
+                np.concatenate([xyxy + offset for (xyxy, _, _), offset in zip(parts, offsets)]),
+                np.concatenate([conf for _, conf, _ in parts]),
+                np.concatenate([cls for _, _, cls in parts]),
+            ))
+        return per_frame
+
+    @_timed_detection
+    def detect(self, frame):
+        """Executa o YOLO e retorna as detecções filtradas como array [[x1,y1,x2,y2,conf],...]."""
+        if self.rois is not None:
+            return self.detect_batch([frame])[0]
+        results = self.run_model(frame, 1, stream=True, **self.model_filters())
+        detections = [self.filter_detections(*arrays) for arrays in results]
+        return np.concatenate(detections) if detections else np.empty((0, 5))
+
+    @_timed_detection
+    def detect_batch(self, frames):
+        """Executa o YOLO sobre um lote de frames de uma só vez e retorna as detecções de cada frame, na ordem."""
+        return [self.filter_detections(*arrays) for arrays in self.predict(frames, **self.model_filters())]
+
+    @_timed_detection
+    def detect_regions(self, frame, rects, imgsz):
+        """Executa o YOLO só sobre os recortes rects de um frame, com o modelo rodando em imgsz."""
+        return self.filter_detections(*self.predict([frame], rois=rects, imgsz=imgsz, **self.model_filters())[0])
+
+    @_timed_detection
+    def detect_raw(self, frames, min_confidence):
+        """Executa o YOLO sem filtro de classe sobre um lote de frames e retorna (caixas, confianças, classes) de cada um."""
+        return self.predict(frames, conf=min_confidence)
+
+    def filter_detections(self, xyxy, conf, cls):
+        """Filtra por classe e confiança arrays inteiros de caixas, confianças e classes."""
+        cls = cls.astype(int)
+        valid = (cls >= 0) & (cls < len(self.target_class_mask))
+        keep = valid & (conf > self.conf_threshold)
+        keep[keep] = self.target_class_mask[cls[keep]]
+        # Coordenadas truncadas para inteiros, como na conversão original com int()
+        return np.column_stack((np.trunc(xyxy[keep]), conf[keep])).astype(float)
+
+    def track_vehicles(self, frame, detections=None):
+        """Detecta e rastreia veículos em um frame (ou rastreia detecções já calculadas para ele)."""
+        self.last_detections = self.detect(frame) if detections is None else detections
+        self.last_tracked = self.tracker.update(self.last_detections)
+        return self.last_tracked
+
+    def coast_vehicles(self):
+        """Avança os rastros só pela predição do Kalman, em um frame sem detecção."""
+        self.last_detections = np.empty((0, 5))
+        self.last_tracked = self.tracker.coast()
+        return self.last_tracked
+
+    def draw_detections(self, frame, detections=None):
+        """Desenha as caixas das detecções (por padrão, as do último frame rastreado)."""
+        if detections is None:
+            detections = self.last_detections
+        for x1, y1, x2, y2 in detections[:, :4].astype(int):
+            cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 150, 0), 2)
@@ -0,0 +1,42 @@
+import os
+import sys
+import numpy as np
+import pytest
+
+# Os testes importam src e benchmarks a partir da raiz do repositório
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import Traffic, lane_paths
+
+def crossing_tracks(n_objects=16, n_frames=150, width=640, height=360, drop=0.1, clutter=2.0, seed=0):
+    """Detecções [x1,y1,x2,y2,score] por frame de objetos que se cruzam, com falhas e falsos positivos.
+
+    Os objetos andam em linha reta com ruído e aparecem em frames diferentes, então há
+    nascimentos, mortes, associações ambíguas e mais detecções que rastros em vários frames.
+    """
+    rng = np.random.default_rng(seed)
+    start = rng.integers(0, max(n_frames // 3, 1), n_objects)
+    position = rng.uniform((0, 0), (width, height), (n_objects, 2))
+    velocity = rng.uniform(-4, 4, (n_objects, 2))
+    half = rng.uniform(15, 30, (n_objects, 2))
+    frames = []
+    for t in range(n_frames):
+        alive = (start <= t) & (rng.random(n_objects) > drop)
+        center = position[alive] + velocity[alive] * (t - start[alive, None]) + rng.normal(0, 1.5, (alive.sum(), 2))
+        boxes = np.column_stack((center - half[alive], center + half[alive], np.full(alive.sum(), 0.9)))
+        noise = rng.uniform((0, 0), (width, height), (rng.poisson(clutter), 2))
+        boxes = np.concatenate((boxes, np.column_stack((noise, noise + 40, np.full(len(noise), 0.5)))))
+        frames.append(boxes[rng.permutation(len(boxes))])
+    return frames
+
+def traffic_frames(n_frames=600, drop=0.003, seed=0):
+    """Veículos rastreados [x1,y1,x2,y2,id] por frame; com drop, veículos somem por um frame e perdem o progresso."""
+    paths = lane_paths(3, checkpoints=4)
+    traffic = Traffic(paths, n_frames, density=0.05, seed=seed)
+    rng = np.random.default_rng(seed)
+    frames = [boxes[rng.random(len(boxes)) > drop] for boxes in map(traffic.positions, range(n_frames))]
+    return paths, frames
+
+@pytest.fixture
+def crossing_detections():
+    return crossing_tracks()
@@ -0,0 +1,39 @@
+import numpy as np
+from src.detection_cache import DetectionCache
+
+def random_detections(rng, n_frames):
+    frames = []
+    for _ in range(n_frames):
+        n = rng.integers(0, 6)
+        boxes = rng.uniform(0, 800, (n, 4)).astype(np.float32)
+        frames.append((boxes, rng.uniform(0.1, 1, n).astype(np.float32), rng.integers(0, 80, n).astype(np.int16)))
+    return frames
+
+def open_cache(tmp_path, flush_frames):
+    for name in ('video.mp4', 'model.pt'):
+        (tmp_path / name).touch()
+    return DetectionCache(str(tmp_path / 'cache'), str(tmp_path / 'video.mp4'), str(tmp_path / 'model.pt'), (848, 480),
+                          flush_frames=flush_frames)
+
+def assert_frames(cache, frames):
+    assert len(cache) == len(frames)
+    for frame_index, expected in enumerate(frames):
+        for column, value in zip(cache.get(frame_index), expected):
+            np.testing.assert_array_equal(column, value)
+
+def test_flushed_frames_survive_an_interrupted_run(tmp_path):
+    frames = random_detections(np.random.default_rng(0), 25)
+    cache = open_cache(tmp_path, flush_frames=10)
+    for frame_index, detections in enumerate(frames):
+        cache.put(frame_index, *detections)
+    assert len(cache.pending) == 5
+    # Sem close(): só os frames das escritas completas valem, e a escrita parcial seguinte é descartada
+    with open(cache._column_path('scores'), 'ab') as f:
+        f.write(b'\0' * 12)
+    reopened = open_cache(tmp_path, flush_frames=10)
+    assert_frames(reopened, frames[:20])
+
+    for frame_index, detections in enumerate(frames[20:], 20):
+        reopened.put(frame_index, *detections)
+    reopened.close()
+    assert_frames(open_cache(tmp_path, flush_frames=10), frames)
@@ -0,0 +1,26 @@
+import numpy as np
+import pytest
+from conftest import traffic_frames
+from src.path_counter import create_counter
+from src.process_video import create_paths, path_counters
+
+def scanned_progress(counter):
+    """checkpoint_progress pela varredura do progresso de todos os veículos, sem o índice incremental."""
+    progress = dict.fromkeys(counter.paths, 0)
+    for progress_dict in counter.vehicle_path_progress.values():
+        for name, reached in progress_dict.items():
+            progress[name] = max(progress[name], reached)
+    return progress
+
+@pytest.mark.parametrize('counted_id_ttl', [None, 10])
+def test_vectorized_counter_matches_pathzone(counted_id_ttl):
+    paths, frames = traffic_frames()
+    counters = {engine: create_counter(create_paths(paths), engine, counted_id_ttl) for engine in ('pathzone', 'vectorized')}
+    for tracked_results in frames:
+        events = {engine: counter.update(tracked_results) for engine, counter in counters.items()}
+        assert sorted(events['vectorized']) == sorted(events['pathzone'])
+        np.testing.assert_array_equal(counters['vectorized'].next_checkpoints(tracked_results), counters['pathzone'].next_checkpoints(tracked_results))
+        assert counters['vectorized'].checkpoint_progress() == counters['pathzone'].checkpoint_progress() == scanned_progress(counters['pathzone'])
+    counts = {engine: path_counters(counter.paths) for engine, counter in counters.items()}
+    assert counts['vectorized'] == counts['pathzone']
+    assert sum(counts['pathzone'].values()) > 0
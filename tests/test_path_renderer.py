@@ -0,0 +1,19 @@
+import cv2
+import numpy as np
+from src.path_renderer import OverlayLayer
+
+def test_overlay_blends_anti_aliased_edges():
+    rng = np.random.default_rng(0)
+    frame = rng.integers(0, 256, (120, 160, 3), dtype=np.uint8)
+    layer = OverlayLayer(frame.shape)
+    for image, color in ((layer.image, (255, 255, 255)), (layer.mask, 255)):
+        cv2.putText(image, '12', (20, 60), cv2.FONT_HERSHEY_SIMPLEX, 1.0, color, 1, cv2.LINE_AA)
+        cv2.rectangle(image, (90, 20), (140, 50), color, -1)
+    assert np.count_nonzero((layer.mask > 0) & (layer.mask < 255)) > 0
+
+    composed = layer.composite(frame.copy())
+    expected = frame.astype(np.float64) * (1 - layer.mask[..., None] / 255) + layer.image
+    assert np.abs(composed - expected).max() <= 1
+    # Fora dos desenhos o frame não muda, e a área opaca é copiada da camada
+    np.testing.assert_array_equal(composed[layer.mask == 0], frame[layer.mask == 0])
+    np.testing.assert_array_equal(composed[layer.mask == 255], layer.image[layer.mask == 255])
@@ -0,0 +1,9 @@
+import pytest
+from src.process_video import process_video
+
+@pytest.mark.parametrize('mode', ['pipeline', 'segments'])
+@pytest.mark.parametrize('option', ['live', 'adaptive_stride', 'motion_gate'])
+def test_serial_only_options_reject_other_modes(tmp_path, option, mode):
+    config = {'video_path': str(tmp_path / 'video.mp4'), option: {'enabled': True}, mode: {'enabled': True}}
+    with pytest.raises(ValueError, match=option):
+        process_video(config, [], 848, 480)
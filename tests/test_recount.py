@@ -0,0 +1,25 @@
+import pytest
+from conftest import traffic_frames
+from src.path_counter import create_counter
+from src.process_video import create_paths, path_counters
+from src.recount import recount
+from src.trajectory_store import TrajectoryStore, TrajectoryWriter
+
+@pytest.mark.parametrize('frame_range', [None, (150, 450)])
+def test_recount_matches_live_counter(tmp_path, frame_range):
+    paths, frames = traffic_frames()
+    writer = TrajectoryWriter(str(tmp_path / 'trajectories'), (848, 480), flush_rows=500)
+    for frame_index, tracked_results in enumerate(frames):
+        writer.append(frame_index, tracked_results)
+    writer.close()
+
+    # A contagem ao vivo começa no início de frame_range, como a recontagem
+    start, end = frame_range or (0, len(frames))
+    counter = create_counter(create_paths(paths))
+    for tracked_results in frames[start:end]:
+        counter.update(tracked_results)
+    live = path_counters(counter.paths)
+
+    counts = recount(TrajectoryStore(str(tmp_path / 'trajectories')), {'v': paths}, frame_range)
+    assert counts['v'] == live
+    assert sum(live.values()) > 0
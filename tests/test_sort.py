@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+from conftest import crossing_tracks
+from src import sort
+from src.sort import KalmanBoxTracker, Sort
+
+PARAMS = [dict(max_age=1, min_hits=3, iou_threshold=0.3), dict(max_age=5, min_hits=1, iou_threshold=0.5)]
+
+def run_sort(frames, backend, **params):
+    KalmanBoxTracker.count = 0
+    tracker = Sort(backend=backend, **params)
+    return [tracker.update(dets.copy()) for dets in frames]
+
+@pytest.mark.parametrize('params', PARAMS)
+def test_batched_backend_matches_filterpy(crossing_detections, params):
+    pytest.importorskip('filterpy')
+    reference = run_sort(crossing_detections, 'filterpy', **params)
+    batched = run_sort(crossing_detections, 'batched', **params)
+    for expected, result in zip(reference, batched):
+        assert result.shape == expected.shape
+        np.testing.assert_allclose(result, expected, rtol=0, atol=1e-6)
+
+def reference_association(detections, trackers, iou_threshold=0.3):
+    """associate_detections_to_trackers do SORT original: matriz de IoU completa e laços em Python."""
+    if len(trackers) == 0:
+        return np.empty((0, 2), dtype=int), np.arange(len(detections)), np.empty((0, 5), dtype=int)
+    iou_matrix = sort.iou_batch(detections, trackers)
+    if min(iou_matrix.shape) > 0:
+        a = (iou_matrix > iou_threshold).astype(np.int32)
+        if a.sum(1).max() == 1 and a.sum(0).max() == 1:
+            matched_indices = np.stack(np.where(a), axis=1)
+        else:
+            matched_indices = sort.linear_assignment(-iou_matrix)
+    else:
+        matched_indices = np.empty(shape=(0, 2))
+    unmatched_detections = [d for d in range(len(detections)) if d not in matched_indices[:, 0]]
+    unmatched_trackers = [t for t in range(len(trackers)) if t not in matched_indices[:, 1]]
+    matches = []
+    for m in matched_indices:
+        if iou_matrix[m[0], m[1]] < iou_threshold:
+            unmatched_detections.append(m[0])
+            unmatched_trackers.append(m[1])
+        else:
+            matches.append(m.reshape(1, 2))
+    matches = np.concatenate(matches, axis=0) if matches else np.empty((0, 2), dtype=int)
+    return matches, np.array(unmatched_detections), np.array(unmatched_trackers)
+
+@pytest.mark.parametrize('params', PARAMS)
+def test_association_keeps_original_ids(crossing_detections, params, monkeypatch):
+    # Mais detecções que rastros em vários frames: a ordem das não associadas define os novos IDs
+    result = run_sort(crossing_detections, 'batched', **params)
+    monkeypatch.setattr(sort, 'associate_detections_to_trackers', reference_association)
+    reference = run_sort(crossing_detections, 'batched', **params)
+    for expected, tracked in zip(reference, result):
+        assert tracked.shape == expected.shape
+        np.testing.assert_allclose(tracked, expected, rtol=0, atol=1e-6)
+
+def test_gated_association_matches_dense(monkeypatch):
+    frames = crossing_tracks(n_objects=60, n_frames=2, clutter=20.0, seed=1)
+    detections, trackers = frames[1][:, :4], frames[0][:, :4]
+    dense = sort.associate_detections_to_trackers(detections, trackers, 0.3)
+    monkeypatch.setattr(sort, 'DENSE_ASSOCIATION_SIZE', 0)
+    gated = sort.associate_detections_to_trackers(detections, trackers, 0.3)
+    np.testing.assert_array_equal(gated[0], dense[0])
+    # Só a ordem das não associadas pode mudar (pares sem sobreposição na matriz completa)
+    for a, b in zip(gated[1:], dense[1:]):
+        np.testing.assert_array_equal(np.sort(a), np.sort(b))